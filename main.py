@@ -56,6 +56,10 @@ insights = ai.analyze_data_insights(results)
 # 4. 生成报告
 reporter = ReportGenerator()
 report_path = reporter.generate_markdown_report(results, insights)
+
+# 或流式：AI洞察边生成边写入报告并在终端显示
+report_path = reporter.generate_markdown_report(
+    results, ai.stream_data_insights(results), on_text=lambda t: print(t, end='', flush=True))
     """)
 
     print("\n提示: 请将数据文件放入 data/ 目录，然后运行分析")
@@ -0,0 +1,72 @@
+"""
+订阅生命周期引擎基准测试：向量化实现 vs notebook 中的 groupby/merge 写法
+运行方式: python scripts/benchmark_lifecycle.py [--rows 3000000]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from src.analysis.lifecycle import USER_KEY, lifecycle, subscription_lifecycle
+
+JAN = 1735689600
+
+
+def make_orders(n_rows, seed=0):
+    """生成模拟订单：约 n/5 个订阅，20% 试用，部分订阅已取消"""
+    rng = np.random.default_rng(seed)
+    sub = rng.integers(0, max(n_rows // 5, 1), n_rows)
+    return pd.DataFrame({
+        'order_int_id': np.arange(n_rows),
+        'brand': np.where(sub % 2, 'OSAIO', 'Nooie'),
+        'subscribe_id': np.char.add('s', sub.astype(str)),
+        'uid': np.char.add('u', (sub // 2).astype(str)),
+        'pay_time': JAN + rng.integers(0, 300 * 86400, n_rows),
+        'amount': np.where(rng.random(n_rows) < 0.2, 0.0, 2.99),
+        'is_trial': rng.random(n_rows) < 0.2,
+        'sub_cancel_time': np.where(sub % 3 == 0, JAN + 200 * 86400, 0),
+    })
+
+
+def pandas_baseline(df):
+    """notebook 写法：排序后 groupby cumcount/diff，按用户 merge 首次试用和首次付费"""
+    paid = df[~df['is_trial']].sort_values(['pay_time', 'order_int_id'])
+    grouped = paid.groupby(['brand', 'subscribe_id'])
+    renewal_index = grouped.cumcount()
+    gap = grouped['pay_time'].diff()
+    trial_first = df[df['is_trial']].groupby(USER_KEY)['pay_time'].min().reset_index()
+    paid_first = paid.groupby(USER_KEY)['pay_time'].min().rename('first_paid').reset_index()
+    merged = trial_first.merge(paid_first, on=USER_KEY, how='left')
+    converted = merged['first_paid'] > merged['pay_time']
+    churn = df[df['sub_cancel_time'] > 0].groupby(['brand', 'subscribe_id'])['sub_cancel_time'].max()
+    return renewal_index, gap, converted, churn
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='订阅生命周期基准测试')
+    parser.add_argument('--rows', type=int, default=3000000)
+    args = parser.parse_args()
+
+    print(f"生成 {args.rows:,} 笔模拟订单...")
+    df = make_orders(args.rows)
+
+    baseline = timed(pandas_baseline, df)
+    print(f"  pandas groupby/merge:        {baseline:6.2f}s")
+    per_sub = timed(lifecycle, df)
+    per_user = timed(subscription_lifecycle, df, key=USER_KEY)
+    print(f"  lifecycle（订单+订阅汇总）:   {per_sub:6.2f}s")
+    print(f"  subscription_lifecycle(uid): {per_user:6.2f}s")
+    print(f"\n向量化合计 {per_sub + per_user:.2f}s, 基线 {baseline:.2f}s, 加速比 {baseline / (per_sub + per_user):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
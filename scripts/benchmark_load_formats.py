@@ -0,0 +1,107 @@
+"""
+对比不同文件格式下 DataAnalyzer.load_data 的加载耗时和峰值内存（RSS）
+每次加载在独立子进程中执行，峰值RSS互不干扰
+运行方式: python scripts/benchmark_load_formats.py [--rows 1000000] [--columns brand,amount,pay_time]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import time
+
+FORMATS = {
+    'csv': 'orders.csv',
+    'csv.gz': 'orders.csv.gz',
+    'parquet': 'orders.parquet',
+    'feather': 'orders.feather',
+}
+
+
+def write_files(df, directory):
+    """把同一份数据写成各种格式，返回 {格式: (路径, 文件大小)}"""
+    paths = {}
+    for fmt, name in FORMATS.items():
+        path = os.path.join(directory, name)
+        if fmt.startswith('csv'):
+            df.to_csv(path, index=False)
+        elif fmt == 'parquet':
+            df.to_parquet(path, row_group_size=100000)
+        else:
+            df.to_feather(path)
+        paths[fmt] = (path, os.path.getsize(path))
+    return paths
+
+
+def peak_rss_mb():
+    """当前进程峰值RSS（MB）；Linux 上 ru_maxrss 会跨 exec 继承父进程的值，优先读 VmHWM"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_once(path, columns, filters, engine):
+    """子进程入口：加载一次，输出耗时、行数和峰值RSS（MB）"""
+    from src.analysis import DataAnalyzer
+    kwargs = {'engine': engine} if engine and '.csv' in path else {}
+    start = time.perf_counter()
+    data = DataAnalyzer().load_data(path, columns=columns, filters=filters, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    print(json.dumps({'seconds': elapsed, 'rows': len(data), 'peak_mb': peak}))
+
+
+def run_child(path, columns, filters, engine=None):
+    args = [sys.executable, os.path.abspath(__file__), '--child', path,
+            '--child-spec', json.dumps({'columns': columns, 'filters': filters, 'engine': engine})]
+    out = subprocess.run(args, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文件格式加载基准测试')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--columns', default='brand,pay_time,amount,currency',
+                        help='列裁剪测试读取的列，逗号分隔')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-spec', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        spec = json.loads(args.child_spec)
+        filters = [tuple(f) for f in spec['filters']] if spec['filters'] else None
+        load_once(args.child, spec['columns'], filters, spec['engine'])
+        return
+
+    from benchmark_sqlite_loader import make_orders
+
+    print(f"生成 {args.rows:,} 行模拟订单...")
+    df = make_orders(args.rows)
+    columns = args.columns.split(',')
+    filters = [['brand', '==', 'OSAIO'], ['amount', '>', 0]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(df, tmp)
+        cases = [('全部列', None, None), (f'{len(columns)} 列', columns, None), (f'{len(columns)} 列 + 过滤', columns, filters)]
+        print(f"\n{'格式':<16}{'文件MB':>8}  {'场景':<14}{'耗时(s)':>8}{'峰值RSS(MB)':>13}{'行数':>10}")
+        for fmt, (path, size) in paths.items():
+            engines = ['pyarrow', 'c'] if fmt.startswith('csv') else [None]
+            for engine in engines:
+                label = f'{fmt} ({engine})' if engine else fmt
+                for name, cols, flt in cases:
+                    r = run_child(path, cols, flt, engine)
+                    print(f"{label:<16}{size / 1024 / 1024:>8.1f}  {name:<14}{r['seconds']:>8.2f}"
+                          f"{r['peak_mb']:>13.0f}{r['rows']:>10,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+对比 DataFrame.to_sql 与 BulkLoader 写入 order_data.db 的耗时
+运行方式: python scripts/benchmark_sqlite_loader.py [--rows 500000] [--chunksize 50000]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import sqlite3
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from src.db.sqlite_loader import BulkLoader, ORDER_DB_INDEXES, ORDER_DB_SCHEMA
+
+ORDER_INDEXES = [s for s in ORDER_DB_INDEXES if ' ON orders(' in s]
+
+
+def make_orders(n_rows, seed=0):
+    """生成与 orders 表结构一致的模拟订单"""
+    rng = np.random.default_rng(seed)
+    n_subs = max(n_rows // 4, 1)
+    return pd.DataFrame({
+        'order_int_id': np.arange(1, n_rows + 1),
+        'order_id': [f"ORD{i:012d}" for i in range(n_rows)],
+        'uid': [f"U{i:08d}" for i in rng.integers(0, n_rows // 3 + 1, n_rows)],
+        'subscribe_id': [f"SUB{i:010d}" for i in rng.integers(0, n_subs, n_rows)],
+        'product_id': rng.choice(['m1', 'm12', 'y1', 'trial7'], n_rows),
+        'order_status': np.ones(n_rows, dtype=np.int64),
+        'description': rng.choice(['Monthly plan', 'Annual plan', 'Free Trial', 'Promotion'], n_rows),
+        'pay_time': rng.integers(1735689600, 1767225600, n_rows),
+        'amount': rng.choice([0.0, 2.99, 4.99, 29.99, 49.99], n_rows),
+        'currency': rng.choice(['USD', 'EUR', 'GBP'], n_rows),
+        'transaction_fee': rng.random(n_rows),
+        'is_sub': rng.integers(0, 2, n_rows),
+        'pay_type': rng.integers(1, 4, n_rows),
+        'brand': rng.choice(['OSAIO', 'Nooie'], n_rows),
+    })
+
+
+def chunks(df, chunksize):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def bench_to_sql(path, df, chunksize, unique_key=False):
+    """原有路径: 默认PRAGMA, 每块 to_sql 后提交, 最后建索引"""
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    for chunk in chunks(df, chunksize):
+        chunk.to_sql('orders', conn, if_exists='append', index=False)
+        conn.commit()
+    load = time.perf_counter() - start
+    indexes = ORDER_INDEXES
+    if unique_key:
+        # 与 BulkLoader 的 (brand, order_int_id) 主键约束对等
+        indexes = indexes + ["CREATE UNIQUE INDEX ux_orders ON orders(brand, order_int_id)"]
+    for statement in indexes:
+        conn.execute(statement)
+    conn.commit()
+    total = time.perf_counter() - start
+    conn.close()
+    return load, total
+
+
+def bench_bulk_loader(path, df, chunksize):
+    """BulkLoader: 显式表结构 + WAL + 大事务 executemany, 导入后建索引"""
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    loader = BulkLoader(conn, schema=ORDER_DB_SCHEMA).begin()
+    for chunk in chunks(df, chunksize):
+        loader.write('orders', chunk)
+    conn.commit()
+    load = time.perf_counter() - start
+    loader.finish(ORDER_INDEXES)
+    total = time.perf_counter() - start
+    conn.close()
+    return load, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 写入基准测试')
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--dir', default=None, help='数据库文件所在目录（默认系统临时目录）')
+    args = parser.parse_args()
+
+    print(f"生成 {args.rows:,} 行模拟订单...")
+    df = make_orders(args.rows)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        results = {}
+        benches = [
+            ('to_sql', bench_to_sql),
+            ('to_sql+key', lambda *a: bench_to_sql(*a, unique_key=True)),
+            ('BulkLoader', bench_bulk_loader),
+        ]
+        for name, bench in benches:
+            path = os.path.join(tmp, f'{name.replace("+", "_")}.db')
+            load, total = bench(path, df, args.chunksize)
+            size = os.path.getsize(path) / 1024 / 1024
+            results[name] = total
+            print(f"  {name:<11} 写入 {load:6.2f}s, 含索引 {total:6.2f}s, "
+                  f"{args.rows / total:,.0f} rows/s, 文件 {size:.1f} MB")
+
+    print(f"\n加速比: vs to_sql {results['to_sql'] / results['BulkLoader']:.2f}x, "
+          f"vs to_sql+key {results['to_sql+key'] / results['BulkLoader']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
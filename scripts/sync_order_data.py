@@ -1,177 +1,355 @@
 """
 从远程 MySQL 拉取 2025年后的订单相关数据，清洗后存入本地 SQLite。
-运行方式: python scripts/sync_order_data.py
+运行方式: python scripts/sync_order_data.py [--mode incremental|reconcile|full]
+
+- incremental（默认）: 按水位线只拉新增/变更的订单及其关联数据，upsert 到本地表
+- reconcile: 全量重新拉取并 upsert，用于捕获 sub_cancel_time、cloud_info.status 等延迟更新，
+  并删除本地有而本次未拉到的行（如 status 不再为1的订单），结果与 full 一致；
+  距上次全量超过 SYNC_RECONCILE_DAYS 天时增量模式会自动升级为 reconcile
+- full: 删除本地库后全量重建
+
+同步结束后将本地表导出为按品牌/支付月份分区的 Parquet 数据集（data/order_parquet），
+增量模式只重写本次涉及的支付月份分区；同时物化订单宽表 orders_enriched，
+并更新按天预聚合的订单汇总表 rollup_orders_daily。
 """
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import argparse
 import sqlite3
+import time
 import pandas as pd
+from src.analysis.order_enrichment import build_orders_enriched
+from src.analysis.rollups import RollupStore, build_order_rollup
 from src.db.connector import DBConnector
+from src.db.fetcher import FetchTask, SQLiteWriter, batched_tasks, fetch_concurrently
+from src.db.parquet_store import ParquetStore
+from src.db.sqlite_loader import ORDER_DB_INDEXES, ORDER_DB_SCHEMA, create_indexes, delete_missing
+from src.db.watermark import WatermarkStore
 
 START_TS = 1735689600  # 2025-01-01 00:00:00 UTC
+CHUNK_SIZE = 50000  # 服务端游标每块行数
+MAX_WORKERS = int(os.getenv('SYNC_CONCURRENCY', 4))  # 并发查询数
+BRANDS = ['OSAIO', 'Nooie']
+RECONCILE_DAYS = int(os.getenv('SYNC_RECONCILE_DAYS', 7))  # 定期全量对账间隔
+LOOKBACK_SECONDS = 86400  # 增量窗口回看，容忍 pay_time 回写延迟
+KEY_BATCH_SIZE = 5000  # 关联表按键分批拉取时每批 IN 列表长度
+
+# 本地表 -> upsert 唯一键
+TABLE_KEYS = {table: spec['primary_key'] for table, spec in ORDER_DB_SCHEMA.items()}
+# 本地表 -> 品牌内的键列（拉取时收集，对账时删除未拉到的行）
+ROW_KEYS = {table: keys[-1] for table, keys in TABLE_KEYS.items() if len(keys) == 2}
 SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'order_data.db')
+PARQUET_ROOT = os.path.join(os.path.dirname(SQLITE_PATH), 'order_parquet')
+PARQUET_TABLES = ['orders', 'subscribe', 'set_meal', 'order_amount_info', 'cloud_info', 'device_stats']
+
+def subscribe_columns(brand):
+    """OSAIO 的 subscribe 有 support_dev_num, cloud_type; Nooie 没有"""
+    if brand == 'OSAIO':
+        return "uid as sub_uid", "support_dev_num, cloud_type"
+    return "'' as sub_uid", "0 as support_dev_num, 0 as cloud_type"
+
+
+def brand_tasks(brand, now_ts, since=None):
+    """
+    构建单个品牌第一阶段的拉取任务（互不依赖，可并发执行）
 
-def sync_brand(db, brand, sqlite_conn):
-    """拉取单个品牌的订单相关数据"""
+    order 只拉一次，拉取时收集 order_int_id / order_id / subscribe_id，
+    关联表在第二阶段按这些键分批拉取（见 dependent_tasks）。
+    since 为该品牌的水位线 {'pay_time', 'order_id', 'create_time'}，
+    为 None 时按 START_TS 全量拉取。
+    """
     brand_lower = 'osaio' if brand == 'OSAIO' else 'nooie'
-    db.switch_database(brand_lower)
-
-    # 1. order 表 (status=1, pay_time >= 2025)
-    print(f"  [{brand}] 拉取 order...")
-    df_order = db.query_df(f"""
-        SELECT id as order_int_id, order_id, uid, subscribe_id, product_id,
-               status as order_status, description, pay_time,
-               amount, currency, transaction_fee, is_sub, pay_type
-        FROM `order`
-        WHERE status = 1 AND pay_time >= {START_TS}
-    """)
-    df_order['brand'] = brand
-    print(f"    order: {len(df_order):,} rows")
-
-    # 2. subscribe 表 (只取有关联的)
-    print(f"  [{brand}] 拉取 subscribe...")
-    sub_ids = df_order['subscribe_id'].dropna().unique()
-    if len(sub_ids) > 0:
-        # OSAIO 有 support_dev_num, cloud_type; Nooie 没有
-        if brand == 'OSAIO':
-            df_sub = db.query_df(f"""
-                SELECT subscribe_id, uid as sub_uid, product_id as sub_product_id,
-                       amount as sub_amount, currency as sub_currency,
-                       cycles_unit, cycles_time, status as sub_status,
-                       create_time as sub_create_time, cancel_time as sub_cancel_time,
-                       support_dev_num, cloud_type
-                FROM subscribe
-                WHERE create_time >= {START_TS} OR subscribe_id IN (
-                    SELECT DISTINCT subscribe_id FROM `order` WHERE status=1 AND pay_time >= {START_TS}
-                )
-            """)
-        else:
-            df_sub = db.query_df(f"""
-                SELECT subscribe_id, '' as sub_uid, product_id as sub_product_id,
-                       amount as sub_amount, currency as sub_currency,
-                       cycles_unit, cycles_time, status as sub_status,
-                       create_time as sub_create_time, cancel_time as sub_cancel_time,
-                       0 as support_dev_num, 0 as cloud_type
-                FROM subscribe
-                WHERE create_time >= {START_TS} OR subscribe_id IN (
-                    SELECT DISTINCT subscribe_id FROM `order` WHERE status=1 AND pay_time >= {START_TS}
-                )
-            """)
-        df_sub['brand'] = brand
-    else:
-        df_sub = pd.DataFrame()
-    print(f"    subscribe: {len(df_sub):,} rows")
-
-    # 3. set_meal 表 (全量，通常很小)
-    print(f"  [{brand}] 拉取 set_meal...")
-    # 两个品牌共有字段
-    df_meal = db.query_df("""
-        SELECT code, name, time, file_time, price, saleprice, status,
-               time_unit, currency, level
-        FROM set_meal
-    """)
-    df_meal['brand'] = brand
-    print(f"    set_meal: {len(df_meal):,} rows")
-
-    # 4. order_amount_info (只取关联的)
-    print(f"  [{brand}] 拉取 order_amount_info...")
-    df_amount = db.query_df(f"""
-        SELECT oai.order_int_id, oai.model_code, oai.amount_cny,
-               oai.transaction_fee_cny, oai.exchange_rate
-        FROM order_amount_info oai
-        INNER JOIN `order` o ON oai.order_int_id = o.id
-        WHERE o.status = 1 AND o.pay_time >= {START_TS}
-    """)
-    df_amount['brand'] = brand
-    print(f"    order_amount_info: {len(df_amount):,} rows")
-
-    # 5. cloud_info (只取关联的)
-    print(f"  [{brand}] 拉取 cloud_info...")
-    df_cloud = db.query_df(f"""
-        SELECT ci.id as cloud_id, ci.uid as cloud_uid, ci.uuid as cloud_uuid,
-               ci.order_id, ci.start_time as cloud_start_time,
-               ci.end_time as cloud_end_time, ci.file_time,
-               ci.status as cloud_status, ci.is_delete, ci.level
-        FROM cloud_info ci
-        INNER JOIN `order` o ON ci.order_id = o.order_id
-        WHERE o.status = 1 AND o.pay_time >= {START_TS}
-    """)
-    df_cloud['brand'] = brand
-    print(f"    cloud_info: {len(df_cloud):,} rows")
-
-    # 6. 设备统计 (用于覆盖率计算)
-    print(f"  [{brand}] 拉取 device 统计...")
-    import time
-    now_ts = int(time.time())
     thirty_days_ago_ms = (now_ts - 30 * 86400) * 1000
-    df_device_stats = db.query_df(f"""
-        SELECT
-            COUNT(DISTINCT uuid) as total_devices,
-            SUM(CASE WHEN mq_online = 1 OR p2p_online = 1 OR online_time > {thirty_days_ago_ms} THEN 1 ELSE 0 END) as active_devices_30d
-        FROM device
-        WHERE create_time >= {START_TS}
-    """)
-    df_device_stats['brand'] = brand
-
-    # 活跃订阅设备数
-    df_active_sub = db.query_df(f"""
-        SELECT COUNT(DISTINCT ci.uuid) as devices_with_subscription
-        FROM cloud_info ci
-        WHERE ci.end_time > {now_ts}
-          AND ci.uuid IS NOT NULL AND ci.uuid != ''
-          AND ci.is_delete = 0
-    """)
+
+    def task(name, sql, table=None, key_columns=()):
+        key_columns = list(dict.fromkeys([*key_columns, *([ROW_KEYS[table]] if table in ROW_KEYS else [])]))
+        return FetchTask(f"{brand}.{name}", brand_lower, sql, table=table, label=brand,
+                         keys=TABLE_KEYS.get(table), key_columns=key_columns)
+
+    # 订单范围：全量为 2025 年后全部已支付订单，增量为水位线之后的订单
+    order_filter = f"status = 1 AND pay_time >= {START_TS}"
+    if since is not None:
+        order_filter += (f" AND (pay_time > {since['pay_time'] - LOOKBACK_SECONDS}"
+                         f" OR id > {since['order_id']})")
+
+    sub_create_ts = START_TS if since is None else max(since['create_time'] - LOOKBACK_SECONDS, START_TS)
+    sub_uid, sub_extra = subscribe_columns(brand)
+
+    return [
+        # 1. order 表 (status=1, pay_time >= 2025)
+        task('order', f"""
+            SELECT id as order_int_id, order_id, uid, subscribe_id, product_id,
+                   status as order_status, description, pay_time,
+                   amount, currency, transaction_fee, is_sub, pay_type
+            FROM `order`
+            WHERE {order_filter}
+        """, table='orders', key_columns=['order_int_id', 'order_id', 'subscribe_id']),
+        # 2. subscribe 表 (新建的；被订单引用的在第二阶段按 subscribe_id 拉取)
+        task('subscribe', f"""
+            SELECT subscribe_id, {sub_uid}, product_id as sub_product_id,
+                   amount as sub_amount, currency as sub_currency,
+                   cycles_unit, cycles_time, status as sub_status,
+                   create_time as sub_create_time, cancel_time as sub_cancel_time,
+                   {sub_extra}
+            FROM subscribe
+            WHERE create_time >= {sub_create_ts}
+        """, table='subscribe'),
+        # 3. set_meal 表 (全量，通常很小；两个品牌共有字段)
+        task('set_meal', """
+            SELECT code, name, time, file_time, price, saleprice, status,
+                   time_unit, currency, level
+            FROM set_meal
+        """, table='set_meal'),
+        # 6. 设备统计 (用于覆盖率计算)
+        task('device_stats', f"""
+            SELECT
+                COUNT(DISTINCT uuid) as total_devices,
+                SUM(CASE WHEN mq_online = 1 OR p2p_online = 1 OR online_time > {thirty_days_ago_ms} THEN 1 ELSE 0 END) as active_devices_30d
+            FROM device
+            WHERE create_time >= {START_TS}
+        """),
+        # 活跃订阅设备数
+        task('active_sub', f"""
+            SELECT COUNT(DISTINCT ci.uuid) as devices_with_subscription
+            FROM cloud_info ci
+            WHERE ci.end_time > {now_ts}
+              AND ci.uuid IS NOT NULL AND ci.uuid != ''
+              AND ci.is_delete = 0
+        """),
+    ]
+
+
+def dependent_tasks(brand, order_task):
+    """
+    构建第二阶段任务：按第一阶段收集到的订单键分批 IN 查询关联表，
+    避免每张关联表都在 MySQL 端重新 JOIN / 子查询扫描 order 表
+    """
+    brand_lower = 'osaio' if brand == 'OSAIO' else 'nooie'
+    keys = order_task.key_values
+    sub_uid, sub_extra = subscribe_columns(brand)
+
+    def tasks(name, sql, values, table):
+        return batched_tasks(f"{brand}.{name}", brand_lower, sql, values, batch_size=KEY_BATCH_SIZE,
+                             table=table, label=brand, keys=TABLE_KEYS[table], key_columns=[ROW_KEYS[table]])
+
+    return (
+        # 2. subscribe 表 (被订单引用的)
+        tasks('subscribe', f"""
+            SELECT subscribe_id, {sub_uid}, product_id as sub_product_id,
+                   amount as sub_amount, currency as sub_currency,
+                   cycles_unit, cycles_time, status as sub_status,
+                   create_time as sub_create_time, cancel_time as sub_cancel_time,
+                   {sub_extra}
+            FROM subscribe
+            WHERE subscribe_id IN %s
+        """, [v for v in keys['subscribe_id'] if v != ''], 'subscribe')
+        # 4. order_amount_info (只取关联的)
+        + tasks('order_amount_info', """
+            SELECT order_int_id, model_code, amount_cny,
+                   transaction_fee_cny, exchange_rate
+            FROM order_amount_info
+            WHERE order_int_id IN %s
+        """, keys['order_int_id'], 'order_amount_info')
+        # 5. cloud_info (只取关联的)
+        + tasks('cloud_info', """
+            SELECT id as cloud_id, uid as cloud_uid, uuid as cloud_uuid,
+                   order_id, start_time as cloud_start_time,
+                   end_time as cloud_end_time, file_time,
+                   status as cloud_status, is_delete, level
+            FROM cloud_info
+            WHERE order_id IN %s
+        """, keys['order_id'], 'cloud_info')
+    )
+
+
+def build_device_stats(brand, frames):
+    """合并设备统计和活跃订阅设备数"""
+    df_device_stats = frames[f"{brand}.device_stats"]
+    df_active_sub = frames[f"{brand}.active_sub"]
     df_device_stats['devices_with_subscription'] = df_active_sub['devices_with_subscription'].iloc[0]
-    print(f"    device stats: total={df_device_stats['total_devices'].iloc[0]:,}, active={df_device_stats['active_devices_30d'].iloc[0]:,}")
+    print(f"  [{brand}] device stats: total={df_device_stats['total_devices'].iloc[0]:,}, active={df_device_stats['active_devices_30d'].iloc[0]:,}")
+    return df_device_stats
+
+
+def load_since(store, brand):
+    """读取品牌的增量水位线，缺失任一必需水位线时返回 None（需全量）"""
+    orders = store.get(brand, 'orders')
+    if not orders or orders.get('pay_time') is None:
+        return None
+    subscribe = store.get(brand, 'subscribe')
+    return {
+        'pay_time': orders['pay_time'],
+        'order_id': orders.get('max_id') or 0,
+        'create_time': subscribe.get('create_time') or START_TS,
+    }
+
+
+def update_watermarks(sqlite_conn, store, full_sync):
+    """根据本地已落库数据推进各表水位线"""
+    for brand in BRANDS:
+        pay_time, order_id = sqlite_conn.execute(
+            "SELECT MAX(pay_time), MAX(order_int_id) FROM orders WHERE brand = ?", (brand,)
+        ).fetchone()
+        store.set(brand, 'orders', pay_time=pay_time, max_id=order_id, full_sync=full_sync)
+
+        create_time, = sqlite_conn.execute(
+            "SELECT MAX(sub_create_time) FROM subscribe WHERE brand = ?", (brand,)
+        ).fetchone()
+        store.set(brand, 'subscribe', create_time=create_time, full_sync=full_sync)
+
+        # cloud_info / order_amount_info 按订单键拉取，不需要自己的水位线；清除旧版本写入的记录，
+        # 否则它们不再更新的 full_sync_at 会让 last_full_sync 一直停在旧时间
+        for table in ('cloud_info', 'order_amount_info'):
+            store.delete(brand, table)
 
-    # 写入 SQLite
-    df_order.to_sql('orders', sqlite_conn, if_exists='append', index=False)
-    if len(df_sub) > 0:
-        df_sub.to_sql('subscribe', sqlite_conn, if_exists='append', index=False)
-    df_meal.to_sql('set_meal', sqlite_conn, if_exists='append', index=False)
-    df_amount.to_sql('order_amount_info', sqlite_conn, if_exists='append', index=False)
-    df_cloud.to_sql('cloud_info', sqlite_conn, if_exists='append', index=False)
-    df_device_stats.to_sql('device_stats', sqlite_conn, if_exists='append', index=False)
 
-    print(f"  [{brand}] 写入 SQLite 完成")
+def parquet_since(sqlite_conn, since):
+    """增量模式下本次可能改动的最早 pay_time：水位线回看窗口，及按主键新拉到的迟到订单"""
+    earliest = []
+    for brand, wm in since.items():
+        earliest.append(wm['pay_time'] - LOOKBACK_SECONDS)
+        row = sqlite_conn.execute(
+            "SELECT MIN(pay_time) FROM orders WHERE brand = ? AND order_int_id > ?",
+            (brand, wm['order_id']),
+        ).fetchone()
+        if row[0] is not None:
+            earliest.append(row[0])
+    return min(earliest)
+
+
+def prune_reconciled(sqlite_conn, tasks):
+    """
+    全量对账后删除本地有而本次未拉到的行，使结果与全量重建一致
+
+    每张表按 (表, 品牌) 汇总各任务拉到的键；某品牌某表一行都没拉到时不删除（避免上游异常时清空本地）。
+    """
+    returned = {}
+    for task in tasks:
+        if task.table in ROW_KEYS:
+            returned.setdefault((task.table, task.label), set()).update(task.key_values[ROW_KEYS[task.table]])
+    for (table, brand), keys in sorted(returned.items()):
+        if not keys:
+            print(f"  [{brand}] {table}: 本次未拉到任何行，跳过清理")
+            continue
+        deleted = delete_missing(sqlite_conn, table, ROW_KEYS[table], keys, brand=brand)
+        if deleted:
+            print(f"  [{brand}] {table}: 删除上游已不存在/不再满足条件的 {deleted:,} 行")
+
+
+def resolve_mode(mode, now_ts):
+    """确定实际同步模式，返回 (mode, 每个品牌的水位线)"""
+    if mode == 'full' or not os.path.exists(SQLITE_PATH):
+        return 'full', {brand: None for brand in BRANDS}
+
+    sqlite_conn = sqlite3.connect(SQLITE_PATH)
+    try:
+        store = WatermarkStore(sqlite_conn)
+        since = {brand: load_since(store, brand) for brand in BRANDS}
+        if any(v is None for v in since.values()):
+            print("未找到完整水位线，改为全量重建")
+            return 'full', {brand: None for brand in BRANDS}
+        if mode == 'incremental':
+            last_full = min(store.last_full_sync(brand) or 0 for brand in BRANDS)
+            if now_ts - last_full >= RECONCILE_DAYS * 86400:
+                print(f"距上次全量已超过 {RECONCILE_DAYS} 天，执行全量对账")
+                mode = 'reconcile'
+    finally:
+        sqlite_conn.close()
+
+    if mode == 'reconcile':
+        return 'reconcile', {brand: None for brand in BRANDS}
+    return 'incremental', since
 
 
 def main():
+    parser = argparse.ArgumentParser(description='同步订单数据到本地 SQLite')
+    parser.add_argument('--mode', choices=['incremental', 'reconcile', 'full'], default='incremental',
+                        help='incremental: 按水位线增量; reconcile: 全量拉取并 upsert; full: 删除后重建')
+    args = parser.parse_args()
+
+    now_ts = int(time.time())
+    mode, since = resolve_mode(args.mode, now_ts)
+    print(f"同步模式: {mode}")
+
     # 清理旧数据
-    if os.path.exists(SQLITE_PATH):
+    if mode == 'full' and os.path.exists(SQLITE_PATH):
         os.remove(SQLITE_PATH)
         print(f"已删除旧数据库: {SQLITE_PATH}")
 
     os.makedirs(os.path.dirname(SQLITE_PATH), exist_ok=True)
-    sqlite_conn = sqlite3.connect(SQLITE_PATH)
 
-    print(f"连接远程 MySQL...")
-    db = DBConnector(brand='osaio')
+    print("连接远程 MySQL...")
+    db = DBConnector(brand='osaio', pooled=True, pool_size=MAX_WORKERS)
     db.connect()
 
+    stage1 = {brand: brand_tasks(brand, now_ts, since[brand]) for brand in BRANDS}
+    tasks = [t for brand in BRANDS for t in stage1[brand]]
+    print(f"\n并发拉取 {', '.join(BRANDS)} 数据: {len(tasks)} 个查询, 并发数 {MAX_WORKERS}")
+
+    start = time.time()
+    counts = {}
     try:
-        for brand in ['OSAIO', 'Nooie']:
-            print(f"\n{'='*50}")
-            print(f"同步 {brand} 数据")
-            print('='*50)
-            sync_brand(db, brand, sqlite_conn)
+        with SQLiteWriter(SQLITE_PATH, schema=ORDER_DB_SCHEMA) as writer:
+            # 第一阶段: order 与独立表
+            frames, stage_counts = fetch_concurrently(
+                db, tasks, writer=writer, max_workers=MAX_WORKERS, chunksize=CHUNK_SIZE
+            )
+            counts.update(stage_counts)
+            for brand in BRANDS:
+                writer.put('device_stats', build_device_stats(brand, frames), keys=TABLE_KEYS['device_stats'])
+
+            # 第二阶段: 按订单键分批拉取关联表
+            stage2 = [t for brand in BRANDS for t in dependent_tasks(brand, stage1[brand][0])]
+            print(f"按订单键拉取关联表: {len(stage2)} 个批次")
+            _, stage_counts = fetch_concurrently(
+                db, stage2, writer=writer, max_workers=MAX_WORKERS, chunksize=CHUNK_SIZE
+            )
+            for name, rows in stage_counts.items():
+                name = name.split('#')[0]
+                counts[name] = counts.get(name, 0) + rows
     finally:
         db.close()
         print("\nMySQL 连接已关闭")
+    print(f"拉取完成, 耗时 {time.time() - start:.1f}s")
+    for name, rows in sorted(counts.items()):
+        print(f"  {name}: {rows:,} rows")
+
+    sqlite_conn = sqlite3.connect(SQLITE_PATH)
 
-    # 创建索引加速查询
+    # 对账：删除本次未拉到的行（full 模式本地库是新建的，无需清理）
+    if mode == 'reconcile':
+        print("\n清理上游已移除的行...")
+        prune_reconciled(sqlite_conn, [t for brand in BRANDS for t in stage1[brand]] + stage2)
+
+    # 水位线推进前确定 Parquet 需要重写的范围
+    parquet_from = {'orders': parquet_since(sqlite_conn, since)} if mode == 'incremental' else None
+
+    # 推进水位线
+    update_watermarks(sqlite_conn, WatermarkStore(sqlite_conn), full_sync=(mode != 'incremental'))
+
+    # 批量导入完成后再创建索引
     print("\n创建索引...")
-    cursor = sqlite_conn.cursor()
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_brand ON orders(brand)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_uid ON orders(uid)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_pay_time ON orders(pay_time)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_subscribe_id ON orders(subscribe_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subscribe_id ON subscribe(subscribe_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cloud_order_id ON cloud_info(order_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_amount_order_id ON order_amount_info(order_int_id)")
-    sqlite_conn.commit()
+    create_indexes(sqlite_conn, ORDER_DB_INDEXES)
+
+    # 导出列式数据集，供 notebook 按列/分区加载
+    print("\n导出 Parquet...")
+    start = time.time()
+    parquet = ParquetStore(PARQUET_ROOT)
+    exported = parquet.export(sqlite_conn, PARQUET_TABLES, since=parquet_from)
+    print(f"导出完成, 耗时 {time.time() - start:.1f}s: "
+          + ', '.join(f"{table}={rows:,}" for table, rows in exported.items()))
+
+    # 物化订单宽表（合并维表 + 派生字段），分析直接从宽表开始
+    start = time.time()
+    rows = build_orders_enriched(sqlite_conn, parquet, since_ts=(parquet_from or {}).get('orders'))
+    print(f"orders_enriched: {rows:,} rows, 耗时 {time.time() - start:.1f}s")
+
+    # 更新按天汇总，趋势图直接读汇总表
+    start = time.time()
+    rows = build_order_rollup(parquet, RollupStore(sqlite_conn), since_ts=(parquet_from or {}).get('orders'))
+    print(f"rollup_orders_daily: {rows:,} rows, 耗时 {time.time() - start:.1f}s")
 
     # 验证
     print("\n=== 数据量验证 ===")
@@ -185,6 +363,7 @@ def main():
     file_size = os.path.getsize(SQLITE_PATH) / 1024 / 1024
     print(f"\nSQLite 数据库: {SQLITE_PATH}")
     print(f"文件大小: {file_size:.1f} MB")
+    print(f"Parquet 数据集: {PARQUET_ROOT}")
     print("完成!")
 
 
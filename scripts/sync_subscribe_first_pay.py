@@ -1,6 +1,6 @@
 """
 从 MySQL 拉取每个 subscribe_id 的全局首次付费时间（含2025年前历史）
-用于判断订单是首期还是续费
+用于判断订单是首期还是续费；付费订单与 lifecycle 的定义一致（非试用/促销/免费订单）
 """
 import sys
 import os
@@ -8,36 +8,39 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import sqlite3
 import pandas as pd
+from src.analysis.order_enrichment import PAID_ORDER_SQL
 from src.db.connector import DBConnector
+from src.db.fetcher import FetchTask, fetch_concurrently
+from src.db.sqlite_loader import BulkLoader, ORDER_DB_SCHEMA
 
 SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'order_data.db')
+MAX_WORKERS = int(os.getenv('SYNC_CONCURRENCY', 4))  # 并发查询数
+BRANDS = ['OSAIO', 'Nooie']
 
-def sync_brand(db, brand, sqlite_conn):
-    """拉取单个品牌的 subscribe 首次付费时间"""
+def brand_task(brand):
+    """构建单个品牌的 subscribe 首次付费时间查询"""
     brand_lower = 'osaio' if brand == 'OSAIO' else 'nooie'
-    db.switch_database(brand_lower)
 
-    print(f"\n  [{brand}] 查询全局首次付费时间...")
-
-    # 获取所有 subscribe_id 的最早 pay_time（不限时间范围）
-    df_first_pay = db.query_df("""
+    # 获取所有 subscribe_id 最早一笔付费订单的 pay_time（不限时间范围）
+    # 付费按 description 判定（与 lifecycle 的 ~is_trial 一致），不看金额：0.99 的促销订单不算首次付费
+    return FetchTask(brand, brand_lower, f"""
         SELECT
             subscribe_id,
             MIN(pay_time) as first_pay_time
         FROM `order`
-        WHERE status = 1 AND amount > 0 AND subscribe_id IS NOT NULL AND subscribe_id != ''
+        WHERE status = 1 AND {PAID_ORDER_SQL} AND subscribe_id IS NOT NULL AND subscribe_id != ''
         GROUP BY subscribe_id
-    """)
+    """, label=brand)
+
 
-    df_first_pay['brand'] = brand
+def report_brand(brand, df_first_pay):
+    """打印单个品牌的首次付费统计"""
     print(f"    {brand}: {len(df_first_pay):,} subscribe_id")
 
     # 统计有多少是2025年之前首次付费的
     ts_2025 = 1735689600  # 2025-01-01 00:00:00 UTC
     pre_2025_count = (df_first_pay['first_pay_time'] < ts_2025).sum()
-    print(f"    其中 {pre_2025_count:,} ({pre_2025_count/len(df_first_pay)*100:.1f}%) 在2025年前首次付费")
-
-    return df_first_pay
+    print(f"    其中 {pre_2025_count:,} ({pre_2025_count/max(len(df_first_pay), 1)*100:.1f}%) 在2025年前首次付费")
 
 def main():
     print("连接 SQLite...")
@@ -50,31 +53,30 @@ def main():
     print("已清理旧 subscribe_first_pay 表")
 
     print("\n连接远程 MySQL...")
-    db = DBConnector(brand='osaio')
+    db = DBConnector(brand='osaio', pooled=True, pool_size=MAX_WORKERS)
     db.connect()
 
-    all_data = []
-
     try:
-        for brand in ['OSAIO', 'Nooie']:
-            print(f"\n{'='*50}")
-            print(f"同步 {brand}")
-            print('='*50)
-            df = sync_brand(db, brand, sqlite_conn)
-            all_data.append(df)
+        print(f"\n并发查询 {', '.join(BRANDS)} 全局首次付费时间...")
+        frames, _ = fetch_concurrently(db, [brand_task(b) for b in BRANDS], max_workers=MAX_WORKERS)
     finally:
         db.close()
         print("\nMySQL 连接已关闭")
 
+    all_data = []
+    for brand in BRANDS:
+        report_brand(brand, frames[brand])
+        all_data.append(frames[brand])
+
     # 合并并写入 SQLite
     print("\n写入 SQLite...")
     df_all = pd.concat(all_data, ignore_index=True)
-    df_all.to_sql('subscribe_first_pay', sqlite_conn, if_exists='replace', index=False)
+    loader = BulkLoader(sqlite_conn, schema=ORDER_DB_SCHEMA).begin()
+    loader.write('subscribe_first_pay', df_all)
 
-    # 创建索引
+    # 导入完成后创建索引
     print("创建索引...")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_first_pay_subscribe_id ON subscribe_first_pay(subscribe_id, brand)")
-    sqlite_conn.commit()
+    loader.finish(["CREATE INDEX IF NOT EXISTS idx_first_pay_subscribe_id ON subscribe_first_pay(subscribe_id, brand)"])
 
     # 验证
     print("\n=== 数据验证 ===")
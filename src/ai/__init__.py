@@ -1,5 +1,6 @@
 """AI增强分析模块"""
 
 from .ai_analyzer import AIAnalyzer
+from .stub_client import StubClient
 
-__all__ = ['AIAnalyzer']
+__all__ = ['AIAnalyzer', 'StubClient']
@@ -1,36 +1,81 @@
 """AI增强分析功能 - 使用Claude进行智能数据解读"""
 
 import os
-from typing import Dict, Any, Optional
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Mapping, Optional, Sequence, Union
 import logging
+import anthropic
 from anthropic import Anthropic
 
+from ..analysis.result_cache import ResultCache, fingerprint
+from .prompt_compaction import compact_summary, estimate_tokens
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
+DEFAULT_MAX_TOKENS = 2000
+# 提示词中数据摘要部分的token预算
+DEFAULT_PROMPT_TOKEN_BUDGET = 3000
+
+# 回复缓存格式变化时递增
+AI_CACHE_VERSION = 1
+
+# 可重试的HTTP状态：限流、过载和网关/服务端临时错误
+RETRY_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
 
 class AIAnalyzer:
     """AI分析器 - 使用Claude进行智能数据分析和洞察"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, client=None, model: str = DEFAULT_MODEL,
+                 max_tokens: int = DEFAULT_MAX_TOKENS, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 64 * 1024 * 1024, cache_ttl: Optional[float] = 7 * 86400,
+                 timeout: float = 120.0, max_retries: int = 4, backoff: float = 1.0,
+                 prompt_token_budget: int = DEFAULT_PROMPT_TOKEN_BUDGET):
         """
         初始化AI分析器
 
         Args:
             api_key: Anthropic API密钥，如果不提供则从环境变量读取
+            client: 自定义客户端（如离线测试用的 StubClient），提供时不读取API密钥
+            model: 模型名
+            max_tokens: 回复最大token数
+            cache_dir: 回复缓存目录，为None时不缓存；相同模型、max_tokens 和提示词直接返回缓存的回复
+            cache_max_bytes: 缓存总大小上限，超过时按最近访问时间淘汰
+            cache_ttl: 缓存保留秒数，None 表示不过期
+            timeout: 单次请求超时秒数
+            max_retries: 限流/过载/超时后的最大重试次数
+            backoff: 指数退避的初始秒数（服务端返回 retry-after 时以其为准）
+            prompt_token_budget: 数据摘要部分的token预算，超出时按信息量省略列
         """
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.prompt_token_budget = prompt_token_budget
+        self.cache: Optional[ResultCache] = (
+            ResultCache(cache_dir, max_bytes=cache_max_bytes, max_age=cache_ttl) if cache_dir else None
+        )
         self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
-        if not self.api_key:
+        if client is not None:
+            self.client = client
+        elif not self.api_key:
             logger.warning("未设置ANTHROPIC_API_KEY，AI功能将不可用")
             self.client = None
         else:
-            self.client = Anthropic(api_key=self.api_key)
+            # 重试由本类统一处理（含 analyze_many 的并发请求），关闭SDK自带重试
+            self.client = Anthropic(api_key=self.api_key, max_retries=0)
 
-    def analyze_data_insights(self, data_summary: Dict[str, Any]) -> str:
+    def analyze_data_insights(self, data_summary: Dict[str, Any], use_cache: bool = True) -> str:
         """
         基于数据摘要生成AI洞察
 
         Args:
             data_summary: 数据分析结果摘要
+            use_cache: 为False时跳过缓存，强制重新请求（新回复仍会写入缓存）
 
         Returns:
             AI生成的数据洞察和建议
@@ -38,36 +83,166 @@ class AIAnalyzer:
         if not self.client:
             return "AI功能未启用，请设置ANTHROPIC_API_KEY"
 
-        prompt = self._build_analysis_prompt(data_summary)
+        return self._complete(self._build_analysis_prompt(data_summary), use_cache=use_cache)
 
-        try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=2000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+    def stream_data_insights(self, data_summary: Dict[str, Any], use_cache: bool = True) -> Iterator[str]:
+        """
+        流式生成AI洞察：边生成边返回文本片段，可直接交给 ReportGenerator 逐段写入报告
 
-            return message.content[0].text
+        命中缓存时一次返回完整文本；完整结束的回复写入缓存（与 analyze_data_insights 共用）。
+        尚未收到任何片段时出错按 analyze_data_insights 的规则重试；中途断开则在末尾追加错误说明。
 
-        except Exception as e:
-            logger.error(f"AI分析失败: {e}")
-            return f"AI分析出错: {str(e)}"
+        Args:
+            data_summary: 数据分析结果摘要
+            use_cache: 同 analyze_data_insights
 
-    def _build_analysis_prompt(self, data_summary: Dict[str, Any]) -> str:
-        """构建分析提示词"""
-        prompt = f"""作为一个专业的数据分析师，请分析以下数据摘要并提供洞察：
+        Yields:
+            回复文本片段
+        """
+        if not self.client:
+            yield "AI功能未启用，请设置ANTHROPIC_API_KEY"
+            return
+        yield from self._stream(self._build_analysis_prompt(data_summary), use_cache=use_cache)
+
+    def analyze_many(
+        self,
+        summaries: Union[Sequence[Dict[str, Any]], Mapping[str, Dict[str, Any]]],
+        concurrency: int = 4,
+        use_cache: bool = True,
+    ) -> Union[List[str], Dict[str, str]]:
+        """
+        并发生成多个数据切片的洞察（如 OSAIO/Nooie × 用户/设备/订单）
 
-数据概览：
-- 数据形状: {data_summary.get('metadata', {}).get('shape', 'N/A')}
-- 列名: {', '.join(data_summary.get('metadata', {}).get('columns', []))}
+        请求在线程池中并发发送，总耗时接近最慢的单个请求；每个请求独立重试和超时，
+        失败的请求返回错误文本，不影响其他请求。
 
-统计信息：
-{self._format_statistics(data_summary.get('statistics', {}))}
+        Args:
+            summaries: 分析结果列表，或 {切片名: 分析结果}
+            concurrency: 同时进行的请求数
+            use_cache: 同 analyze_data_insights
 
-异常值检测：
-{data_summary.get('outliers', {})}
+        Returns:
+            与输入顺序一致的洞察列表；输入为字典时返回同样key顺序的字典
+        """
+        names = list(summaries) if isinstance(summaries, Mapping) else None
+        items = [summaries[name] for name in names] if names is not None else list(summaries)
+        if not items:
+            return {} if names is not None else []
+
+        workers = max(1, min(concurrency, len(items)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai') as pool:
+            results = list(pool.map(lambda s: self.analyze_data_insights(s, use_cache=use_cache), items))
+        logger.info(f"批量AI分析完成: {len(items)} 个切片, 并发 {workers}")
+        return dict(zip(names, results)) if names is not None else results
+
+    def prompt_fingerprint(self, prompt: str) -> str:
+        """缓存key：模型 + max_tokens + 提示词全文的摘要"""
+        return fingerprint(AI_CACHE_VERSION, 'messages', self.model, self.max_tokens, prompt)
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """缓存命中/未命中/淘汰计数"""
+        return dict(self.cache.stats) if self.cache else {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _complete(self, prompt: str, use_cache: bool = True) -> str:
+        """发送单轮请求；命中缓存时不请求，出错时不缓存"""
+        key = self.prompt_fingerprint(prompt) if self.cache else None
+        if key and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        logger.info(f"AI请求: 提示词约 {estimate_tokens(prompt):,} tokens")
+        for attempt in range(self.max_retries + 1):
+            try:
+                message = self.client.messages.create(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    timeout=self.timeout,
+                )
+                text = message.content[0].text
+                break
+
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    logger.error(f"AI分析失败: {e}")
+                    return f"AI分析出错: {str(e)}"
+                logger.warning(f"AI请求失败（第 {attempt + 1} 次）: {e}，{delay:.1f}s 后重试")
+                time.sleep(delay)
+
+        if key:
+            self.cache.put(key, text)
+        return text
+
+    def _stream(self, prompt: str, use_cache: bool = True) -> Iterator[str]:
+        """流式发送单轮请求，逐段返回文本"""
+        key = self.prompt_fingerprint(prompt) if self.cache else None
+        if key and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        logger.info(f"AI流式请求: 提示词约 {estimate_tokens(prompt):,} tokens")
+        parts: List[str] = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.client.messages.stream(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    timeout=self.timeout,
+                ) as stream:
+                    for text in stream.text_stream:
+                        parts.append(text)
+                        yield text
+                break
+
+            except Exception as e:
+                delay = None if parts else self._retry_delay(e, attempt)
+                if delay is None:
+                    logger.error(f"AI流式分析失败: {e}")
+                    yield f"\n\n（AI分析中断: {str(e)}）" if parts else f"AI分析出错: {str(e)}"
+                    return
+                logger.warning(f"AI流式请求失败（第 {attempt + 1} 次）: {e}，{delay:.1f}s 后重试")
+                time.sleep(delay)
+
+        if key:
+            self.cache.put(key, ''.join(parts))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """可重试的错误返回等待秒数（优先使用 retry-after），不可重试或次数用尽返回None"""
+        if attempt >= self.max_retries:
+            return None
+        status = getattr(error, 'status_code', None)
+        retryable = (
+            isinstance(error, (anthropic.APITimeoutError, anthropic.APIConnectionError, TimeoutError))
+            or status in RETRY_STATUS
+        )
+        if not retryable:
+            return None
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return max(float(retry_after), 0.0)
+        except (TypeError, ValueError):
+            # 指数退避 + 抖动，避免并发请求同时重试
+            return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    def _build_analysis_prompt(self, data_summary: Dict[str, Any]) -> str:
+        """构建分析提示词（统计信息按 prompt_token_budget 压缩为紧凑表格）"""
+        summary, info = compact_summary(data_summary, token_budget=self.prompt_token_budget)
+        if info['omitted']:
+            logger.info(f"提示词压缩: 写入 {info['columns']} 列, 省略 {info['omitted']} 列")
+        prompt = f"""作为一个专业的数据分析师，请分析以下数据摘要并提供洞察：
+
+{summary}
 
 请提供：
 1. 数据质量评估
@@ -80,25 +255,6 @@ class AIAnalyzer:
 
         return prompt
 
-    def _format_statistics(self, stats: Dict[str, Any]) -> str:
-        """格式化统计信息为可读文本"""
-        if not stats:
-            return "无统计信息"
-
-        formatted = []
-
-        # 缺失值信息
-        missing = stats.get('missing_values', {})
-        if missing:
-            formatted.append(f"缺失值: {missing}")
-
-        # 数据类型
-        dtypes = stats.get('data_types', {})
-        if dtypes:
-            formatted.append(f"数据类型: {dtypes}")
-
-        return '\n'.join(formatted)
-
     def suggest_visualizations(self, columns: list, dtypes: Dict[str, str]) -> list:
         """
         基于数据类型建议可视化方案
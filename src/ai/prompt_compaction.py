@@ -0,0 +1,210 @@
+"""提示词压缩 - 按信息量给列排序，以紧凑表格写入分析结果，控制在token预算内"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 相关系数绝对值不低于该值的列对单独列出
+STRONG_CORRELATION = 0.5
+MAX_CORRELATION_PAIRS = 20
+
+_CJK = re.compile(r'[　-〿一-鿿＀-￯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中文及全角字符每字约1个token，其余约4个字符1个token"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _number(value: Any) -> str:
+    """紧凑数值：整数不带小数，其余保留4位有效数字；0 和缺失返回空串"""
+    if value is None:
+        return ''
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if value == 0 or math.isnan(value):
+        return ''
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f'{value:.4g}'
+
+
+def _percent(part: float, total: float) -> str:
+    if not total or not part:
+        return ''
+    return f'{part / total * 100:.3g}'
+
+
+def _row_count(data_summary: Dict[str, Any]) -> int:
+    """总行数：优先取 metadata 的 shape，否则由数值列的非空数 + 缺失数推出"""
+    shape = data_summary.get('metadata', {}).get('shape')
+    if shape:
+        return int(shape[0])
+    stats = data_summary.get('statistics', {})
+    missing = stats.get('missing_values', {})
+    counts = [s.get('count', 0) + missing.get(col, 0) for col, s in stats.get('numeric_summary', {}).items()]
+    return int(max(counts, default=0))
+
+
+def _strongest_correlations(correlations: Dict[str, Dict[str, float]]) -> Dict[str, Tuple[str, float]]:
+    """每列与其他列中相关性最强的一列"""
+    strongest = {}
+    for col, row in correlations.items():
+        best = None
+        for other, r in row.items():
+            if other == col or r is None or r != r:
+                continue
+            if best is None or abs(r) > abs(best[1]):
+                best = (other, r)
+        if best is not None:
+            strongest[col] = best
+    return strongest
+
+
+def rank_columns(data_summary: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """
+    按信息量给列排序：缺失率 + 异常值比例 + 最强相关系数绝对值
+
+    Args:
+        data_summary: DataAnalyzer.analyze() 的结果
+
+    Returns:
+        [(列名, 得分)]，得分高的在前；同分按原列顺序
+    """
+    metadata = data_summary.get('metadata', {})
+    stats = data_summary.get('statistics', {})
+    rows = _row_count(data_summary)
+    columns = list(metadata.get('columns') or stats.get('data_types', {}))
+    missing = stats.get('missing_values', {})
+    outliers = data_summary.get('outliers', {})
+    strongest = _strongest_correlations(data_summary.get('correlations', {}))
+
+    scores = []
+    for col in columns:
+        score = 0.0
+        if rows:
+            score += missing.get(col, 0) / rows + outliers.get(col, 0) / rows
+        if col in strongest:
+            score += abs(strongest[col][1])
+        scores.append((col, score))
+    order = {col: i for i, col in enumerate(columns)}
+    return sorted(scores, key=lambda item: (-item[1], order[item[0]]))
+
+
+def column_rows(data_summary: Dict[str, Any]) -> Dict[str, str]:
+    """
+    每列一行的紧凑表示（'|' 分隔），值为0或不适用的字段留空
+
+    数值列: 列|类型|缺失%|异常%|均值|标准差|最小|中位|最大|最强相关
+    分类列: 列|类型|缺失%||唯一值|Top值(次数)...
+    """
+    metadata = data_summary.get('metadata', {})
+    stats = data_summary.get('statistics', {})
+    rows = _row_count(data_summary)
+    dtypes = stats.get('data_types', {})
+    missing = stats.get('missing_values', {})
+    numeric = stats.get('numeric_summary', {})
+    categorical = stats.get('categorical_summary', {})
+    outliers = data_summary.get('outliers', {})
+    strongest = _strongest_correlations(data_summary.get('correlations', {}))
+
+    result = {}
+    for col in metadata.get('columns') or list(dtypes):
+        fields = [str(col), str(dtypes.get(col, '')), _percent(missing.get(col, 0), rows)]
+        if col in numeric:
+            s = numeric[col]
+            corr = ''
+            if col in strongest and abs(strongest[col][1]) >= STRONG_CORRELATION:
+                corr = f'{strongest[col][0]}:{strongest[col][1]:.2f}'
+            fields += [_percent(outliers.get(col, 0), rows)]
+            fields += [_number(s.get(k)) for k in ('mean', 'std', 'min', '50%', 'max')]
+            fields.append(corr)
+        elif col in categorical:
+            summary = categorical[col]
+            top = ','.join(f'{value}({count})' for value, count in list(summary.get('top_values', {}).items())[:3]
+                           if count)
+            fields += ['', _number(summary.get('unique_count')), top]
+        result[col] = '|'.join(fields).rstrip('|')
+    return result
+
+
+def compact_summary(data_summary: Dict[str, Any], token_budget: int = 3000) -> Tuple[str, Dict[str, int]]:
+    """
+    把分析结果压缩为预算内的文本
+
+    按 rank_columns 的顺序逐列加入，超出预算时停止并注明省略的列数；
+    强相关列对（最多占预算的1/5）附在最后。
+
+    Args:
+        data_summary: DataAnalyzer.analyze() 的结果
+        token_budget: 该部分允许的token数
+
+    Returns:
+        (文本, {'columns': 写入列数, 'omitted': 省略列数, 'tokens': 估算token数})
+    """
+    metadata = data_summary.get('metadata', {})
+    shape = metadata.get('shape', 'N/A')
+    lines = [
+        f"数据形状: {shape}",
+        "列（数值: 列|类型|缺失%|异常%|均值|标准差|最小|中位|最大|最强相关；"
+        "分类: 列|类型|缺失%||唯一值|Top值(次数)；空字段表示0或不适用）:",
+    ]
+    used = estimate_tokens('\n'.join(lines))
+
+    # 强相关列对最多占预算的 1/5，放在列表格之后但先计入预算
+    pair_line = ''
+    pairs = _correlation_pairs(data_summary.get('correlations', {}))
+    if pairs:
+        items = []
+        cost = estimate_tokens("强相关列对:")
+        for a, b, r in pairs:
+            item = f"{a}~{b}:{r:.2f}"
+            if cost + estimate_tokens(item) + 1 > token_budget // 5:
+                break
+            items.append(item)
+            cost += estimate_tokens(item) + 1
+        if items:
+            pair_line = "强相关列对: " + ' '.join(items)
+            used += cost
+
+    rows = column_rows(data_summary)
+    ranked = [col for col, _ in rank_columns(data_summary) if col in rows]
+    included = 0
+    for col in ranked:
+        cost = estimate_tokens(rows[col]) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(rows[col])
+        used += cost
+        included += 1
+    omitted = len(ranked) - included
+    if omitted:
+        # 省略说明本身也计入预算，必要时再去掉几列
+        note = f"（按信息量排序，其余 {omitted} 列缺失/异常/相关性较低，已省略）"
+        while included and used + estimate_tokens(note) > token_budget:
+            used -= estimate_tokens(lines.pop()) + 1
+            included, omitted = included - 1, omitted + 1
+            note = f"（按信息量排序，其余 {omitted} 列缺失/异常/相关性较低，已省略）"
+        lines.append(note)
+        used += estimate_tokens(note)
+    if pair_line:
+        lines.append(pair_line)
+
+    return '\n'.join(lines), {'columns': included, 'omitted': omitted, 'tokens': used}
+
+
+def _correlation_pairs(correlations: Dict[str, Dict[str, float]],
+                       threshold: float = STRONG_CORRELATION,
+                       limit: Optional[int] = MAX_CORRELATION_PAIRS) -> List[Tuple[str, str, float]]:
+    pairs = []
+    columns = list(correlations)
+    for i, a in enumerate(columns):
+        for b in columns[i + 1:]:
+            r = correlations[a].get(b)
+            if r is not None and r == r and abs(r) >= threshold:
+                pairs.append((a, b, r))
+    pairs.sort(key=lambda p: -abs(p[2]))
+    return pairs[:limit]
@@ -0,0 +1,82 @@
+"""离线桩客户端 - 与 Anthropic 客户端的 messages.create / messages.stream 接口一致，用于测试和无网络环境"""
+
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class _Block:
+    def __init__(self, text: str):
+        self.type = 'text'
+        self.text = text
+
+
+class _Message:
+    def __init__(self, text: str, model: str):
+        self.content = [_Block(text)]
+        self.model = model
+        self.stop_reason = 'end_turn'
+
+
+class _Stream:
+    """messages.stream 返回的上下文管理器，text_stream 按 chunk_size 个字符逐段产出"""
+
+    def __init__(self, client: 'StubClient', text: str):
+        self._client = client
+        self._text = text
+
+    def __enter__(self) -> '_Stream':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    @property
+    def text_stream(self) -> Iterator[str]:
+        size = max(1, self._client.chunk_size)
+        for i in range(0, len(self._text), size):
+            if i and self._client.chunk_latency:
+                time.sleep(self._client.chunk_latency)
+            yield self._text[i:i + size]
+
+
+class _Messages:
+    def __init__(self, client: 'StubClient'):
+        self._client = client
+
+    def create(self, model: str, max_tokens: int, messages: List[Dict[str, Any]], **kwargs) -> _Message:
+        self._client.calls.append({'model': model, 'max_tokens': max_tokens, 'messages': messages, **kwargs})
+        if self._client.latency:
+            time.sleep(self._client.latency)
+        prompt = messages[-1]['content']
+        return _Message(self._client.respond(prompt), model)
+
+    def stream(self, model: str, max_tokens: int, messages: List[Dict[str, Any]], **kwargs) -> _Stream:
+        self._client.calls.append({'model': model, 'max_tokens': max_tokens, 'messages': messages,
+                                   'stream': True, **kwargs})
+        if self._client.latency:
+            time.sleep(self._client.latency)
+        return _Stream(self._client, self._client.respond(messages[-1]['content']))
+
+
+class StubClient:
+    """
+    替代 Anthropic 客户端：不发请求，按 respond(prompt) 返回固定或生成的文本，并记录每次调用
+
+        analyzer = AIAnalyzer(client=StubClient(lambda prompt: '洞察'))
+    """
+
+    def __init__(self, respond: Optional[Callable[[str], str]] = None, latency: float = 0.0,
+                 chunk_size: int = 8, chunk_latency: float = 0.0):
+        """
+        Args:
+            respond: 由提示词生成回复的函数，默认返回带提示词长度的占位文本
+            latency: 每次调用模拟的延迟秒数（流式时为首个片段前的延迟）
+            chunk_size: 流式时每个片段的字符数
+            chunk_latency: 流式时相邻片段之间的延迟秒数
+        """
+        self.respond = respond or (lambda prompt: f"[stub] 已收到 {len(prompt)} 字符的提示词")
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.calls: List[Dict[str, Any]] = []
+        self.messages = _Messages(self)
@@ -1,5 +1,13 @@
 """数据分析模块"""
 
 from .data_analyzer import DataAnalyzer
+from .streaming import StreamingStats
+from .order_enrichment import build_orders_enriched, enrich_orders, load_orders_enriched
+from .query import LazyQuery, scan
+from .rollups import RollupStore, build_order_rollup
+from .lifecycle import lifecycle, order_lifecycle, subscription_lifecycle
+from .cohorts import CohortEngine
 
-__all__ = ['DataAnalyzer']
+__all__ = ['DataAnalyzer', 'StreamingStats', 'build_orders_enriched', 'enrich_orders', 'load_orders_enriched',
+           'LazyQuery', 'scan', 'RollupStore', 'build_order_rollup',
+           'lifecycle', 'order_lifecycle', 'subscription_lifecycle', 'CohortEngine']
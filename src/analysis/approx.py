@@ -0,0 +1,181 @@
+"""近似分析 - 抽样计算分位数/相关/异常值/Top值，并给出置信区间"""
+
+import math
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .stats_engine import (
+    CATEGORICAL_DTYPES, column_quantiles, correlation_matrix, iqr_outlier_counts,
+    moments_block, numeric_block,
+)
+
+
+def sample_size(error: float, confidence: float) -> int:
+    """
+    由DKW不等式确定样本量：以给定置信度，样本经验分布与总体分布的最大偏差不超过 error
+
+    Args:
+        error: 允许的分位数秩误差（如 0.01 表示 ±1 个百分位）
+        confidence: 置信度
+
+    Returns:
+        样本行数
+    """
+    return math.ceil(math.log(2 / (1 - confidence)) / (2 * error ** 2))
+
+
+def draw_sample(df: pd.DataFrame, n: int, stratify: Optional[str] = None, seed: int = 0) -> pd.DataFrame:
+    """
+    无放回抽样；指定 stratify 时按该列分层、按比例分配样本量
+
+    Args:
+        df: 总体
+        n: 样本行数
+        stratify: 分层列（如 'brand'），保证每层按占比出现在样本中
+        seed: 随机种子
+
+    Returns:
+        样本DataFrame
+    """
+    if n >= len(df):
+        return df
+    if stratify is None:
+        return df.sample(n=n, random_state=seed)
+    return df.groupby(stratify, observed=True, dropna=False, group_keys=False).sample(
+        frac=n / len(df), random_state=seed
+    )
+
+
+def wilson_interval(k: np.ndarray, n: int, z: float):
+    """比例 k/n 的 Wilson 置信区间，返回 (下界, 上界) 比例"""
+    p = np.asarray(k, dtype='float64') / n
+    denom = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def approximate_statistics(
+    df: pd.DataFrame,
+    sample: Union[int, float, None] = None,
+    error: float = 0.01,
+    confidence: float = 0.95,
+    stratify: Optional[str] = None,
+    seed: int = 0,
+    outlier_k: float = 1.5,
+    top_n: int = 5,
+) -> Dict[str, Any]:
+    """
+    近似计算 compute_statistics 的结果，并为每个近似统计量给出置信区间
+
+    count / mean / std / min / max / 缺失数只需一次遍历，仍在全量数据上精确计算；
+    分位数、IQR异常值、相关系数和分类Top值在样本上计算。
+
+    Args:
+        df: 数据
+        sample: 样本行数（int）或比例（float）；为None时按 error 和 confidence 由DKW不等式确定
+        error: 分位数允许的秩误差
+        confidence: 置信度
+        stratify: 分层抽样列
+        seed: 随机种子
+        outlier_k: IQR异常值倍数
+        top_n: 分类列保留的Top值个数
+
+    Returns:
+        compute_statistics 的各项，另含：
+        error_bounds: 与结果同结构的 (下界, 上界)；
+        sample: 样本行数、总体行数、置信度、分位数秩误差、抽样方式
+    """
+    population = len(df)
+    if sample is None:
+        n = sample_size(error, confidence)
+    elif isinstance(sample, float):
+        n = math.ceil(sample * population)
+    else:
+        n = int(sample)
+    sampled = draw_sample(df, n, stratify, seed)
+    n = len(sampled)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    # 样本量对应的DKW秩误差（全量时为0）
+    rank_error = 0.0 if n >= population else math.sqrt(math.log(2 / (1 - confidence)) / (2 * n))
+    scale = population / max(n, 1)
+    exact = n >= population  # 样本即总体时区间退化为点
+
+    columns, values = numeric_block(df)
+    _, sample_values = numeric_block(sampled)
+    numeric_summary, outliers, correlations = {}, {}, {}
+    bounds: Dict[str, Any] = {'numeric_summary': {}, 'outliers': {}, 'correlations': {}, 'categorical_summary': {}}
+
+    if columns:
+        moments = moments_block(values)
+        qs = [0.25, 0.5, 0.75]
+        lower_qs = [max(q - rank_error, 0.0) for q in qs]
+        upper_qs = [min(q + rank_error, 1.0) for q in qs]
+        quantiles = column_quantiles(sample_values, qs + lower_qs + upper_qs)
+        q, q_low, q_high = quantiles[:3], quantiles[3:6], quantiles[6:]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_half = z * moments['std'] / np.sqrt(moments['count'])
+        outlier_sample = iqr_outlier_counts(sample_values, q[0], q[2], outlier_k)
+        out_low, out_high = wilson_interval(outlier_sample, max(n, 1), z)
+
+        corr = correlation_matrix(sample_values)
+        pair_n = (~np.isnan(sample_values)).astype('float64')
+        pair_n = pair_n.T @ pair_n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fisher = np.arctanh(np.clip(corr, -0.999999, 0.999999))
+            half = z / np.sqrt(pair_n - 3)
+            corr_low, corr_high = np.tanh(fisher - half), np.tanh(fisher + half)
+
+        for i, col in enumerate(columns):
+            numeric_summary[col] = {
+                'count': float(moments['count'][i]), 'mean': float(moments['mean'][i]),
+                'std': float(moments['std'][i]), 'min': float(moments['min'][i]),
+                '25%': float(q[0][i]), '50%': float(q[1][i]), '75%': float(q[2][i]),
+                'max': float(moments['max'][i]),
+            }
+            bounds['numeric_summary'][col] = {
+                'mean': (float(moments['mean'][i] - mean_half[i]), float(moments['mean'][i] + mean_half[i])),
+                **{name: (float(q_low[j][i]), float(q_high[j][i]))
+                   for j, name in enumerate(['25%', '50%', '75%'])},
+            }
+            outliers[col] = int(round(outlier_sample[i] * scale))
+            bounds['outliers'][col] = (outliers[col], outliers[col]) if exact else (
+                int(math.floor(out_low[i] * population)), int(math.ceil(out_high[i] * population)))
+            correlations[col] = {row: float(corr[j][i]) for j, row in enumerate(columns)}
+            bounds['correlations'][col] = {
+                row: (float(corr[j][i]), float(corr[j][i])) if exact
+                else (float(corr_low[j][i]), float(corr_high[j][i]))
+                for j, row in enumerate(columns)
+            }
+
+    categorical = {}
+    for col in df.select_dtypes(include=CATEGORICAL_DTYPES).columns:
+        counts = sampled[col].value_counts()
+        top = counts.head(top_n)
+        low, high = wilson_interval(top.to_numpy(), max(n, 1), z)
+        categorical[col] = {
+            'unique_count': int((counts > 0).sum()),  # 样本中的唯一值数，是总体唯一值数的下界
+            'top_values': {value: int(round(c * scale)) for value, c in top.items()},
+        }
+        bounds['categorical_summary'][col] = {
+            value: (int(c), int(c)) if exact else (int(math.floor(lo * population)), int(math.ceil(hi * population)))
+            for value, c, lo, hi in zip(top.index, top, low, high)
+        }
+
+    return {
+        'numeric_summary': numeric_summary,
+        'categorical_summary': categorical,
+        'missing_values': df.isna().sum().to_dict(),
+        'data_types': df.dtypes.astype(str).to_dict(),
+        'correlations': correlations,
+        'outliers': outliers,
+        'error_bounds': bounds,
+        'sample': {
+            'rows': n, 'population': population, 'confidence': confidence,
+            'rank_error': rank_error, 'stratify': stratify,
+        },
+    }
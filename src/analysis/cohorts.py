@@ -0,0 +1,283 @@
+"""同期群分析 - 基于排序/计数的向量化 cohort × period 矩阵（留存、转化、N日内达成率），按已结束的同期群缓存"""
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .result_cache import CACHE_VERSION, ResultCache, fingerprint
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+FREQUENCIES = ('D', 'W', 'M')
+
+
+def period_ordinal(ts: np.ndarray, freq: str) -> np.ndarray:
+    """
+    秒级时间戳 -> 周期序号（相邻周期差1）
+
+    Args:
+        ts: 秒级时间戳
+        freq: 'D' / 'W'（周一开始，与 pandas 'W' 一致）/ 'M'
+    """
+    days = np.floor_divide(np.asarray(ts, dtype='int64'), SECONDS_PER_DAY)
+    if freq == 'D':
+        return days
+    if freq == 'W':
+        return np.floor_divide(days + 3, 7)  # 1970-01-01 是周四
+    if freq == 'M':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+    raise ValueError(f"不支持的周期: {freq}")
+
+
+def ordinal_to_period(ordinals: np.ndarray, freq: str) -> pd.PeriodIndex:
+    if freq == 'M':
+        return pd.PeriodIndex(np.asarray(ordinals).astype('datetime64[M]'), freq='M')
+    days = np.asarray(ordinals) * 7 - 3 if freq == 'W' else np.asarray(ordinals)
+    return pd.PeriodIndex(days.astype('datetime64[D]'), freq=freq)
+
+
+class CohortEngine:
+    """
+    同期群矩阵计算
+
+    entities 每行一个个体（用户/订阅），cohort_time 决定所属同期群；events 为个体的行为
+    （付费订单、设备绑定……），按 key 关联到个体。结果每行一个同期群（可按 by 列再分组）。
+
+    所有单元格都已可观测的同期群（已结束）按 (指标, 参数, 同期群, 成员及其相关行为的指纹) 缓存，
+    每次只重新计算仍在进行中的近期同期群。相关行为只含落在该同期群周期/窗口内的行为，
+    当期新增的行为不会使已结束同期群的缓存失效。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, version: Any = None):
+        """
+        Args:
+            cache_dir: 已结束同期群的缓存目录，为None时不缓存
+            version: 数据版本（如全量对账的时间），变化时使全部缓存失效；
+                     同期群成员或其周期内的行为变化时该同期群的缓存自动失效
+        """
+        self.cache: Optional[ResultCache] = ResultCache(cache_dir) if cache_dir else None
+        self.version = version
+
+    # ---- 公开接口 ----
+
+    def retention(self, entities: pd.DataFrame, events: pd.DataFrame, key: Sequence[str],
+                  cohort_time: str, event_time: str, by: Sequence[str] = (),
+                  freq: str = 'M', periods: int = 12, as_of: Optional[int] = None) -> pd.DataFrame:
+        """
+        留存矩阵：第 k 个周期内有行为的个体占比
+
+        Args:
+            entities: 个体，含 key、by 列和 cohort_time 列（秒级时间戳）
+            events: 行为，含 key 和 event_time 列
+            key: 关联键
+            cohort_time: 个体的同期群时间列（如 register_time / first_pay_time）
+            event_time: 行为时间列
+            by: 额外的分组列（如 brand）
+            freq: 同期群和周期的粒度
+            periods: 计算的周期数（第0期为同期群所在周期）
+            as_of: 数据截止时间，之后的单元格为缺失；默认为行为的最大时间
+
+        Returns:
+            索引为 by + cohort（Period），列为 size 和 0..periods-1 的占比
+        """
+        return self._run('retention', entities, events, key, cohort_time, event_time, by,
+                         freq, as_of, periods=periods)
+
+    def conversion(self, entities: pd.DataFrame, events: pd.DataFrame, key: Sequence[str],
+                   cohort_time: str, event_time: str, by: Sequence[str] = (),
+                   freq: str = 'M', periods: int = 12, as_of: Optional[int] = None) -> pd.DataFrame:
+        """
+        累计转化矩阵：截至第 k 个周期已发生过行为（如首次付费）的个体占比
+
+        参数同 retention
+        """
+        return self._run('conversion', entities, events, key, cohort_time, event_time, by,
+                         freq, as_of, periods=periods)
+
+    def window_rate(self, entities: pd.DataFrame, events: pd.DataFrame, key: Sequence[str],
+                    cohort_time: str, event_time: str, by: Sequence[str] = (),
+                    freq: str = 'M', days: int = 7, as_of: Optional[int] = None) -> pd.DataFrame:
+        """
+        N日内达成率：cohort_time 之后 days 天内发生行为的个体占比（如注册后7天内绑定设备）
+
+        窗口尚未结束的个体（cohort_time 在 as_of 前 days 天内）不计入分母。
+
+        Returns:
+            索引为 by + cohort，列为 size / eligible / converted / rate
+        """
+        return self._run('window', entities, events, key, cohort_time, event_time, by,
+                         freq, as_of, days=days)
+
+    # ---- 实现 ----
+
+    def _run(self, metric: str, entities: pd.DataFrame, events: pd.DataFrame, key: Sequence[str],
+             cohort_time: str, event_time: str, by: Sequence[str], freq: str,
+             as_of: Optional[int], **params) -> pd.DataFrame:
+        if freq not in FREQUENCIES:
+            raise ValueError(f"不支持的周期: {freq}")
+        key, by = list(key), list(by)
+        entities = entities[entities[cohort_time].notna()]
+        if as_of is None:
+            as_of = int(events[event_time].max()) if len(events) else int(entities[cohort_time].max())
+
+        start = entities[cohort_time].to_numpy(dtype='int64')
+        cohort = period_ordinal(start, freq)
+        grouped = entities[by].assign(cohort=cohort).groupby(by + ['cohort'], sort=True, dropna=False)
+        rows = grouped.ngroup().to_numpy()
+        counts = grouped.size()
+        row_labels = [label if isinstance(label, tuple) else (label,) for label in counts.index]
+        sizes = counts.to_numpy()
+
+        closed = self._closed(np.array([label[-1] for label in row_labels], dtype='int64'), metric,
+                              freq, as_of, params)
+        results: Dict[int, List[float]] = {}
+        cache_keys: Dict[int, str] = {}
+        if self.cache is not None and closed.any():
+            # 每个已结束同期群只按其成员和落在其周期/窗口内的行为取指纹：
+            # 换用不同的行为数据（如全部订单 -> 仅付费订单）时不会命中旧结果，当期新增行为不影响
+            digests = self._cohort_digests(metric, entities, events, key, cohort_time, event_time,
+                                           start, rows, cohort, closed, freq, params)
+            for i in np.flatnonzero(closed):
+                cache_keys[i] = fingerprint(CACHE_VERSION, 'cohort', metric, self.version, key, by,
+                                            cohort_time, event_time, freq, sorted(params.items()),
+                                            row_labels[i], int(sizes[i]), digests[i])
+                cached = self.cache.get(cache_keys[i])
+                if cached is not None:
+                    results[i] = cached
+
+        pending = np.array([i for i in range(len(row_labels)) if i not in results], dtype='int64')
+        if len(pending):
+            computed = self._compute(metric, entities, events, key, event_time, start, rows,
+                                     pending, sizes, freq, as_of, cohort, params)
+            for i in pending:
+                results[i] = computed[i]
+                if i in cache_keys:
+                    self.cache.put(cache_keys[i], results[i])
+        logger.info(f"同期群 {metric}: {len(row_labels)} 个同期群, 重新计算 {len(pending)} 个")
+
+        columns = (['size', 'eligible', 'converted', 'rate'] if metric == 'window'
+                   else ['size'] + list(range(params['periods'])))
+        periods = ordinal_to_period([label[-1] for label in row_labels], freq)
+        if by:
+            levels = [[label[j] for label in row_labels] for j in range(len(by))]
+            index = pd.MultiIndex.from_arrays(levels + [periods], names=by + ['cohort'])
+        else:
+            index = pd.Index(periods, name='cohort')
+        return pd.DataFrame([results[i] for i in range(len(row_labels))], index=index, columns=columns)
+
+    @staticmethod
+    def _closed(cohorts: np.ndarray, metric: str, freq: str, as_of: int, params) -> np.ndarray:
+        """所有单元格都不会再变化的同期群"""
+        current = period_ordinal(np.array([as_of]), freq)[0]
+        if metric == 'window':
+            # 同期群最后一天注册的个体窗口也已结束
+            window_end = period_ordinal(np.array([as_of - params['days'] * SECONDS_PER_DAY]), freq)[0]
+            return cohorts < window_end
+        return cohorts + params['periods'] <= current
+
+    @staticmethod
+    def _match(entities: pd.DataFrame, events: pd.DataFrame, key: List[str], event_time: str,
+               entity_pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按 key 把行为关联到 entity_pos 中的个体，返回 (个体位置, 行为时间)，未关联的行为丢弃"""
+        # 个体与行为的 key 一起编码（一次哈希），再用编码查回个体位置
+        keys = pd.concat([entities[key].iloc[entity_pos], events[key]], ignore_index=True)
+        codes = keys.groupby(key, sort=False, dropna=False).ngroup().to_numpy()
+        lookup = np.full(codes.max() + 1 if len(codes) else 0, -1, dtype='int64')
+        lookup[codes[:len(entity_pos)]] = entity_pos
+        position = lookup[codes[len(entity_pos):]]
+        matched = position >= 0
+        return position[matched], events[event_time].to_numpy(dtype='int64')[matched]
+
+    @staticmethod
+    def _relevant(metric: str, who: np.ndarray, when: np.ndarray, start: np.ndarray, cohort: np.ndarray,
+                  freq: str, params) -> np.ndarray:
+        """会计入单元格的行为：落在个体的 N 日窗口内，或落在同期群的前 periods 个周期内"""
+        if metric == 'window':
+            delay = when - start[who]
+            return (delay >= 0) & (delay <= params['days'] * SECONDS_PER_DAY)
+        offset = period_ordinal(when, freq) - cohort[who]
+        return (offset >= 0) & (offset < params['periods'])
+
+    def _cohort_digests(self, metric: str, entities: pd.DataFrame, events: pd.DataFrame, key: List[str],
+                        cohort_time: str, event_time: str, start: np.ndarray, rows: np.ndarray,
+                        cohort: np.ndarray, closed: np.ndarray, freq: str, params) -> Dict[int, str]:
+        """已结束同期群的内容指纹：成员（key + 同期群时间）及其相关行为，与行顺序无关"""
+        member_pos = np.flatnonzero(closed[rows])
+        # 先按时间粗筛，只对已结束同期群可能用到的行为做关联和哈希
+        when = events[event_time].to_numpy(dtype='int64')
+        if metric == 'window':
+            last = start[member_pos].max() + params['days'] * SECONDS_PER_DAY
+            window = (when >= start[member_pos].min()) & (when <= last)
+        else:
+            ordinal = period_ordinal(when, freq)
+            window = (ordinal >= cohort[member_pos].min()) & (ordinal < cohort[member_pos].max() + params['periods'])
+        who, when = self._match(entities, events[window], key, event_time, member_pos)
+        relevant = self._relevant(metric, who, when, start, cohort, freq, params)
+        who, when = who[relevant], when[relevant]
+
+        entity_hash = np.zeros(len(entities), dtype='uint64')
+        entity_hash[member_pos] = pd.util.hash_pandas_object(
+            entities[key + [cohort_time]].iloc[member_pos], index=False).to_numpy()
+        event_hash = pd.util.hash_pandas_object(
+            pd.DataFrame({'member': entity_hash[who], 'time': when}), index=False).to_numpy()
+
+        # 按 (同期群, 成员/行为, 哈希) 排序后逐个同期群摘要
+        groups = np.r_[rows[member_pos], rows[who]]
+        kinds = np.r_[np.zeros(len(member_pos), dtype='uint64'), np.ones(len(who), dtype='uint64')]
+        hashes = np.r_[entity_hash[member_pos], event_hash]
+        order = np.lexsort((hashes, kinds, groups))
+        groups, kinds, hashes = groups[order], kinds[order], hashes[order]
+        targets = np.flatnonzero(closed)
+        lows, highs = np.searchsorted(groups, targets, side='left'), np.searchsorted(groups, targets, side='right')
+        return {i: hashlib.sha256(kinds[lo:hi].tobytes() + hashes[lo:hi].tobytes()).hexdigest()
+                for i, lo, hi in zip(targets, lows, highs)}
+
+    def _compute(self, metric: str, entities: pd.DataFrame, events: pd.DataFrame, key: List[str],
+                 event_time: str, start: np.ndarray, rows: np.ndarray, pending: np.ndarray,
+                 sizes: np.ndarray, freq: str, as_of: int, cohort: np.ndarray, params) -> Dict[int, List[float]]:
+        n_rows = len(sizes)
+        wanted = np.isin(rows, pending)
+        entity_pos = np.flatnonzero(wanted)
+        # 只保留不早于最早待算同期群起点的行为，再按 key 关联到个体位置
+        events = events[events[event_time].to_numpy(dtype='int64') >= start[entity_pos].min()]
+        who, when = self._match(entities, events, key, event_time, entity_pos)
+        hit = self._relevant(metric, who, when, start, cohort, freq, params)
+
+        if metric == 'window':
+            eligible_mask = start <= as_of - params['days'] * SECONDS_PER_DAY
+            eligible = np.bincount(rows[eligible_mask], minlength=n_rows)
+            converted_entities = np.unique(who[hit & eligible_mask[who]])
+            converted = np.bincount(rows[converted_entities], minlength=n_rows)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rate = converted / eligible
+            return {i: [int(sizes[i]), int(eligible[i]), int(converted[i]),
+                        float(rate[i]) if eligible[i] else np.nan] for i in pending}
+
+        periods = params['periods']
+        who, when = who[hit], when[hit]
+        offset = period_ordinal(when, freq) - cohort[who]
+        # 每个 (个体, 周期) 只保留一次，结果按个体、周期排序
+        pairs = np.unique(who * periods + offset)
+        who, offset = pairs // periods, pairs % periods
+        if metric == 'conversion':
+            # 每个个体只取首次发生的周期，再按周期累计
+            first = np.r_[True, who[1:] != who[:-1]] if len(who) else np.empty(0, bool)
+            who, offset = who[first], offset[first]
+        counts = np.bincount(rows[who] * periods + offset, minlength=n_rows * periods).reshape(n_rows, periods)
+        if metric == 'conversion':
+            counts = np.cumsum(counts, axis=1)
+        counts = counts.astype('float64')
+
+        # 尚未到达的周期为缺失
+        row_cohort = np.zeros(n_rows, dtype='int64')
+        row_cohort[rows] = cohort
+        current = period_ordinal(np.array([as_of]), freq)[0]
+        future = row_cohort[:, None] + np.arange(periods)[None, :] > current
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = counts / sizes[:, None]
+        rates[future] = np.nan
+        return {i: [int(sizes[i])] + rates[i].tolist() for i in pending}
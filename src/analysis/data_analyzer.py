@@ -1,50 +1,89 @@
 """核心数据分析器"""
 
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+import pyarrow.parquet as pq
+from typing import Dict, Any, Iterable, Optional, Sequence, Tuple
 import logging
 
+from .approx import approximate_statistics
+from .dtype_compaction import compact_dtypes
+from .file_formats import apply_filters, file_format, read_arrow, read_csv
+from .result_cache import (
+    CACHE_VERSION, ResultCache, file_fingerprint, fingerprint, frame_fingerprint,
+)
+from .streaming import StreamingStats
+from .stats_engine import (
+    column_quantiles, column_slices, compute_statistics, correlation_dict, iqr_outlier_counts,
+    numeric_block, parallel_map,
+)
+
 logger = logging.getLogger(__name__)
 
 
 class DataAnalyzer:
     """数据分析器主类"""
 
-    def __init__(self):
+    def __init__(self, compact: bool = False, n_jobs: int = 1, cache_dir: Optional[str] = None,
+                 **compact_options):
+        """
+        Args:
+            compact: 加载后是否自动压缩列类型（见 compact_data）
+            n_jobs: 按列统计（分位数、异常值、value_counts）的并行线程数，-1 为CPU核数
+            cache_dir: analyze() 结果缓存目录，为None时不缓存
+            **compact_options: 透传给 compact_dtypes（category_ratio, epoch_columns 等）
+        """
         self.data: Optional[pd.DataFrame] = None
         self.metadata: Dict[str, Any] = {}
-
-    def load_data(self, filepath: str, **kwargs) -> pd.DataFrame:
+        self.compact = compact
+        self.compact_options = compact_options
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+        self.cache: Optional[ResultCache] = ResultCache(cache_dir) if cache_dir else None
+        # (id(self.data), 来源指纹)；self.data 被替换后自动失效，回退到内容指纹
+        self._source: Optional[Tuple[int, str]] = None
+        # 增量分析的可合并聚合状态（见 update）
+        self.state: Optional[StreamingStats] = None
+
+    def load_data(self, filepath: str, columns: Optional[Sequence[str]] = None,
+                  filters=None, **kwargs) -> pd.DataFrame:
         """
         加载数据文件
 
         Args:
-            filepath: 数据文件路径
+            filepath: 数据文件路径（CSV 及 .gz/.bz2/.zst/.xz 压缩CSV、Parquet、Feather/Arrow、Excel、JSON）
+            columns: 只读取这些列；Parquet/Feather 只解码这些列
+            filters: 行过滤条件，pyarrow DNF格式，如 [('brand', '==', 'OSAIO'), ('amount', '>', 0)]；
+                Parquet 按行组统计和分区下推，其余格式读取后过滤
             **kwargs: pandas读取参数
 
         Returns:
             加载的DataFrame
         """
         try:
-            if filepath.endswith('.csv'):
-                self.data = pd.read_csv(filepath, **kwargs)
-            elif filepath.endswith(('.xlsx', '.xls')):
-                self.data = pd.read_excel(filepath, **kwargs)
-            elif filepath.endswith('.json'):
-                self.data = pd.read_json(filepath, **kwargs)
+            fmt = file_format(filepath)
+            if fmt in ('parquet', 'feather'):
+                self.data = read_arrow(filepath, fmt, columns=columns, filters=filters)
+            elif fmt == 'csv':
+                self.data = read_csv(filepath, columns=columns, filters=filters, **kwargs)
+            elif fmt == 'excel':
+                self.data = apply_filters(pd.read_excel(filepath, **kwargs), filters, columns)
+            elif fmt == 'json':
+                self.data = apply_filters(pd.read_json(filepath, **kwargs), filters, columns)
             else:
                 raise ValueError(f"不支持的文件格式: {filepath}")
 
             logger.info(f"成功加载数据: {filepath}, 形状: {self.data.shape}")
-            self._collect_metadata()
+            self._after_load()
+            self._set_source(file_fingerprint(filepath, columns=columns, filters=filters, **kwargs))
             return self.data
 
         except Exception as e:
             logger.error(f"加载数据失败: {e}")
             raise
 
-    def load_from_db(self, connector, sql: str, params=None) -> pd.DataFrame:
+    def load_from_db(self, connector, sql: str, params=None,
+                     chunksize: Optional[int] = None, version=None) -> pd.DataFrame:
         """
         从数据库加载数据
 
@@ -52,19 +91,175 @@ class DataAnalyzer:
             connector: DBConnector实例（需已连接）
             sql: SQL查询语句
             params: SQL参数
+            chunksize: 指定时使用服务端游标分块拉取，避免结果集在客户端重复占用内存
+            version: 数据版本（如同步水位线），与SQL一起作为结果缓存的指纹；
+                为None时缓存按数据内容计算指纹
 
         Returns:
             加载的DataFrame
         """
         try:
-            self.data = connector.query_df(sql, params=params)
-            logger.info(f"从数据库加载数据成功, 形状: {self.data.shape}")
-            self._collect_metadata()
+            if chunksize:
+                self.load_chunks(connector.query_iter(sql, params=params, chunksize=chunksize))
+            else:
+                self.data = connector.query_df(sql, params=params)
+                logger.info(f"从数据库加载数据成功, 形状: {self.data.shape}")
+                self._after_load()
+            if version is not None:
+                self._set_source(fingerprint('sql', getattr(connector, 'brand', None), sql, params, version))
             return self.data
         except Exception as e:
             logger.error(f"数据库查询失败: {e}")
             raise
 
+    def load_chunks(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        从DataFrame分块迭代器加载数据（如 DBConnector.query_iter）
+
+        Args:
+            chunks: DataFrame分块迭代器，各块列和类型一致
+
+        Returns:
+            合并后的DataFrame
+        """
+        frames = list(chunks)
+        if not frames:
+            raise ValueError("分块迭代器为空")
+        self.data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        logger.info(f"分块加载数据成功, 块数: {len(frames)}, 形状: {self.data.shape}")
+        self._after_load()
+        return self.data
+
+    def analyze_chunks(self, chunks: Iterable[pd.DataFrame], **options) -> Dict[str, Any]:
+        """
+        流式分析分块数据，不把整份数据放入内存（self.data 保持不变）
+
+        Args:
+            chunks: DataFrame分块迭代器（如 pd.read_csv(chunksize=...)、DBConnector.query_iter）
+            **options: StreamingStats 参数（草图容量等）
+
+        Returns:
+            与 analyze() 相同结构的结果；数据量超过草图容量时分位数、异常值、
+            分类Top值和唯一值数为近似值
+        """
+        stats = StreamingStats(**options)
+        for chunk in chunks:
+            stats.update(chunk)
+        results = stats.result()
+        self.metadata = results['metadata']
+        logger.info(f"流式分析完成, 块数: {stats.chunks}, 形状: {self.metadata['shape']}")
+        return results
+
+    def update(self, new_rows: pd.DataFrame) -> Dict[str, Any]:
+        """
+        增量分析：把新增数据合并进聚合状态，只处理增量部分
+
+        首次调用时若已加载 self.data，先用它初始化状态（一次全量扫描）；之后每次
+        耗时只与 new_rows 的行数有关。self.data 不会追加新行。
+
+        Args:
+            new_rows: 新增数据，列与已有数据一致
+
+        Returns:
+            与 analyze() 相同结构的结果，覆盖历史数据和全部增量
+        """
+        if self.state is None:
+            self.state = StreamingStats()
+            if self.data is not None:
+                self.state.update(self.data)
+        self.state.update(new_rows)
+        results = self.state.result()
+        self.metadata = results['metadata']
+        logger.info(f"增量分析完成, 新增 {len(new_rows):,} 行, 累计 {self.state.rows:,} 行")
+        return results
+
+    def save_state(self, store, name: str):
+        """
+        把增量分析状态保存到同步水位线所在的库
+
+        Args:
+            store: WatermarkStore
+            name: 状态名，如 'analysis.orders'
+        """
+        if self.state is None:
+            raise ValueError("没有可保存的增量分析状态")
+        store.save_state(name, self.state)
+
+    def load_state(self, store, name: str) -> bool:
+        """
+        从同步水位线所在的库恢复增量分析状态
+
+        Returns:
+            是否找到已保存的状态
+        """
+        self.state = store.load_state(name)
+        return self.state is not None
+
+    def analyze_file(self, filepath: str, chunksize: int = 100000, **kwargs) -> Dict[str, Any]:
+        """
+        分块读取大文件并流式分析，峰值内存由 chunksize 决定
+
+        Args:
+            filepath: CSV（含压缩CSV）、Parquet 或 JSON Lines 文件路径
+            chunksize: 每块行数
+            **kwargs: pandas读取参数
+
+        Returns:
+            与 analyze() 相同结构的结果
+        """
+        fmt = file_format(filepath)
+        if fmt == 'parquet' and not os.path.isdir(filepath):
+            batches = pq.ParquetFile(filepath, memory_map=True).iter_batches(batch_size=chunksize, **kwargs)
+            return self.analyze_chunks(batch.to_pandas() for batch in batches)
+        if fmt == 'csv':
+            reader = pd.read_csv(filepath, chunksize=chunksize, **kwargs)
+        elif fmt == 'json' or filepath.endswith('.jsonl'):
+            reader = pd.read_json(filepath, lines=True, chunksize=chunksize, **kwargs)
+        else:
+            raise ValueError(f"不支持分块读取的文件格式: {filepath}")
+
+        with reader:
+            return self.analyze_chunks(reader)
+
+    def compact_data(self, **options) -> Dict[str, Any]:
+        """
+        压缩列类型：整数降位、低基数字符串转 category、时间戳列转 datetime64
+
+        Args:
+            **options: 透传给 compact_dtypes，默认使用构造时的 compact_options
+
+        Returns:
+            压缩报告（memory_before / memory_after / dtype_changes），同时写入 metadata
+        """
+        if self.data is None:
+            raise ValueError("请先加载数据")
+
+        self.data, report = compact_dtypes(self.data, **(options or self.compact_options))
+        self._collect_metadata()
+        self.metadata['memory_usage_before'] = report['memory_before']
+        self.metadata['dtype_changes'] = report['dtype_changes']
+        return report
+
+    def _set_source(self, token: str):
+        """记录当前数据的来源指纹（含类型压缩设置，压缩会改变分析结果）"""
+        self._source = (id(self.data), fingerprint(token, self.compact, sorted(self.compact_options.items())))
+
+    def data_fingerprint(self) -> str:
+        """
+        当前数据的指纹：来自文件/带版本的SQL时直接使用来源指纹，否则按内容哈希
+
+        注意：原地修改 self.data（如 df['x'] = ...）不会改变来源指纹，此时应重新加载或关闭缓存。
+        """
+        if self._source is not None and self._source[0] == id(self.data):
+            return self._source[1]
+        return frame_fingerprint(self.data)
+
+    def _after_load(self):
+        if self.compact:
+            self.compact_data()
+        else:
+            self._collect_metadata()
+
     def _collect_metadata(self):
         """收集数据元信息"""
         if self.data is not None:
@@ -86,22 +281,9 @@ class DataAnalyzer:
         if self.data is None:
             raise ValueError("请先加载数据")
 
-        stats = {
-            'numeric_summary': self.data.describe().to_dict(),
-            'categorical_summary': {},
-            'missing_values': self.data.isnull().sum().to_dict(),
-            'data_types': self.data.dtypes.astype(str).to_dict()
-        }
-
-        # 分类变量统计
-        categorical_cols = self.data.select_dtypes(include=['object', 'category']).columns
-        for col in categorical_cols:
-            stats['categorical_summary'][col] = {
-                'unique_count': self.data[col].nunique(),
-                'top_values': self.data[col].value_counts().head(5).to_dict()
-            }
-
-        return stats
+        stats = compute_statistics(self.data, n_jobs=self.n_jobs)
+        return {key: stats[key] for key in
+                ('numeric_summary', 'categorical_summary', 'missing_values', 'data_types')}
 
     def clean_data(self, strategy: str = 'drop', fill_value=None) -> pd.DataFrame:
         """
@@ -134,46 +316,70 @@ class DataAnalyzer:
         self.data = cleaned_data
         return cleaned_data
 
-    def analyze(self) -> Dict[str, Any]:
+    def analyze(self, mode: str = 'exact', **approx_options) -> Dict[str, Any]:
         """
         执行完整的数据分析
 
+        Args:
+            mode: 'exact' 全量精确计算；'approx' 抽样近似计算，结果另含 error_bounds
+            **approx_options: 近似模式参数，透传给 approximate_statistics
+                （sample, error, confidence, stratify, seed）
+
         Returns:
             分析结果字典
         """
         if self.data is None:
             raise ValueError("请先加载数据")
-
+        if mode not in ('exact', 'approx'):
+            raise ValueError(f"未知的分析模式: {mode}")
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = fingerprint(CACHE_VERSION, 'analyze', self.data_fingerprint(),
+                                    mode, sorted(approx_options.items()))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if mode == 'approx':
+            stats = approximate_statistics(self.data, **approx_options)
+        else:
+            # 数值列只转换一次，统计/相关/异常值在同一批数组运算中得到
+            stats = compute_statistics(self.data, n_jobs=self.n_jobs)
         results = {
             'metadata': self.metadata,
-            'statistics': self.basic_statistics(),
-            'correlations': self._calculate_correlations(),
-            'outliers': self._detect_outliers()
+            'statistics': {key: stats[key] for key in
+                           ('numeric_summary', 'categorical_summary', 'missing_values', 'data_types')},
+            'correlations': stats['correlations'],
+            'outliers': stats['outliers'],
         }
+        if mode == 'approx':
+            results['metadata'] = {**self.metadata, 'sample': stats['sample']}
+            results['error_bounds'] = stats['error_bounds']
+        if cache_key is not None:
+            self.cache.put(cache_key, results)
 
         return results
 
     def _calculate_correlations(self) -> Dict[str, Any]:
         """计算数值列之间的相关性"""
-        numeric_data = self.data.select_dtypes(include=[np.number])
-        if numeric_data.empty:
+        columns, values = numeric_block(self.data)
+        if not columns:
             return {}
-        return numeric_data.corr().to_dict()
+        return correlation_dict(columns, values)
 
     def _detect_outliers(self, method: str = 'iqr') -> Dict[str, Any]:
         """检测异常值"""
-        outliers = {}
-        numeric_cols = self.data.select_dtypes(include=[np.number]).columns
-
-        for col in numeric_cols:
-            if method == 'iqr':
-                Q1 = self.data[col].quantile(0.25)
-                Q3 = self.data[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                outlier_count = ((self.data[col] < lower_bound) |
-                               (self.data[col] > upper_bound)).sum()
-                outliers[col] = int(outlier_count)
-
-        return outliers
+        if method != 'iqr':
+            return {}
+        columns, values = numeric_block(self.data)
+        if not columns:
+            return {}
+
+        def count(block: np.ndarray) -> np.ndarray:
+            q1, _, q3 = column_quantiles(block)
+            return iqr_outlier_counts(block, q1, q3)
+
+        blocks = [values[:, s] for s in column_slices(len(columns), self.n_jobs)]
+        counts = np.concatenate(parallel_map(count, blocks, self.n_jobs))
+        return {col: int(c) for col, c in zip(columns, counts)}
@@ -0,0 +1,82 @@
+"""类型压缩 - 数值降位、低基数字符串转 category、时间戳列转 datetime64"""
+
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 2000-01-01 ~ 2100-01-01 的秒级时间戳范围
+EPOCH_SECONDS_RANGE = (946684800, 4102444800)
+EPOCH_NAME_SUFFIXES = ('time', '_at', '_ts')
+
+
+def _is_epoch(series: pd.Series) -> Optional[str]:
+    """按列名和取值范围判断是否为时间戳列，返回单位 's' / 'ms'，否则None"""
+    if not pd.api.types.is_integer_dtype(series) or not str(series.name).lower().endswith(EPOCH_NAME_SUFFIXES):
+        return None
+    values = series.dropna()
+    if values.empty:
+        return None
+    low, high = values.min(), values.max()
+    for unit, scale in (('s', 1), ('ms', 1000)):
+        if EPOCH_SECONDS_RANGE[0] * scale <= low and high < EPOCH_SECONDS_RANGE[1] * scale:
+            return unit
+    return None
+
+
+def compact_dtypes(
+    df: pd.DataFrame,
+    category_ratio: float = 0.5,
+    epoch_columns: Optional[Sequence[str]] = None,
+    downcast_floats: bool = False,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    压缩DataFrame的列类型
+
+    Args:
+        df: 原始数据
+        category_ratio: 唯一值数 / 非空行数 不超过该比例的字符串列转为 category
+        epoch_columns: 指定的秒级时间戳列（<=0 的值视为缺失）；为None时按列名和取值范围自动识别
+        downcast_floats: 是否把 float64 降为 float32（金额累加会损失精度，默认关闭）
+
+    Returns:
+        (压缩后的DataFrame, 报告)；报告含 memory_before / memory_after 和每列的类型变化
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    result = {}
+    changes = {}
+
+    for col in df.columns:
+        series = df[col]
+        before = str(series.dtype)
+
+        if epoch_columns is not None and col in epoch_columns:
+            series = pd.to_datetime(series.where(series > 0), unit='s')
+        elif epoch_columns is None and (unit := _is_epoch(series)):
+            series = pd.to_datetime(series, unit=unit)
+        elif pd.api.types.is_bool_dtype(series):
+            pass
+        elif pd.api.types.is_integer_dtype(series):
+            series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series) and downcast_floats:
+            series = pd.to_numeric(series, downcast='float')
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            non_null = series.count()
+            if non_null and series.nunique() <= category_ratio * non_null:
+                series = series.astype('category')
+
+        result[col] = series
+        if str(series.dtype) != before:
+            changes[col] = (before, str(series.dtype))
+
+    compacted = pd.DataFrame(result, index=df.index)
+    memory_after = int(compacted.memory_usage(deep=True).sum())
+    logger.info(f"类型压缩: {memory_before / 1024 / 1024:.1f} MB -> {memory_after / 1024 / 1024:.1f} MB, "
+                f"{len(changes)} 列")
+    return compacted, {
+        'memory_before': memory_before,
+        'memory_after': memory_after,
+        'dtype_changes': changes,
+    }
@@ -0,0 +1,147 @@
+"""数据文件读取 - 列式格式（Parquet/Feather）与压缩CSV，支持列裁剪和过滤下推"""
+
+import os
+from typing import List, Optional, Sequence
+
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+COMPRESSION_SUFFIXES = ('.gz', '.bz2', '.zst', '.xz', '.zip')
+
+_EXTENSIONS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.feather': 'feather', '.arrow': 'feather', '.ipc': 'feather',
+    '.xlsx': 'excel', '.xls': 'excel',
+    '.json': 'json',
+}
+
+
+def file_format(filepath: str) -> Optional[str]:
+    """
+    按扩展名识别文件格式（忽略压缩后缀）；目录视为分区Parquet数据集
+
+    Returns:
+        'csv' / 'parquet' / 'feather' / 'excel' / 'json'，无法识别时返回None
+    """
+    if os.path.isdir(filepath):
+        return 'parquet'
+    name = filepath.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return _EXTENSIONS.get(os.path.splitext(name)[1])
+
+
+def normalize_filters(filters) -> List[List[tuple]]:
+    """DNF过滤条件统一为 [[(列, 运算符, 值), ...], ...]（组内AND，组间OR）"""
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [list(filters)]
+    return [list(group) for group in filters]
+
+
+def filter_columns(filters) -> List[str]:
+    """过滤条件涉及的列"""
+    return list(dict.fromkeys(col for group in normalize_filters(filters) for col, _, _ in group))
+
+
+def apply_filters(df: pd.DataFrame, filters=None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    在DataFrame上执行DNF过滤并选择列（用于不支持下推的格式）
+
+    Args:
+        df: 数据
+        filters: pyarrow DNF格式的过滤条件
+        columns: 最终保留的列
+
+    Returns:
+        过滤后的DataFrame
+    """
+    groups = normalize_filters(filters)
+    if groups:
+        mask = pd.Series(False, index=df.index)
+        for group in groups:
+            group_mask = pd.Series(True, index=df.index)
+            for col, op, value in group:
+                series = df[col]
+                if op in ('==', '='):
+                    group_mask &= series == value
+                elif op == '!=':
+                    group_mask &= series != value
+                elif op == '<':
+                    group_mask &= series < value
+                elif op == '<=':
+                    group_mask &= series <= value
+                elif op == '>':
+                    group_mask &= series > value
+                elif op == '>=':
+                    group_mask &= series >= value
+                elif op == 'in':
+                    group_mask &= series.isin(value)
+                elif op == 'not in':
+                    group_mask &= ~series.isin(value)
+                else:
+                    raise ValueError(f"不支持的过滤运算符: {op}")
+            mask |= group_mask
+        df = df[mask.to_numpy()].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def read_arrow(filepath: str, fmt: str, columns: Optional[Sequence[str]] = None, filters=None) -> pd.DataFrame:
+    """
+    读取 Parquet / Feather（内存映射）
+
+    Parquet 的列裁剪和过滤在读取时下推（跳过不满足条件的行组/分区）；
+    Feather 只解码需要的列，过滤在Arrow表上执行后再转换为pandas。
+
+    Args:
+        filepath: 文件或分区数据集目录
+        fmt: 'parquet' 或 'feather'
+        columns: 只读取这些列
+        filters: pyarrow DNF格式的过滤条件
+
+    Returns:
+        DataFrame
+    """
+    columns = list(columns) if columns is not None else None
+    if fmt == 'parquet':
+        table = pq.read_table(filepath, columns=columns, filters=filters or None, memory_map=True)
+        return table.to_pandas()
+
+    read_columns = columns
+    if columns is not None and filters:
+        read_columns = list(dict.fromkeys(columns + filter_columns(filters)))
+    table = feather.read_table(filepath, columns=read_columns, memory_map=True)
+    if filters:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+def read_csv(filepath: str, columns: Optional[Sequence[str]] = None, filters=None, **kwargs) -> pd.DataFrame:
+    """
+    读取CSV（含压缩CSV，按扩展名自动解压）
+
+    默认使用 pandas 的解析器，结果与 pd.read_csv 一致；大文件可传 engine='pyarrow' 多线程解析，
+    但 pyarrow 不支持 nrows / skipfooter / low_memory 等参数，且会把日期格式的字符串解析为 datetime。
+
+    Args:
+        filepath: 文件路径
+        columns: 只解析这些列
+        filters: pyarrow DNF格式的过滤条件，解析后执行
+        **kwargs: pandas.read_csv 参数
+
+    Returns:
+        DataFrame
+    """
+    if columns is not None:
+        kwargs['usecols'] = list(dict.fromkeys(list(columns) + filter_columns(filters)))
+    df = pd.read_csv(filepath, **kwargs)
+    return apply_filters(df, filters, columns)
@@ -0,0 +1,209 @@
+"""订阅生命周期 - 一次向量化遍历得到每笔订单的续费序号/间隔，以及每个订阅的流失和试用转化"""
+
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .order_enrichment import TRIAL_PATTERN
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_KEY = ['brand', 'subscribe_id']
+USER_KEY = ['brand', 'uid']
+
+SECONDS_PER_DAY = 86400
+
+
+def _sorted_groups(df: pd.DataFrame, key: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按 key 分组、组内按 pay_time（相同时按 order_int_id）排序
+
+    Returns:
+        (排序位置, 排序后的组编号, 每组起始位置)；key 含缺失值或空串的行不参与（不在排序位置中）
+    """
+    codes = df.groupby(list(key), sort=False, observed=True, dropna=True).ngroup()
+    codes = codes.fillna(-1).to_numpy(dtype='int64', copy=True)  # key 有缺失值时 ngroup 为 NaN
+    for col in key:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            codes[(df[col] == '').to_numpy(dtype=bool, na_value=False)] = -1
+
+    # 组编号与相对支付时间拼成一个int64键做稳定排序（比多键lexsort快），同一时间保持 order_int_id 顺序
+    rows = np.flatnonzero(codes >= 0)
+    if 'order_int_id' in df.columns and not df['order_int_id'].is_monotonic_increasing:
+        rows = rows[np.argsort(df['order_int_id'].to_numpy()[rows], kind='stable')]
+    times = df['pay_time'].to_numpy()[rows].astype('int64')
+    composite = (codes[rows] << 32) | (times - times.min() if len(rows) else times)
+    order = rows[np.argsort(composite, kind='stable')]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) else np.empty(0, int)
+    return order, sorted_codes, starts
+
+
+def _trial_mask(df: pd.DataFrame) -> np.ndarray:
+    if 'is_trial' in df.columns:
+        return df['is_trial'].to_numpy(dtype=bool)
+    return df['description'].astype('string').str.contains(TRIAL_PATTERN, na=False).to_numpy(dtype=bool)
+
+
+def _first_pay_lookup(df: pd.DataFrame, rows: np.ndarray, key: Sequence[str],
+                      first_pay: Optional[pd.DataFrame]) -> np.ndarray:
+    """指定行所属订阅的全局首次付费时间（来自 subscribe_first_pay，含2025年前历史），无记录为inf"""
+    if first_pay is None:
+        return np.full(len(rows), np.inf)
+    lookup = first_pay.set_index(list(key))['first_pay_time']
+    index = pd.MultiIndex.from_frame(df[list(key)].iloc[rows].astype(object))
+    values = lookup.reindex(index).to_numpy(dtype='float64')
+    return np.where(np.isnan(values), np.inf, values)
+
+
+def _sequences(df: pd.DataFrame, key: Sequence[str], first_pay: Optional[pd.DataFrame]) -> Dict[str, np.ndarray]:
+    """排序一次，得到按组排列的时间/付费标记和每组的首末付费时间"""
+    order, codes, starts = _sorted_groups(df, key)
+    times = df['pay_time'].to_numpy(dtype='float64')[order]
+    # 付费订单 = 非试用订单（与 notebooks 中 order_type == 'Paid' / ~is_trial 一致），不看金额
+    trial = _trial_mask(df)[order]
+    paid = ~trial
+    if len(order):
+        first_paid = np.minimum.reduceat(np.where(paid, times, np.inf), starts)
+        last_paid = np.maximum.reduceat(np.where(paid, times, -np.inf), starts)
+    else:
+        first_paid = last_paid = np.empty(0)
+    history = _first_pay_lookup(df, order[starts], key, first_pay)
+    return {
+        'order': order, 'codes': codes, 'starts': starts,
+        'sizes': np.diff(np.r_[starts, len(order)]).astype('int64'),
+        'times': times, 'paid': paid, 'trial': trial, 'first_paid': first_paid, 'last_paid': last_paid,
+        # 本地首笔付费之前已付费过（有2025年前历史）
+        'prior': history < first_paid,
+    }
+
+
+def _order_frame(df: pd.DataFrame, seq: Dict[str, np.ndarray]) -> pd.DataFrame:
+    order, codes, starts, sizes = seq['order'], seq['codes'], seq['starts'], seq['sizes']
+    paid, times = seq['paid'], seq['times']
+
+    # 组内付费序号：全局累计 - 组起点前的累计；有付费历史的订阅整体 +1
+    cumulative = np.cumsum(paid)
+    before_group = (cumulative - paid)[starts]
+    rank = cumulative - np.repeat(before_group - seq['prior'], sizes) - 1
+
+    # 同一订阅内相邻两笔付费订单的间隔
+    paid_positions = np.flatnonzero(paid)
+    paid_times = times[paid_positions]
+    paid_codes = codes[paid_positions]
+    gap = np.full(len(paid_positions), np.nan)
+    same = paid_codes[1:] == paid_codes[:-1]
+    gap[1:][same] = (paid_times[1:][same] - paid_times[:-1][same]) / SECONDS_PER_DAY
+
+    renewal_index = np.full(len(df), -1, dtype='int64')
+    renewal_index[order[paid_positions]] = rank[paid_positions]
+    gap_days = np.full(len(df), np.nan)
+    gap_days[order[paid_positions]] = gap
+
+    result = pd.DataFrame(index=df.index)
+    result['renewal_index'] = pd.arrays.IntegerArray(np.maximum(renewal_index, 0), renewal_index < 0)
+    result['is_renewal'] = renewal_index > 0
+    result['gap_days'] = gap_days
+    return result
+
+
+def _summary_frame(df: pd.DataFrame, key: Sequence[str], seq: Dict[str, np.ndarray]) -> pd.DataFrame:
+    order, starts, times = seq['order'], seq['starts'], seq['times']
+    first_paid, last_paid = seq['first_paid'], seq['last_paid']
+    result = df[list(key)].iloc[order[starts]].reset_index(drop=True)
+    if not len(order):
+        return result
+
+    trial = seq['trial']
+    first_trial = np.minimum.reduceat(np.where(trial, times, np.inf), starts)
+    paid_orders = np.add.reduceat(seq['paid'].astype('int64'), starts)
+    converted = np.isfinite(first_trial) & np.isfinite(first_paid) & (first_paid > first_trial)
+
+    def to_datetime(values):
+        return pd.to_datetime(np.where(np.isfinite(values), values, np.nan), unit='s')
+
+    result['first_order_time'] = to_datetime(times[starts])
+    result['first_paid_time'] = to_datetime(first_paid)
+    result['last_paid_time'] = to_datetime(last_paid)
+    result['paid_orders'] = paid_orders
+    result['renewals'] = np.maximum(paid_orders - 1 + seq['prior'], 0)
+    result['trial_orders'] = np.add.reduceat(trial.astype('int64'), starts)
+    result['converted'] = converted
+    with np.errstate(invalid='ignore'):
+        result['days_to_convert'] = np.where(converted, (first_paid - first_trial) / SECONDS_PER_DAY, np.nan)
+        result['tenure_days'] = np.where(paid_orders > 0, (last_paid - first_paid) / SECONDS_PER_DAY, np.nan)
+
+    if 'sub_cancel_time' in df.columns:
+        cancel = df['sub_cancel_time'].to_numpy(dtype='float64')[order]
+        cancel = np.maximum.reduceat(np.where(cancel > 0, cancel, -np.inf), starts)
+        result['churn_date'] = to_datetime(cancel)
+        result['churned'] = np.isfinite(cancel)
+    return result
+
+
+def order_lifecycle(
+    df: pd.DataFrame,
+    key: Sequence[str] = SUBSCRIPTION_KEY,
+    first_pay: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    为每笔订单计算在所属订阅中的位置
+
+    付费订单（非试用订单，即 is_trial 为 False）按支付时间排序后依次编号；若该订阅在本地数据之前已经付过费
+    （first_pay 中的首次付费时间早于本地第一笔付费订单），本地第一笔即为续费。
+
+    Args:
+        df: 订单（需含 key 列、pay_time，以及 is_trial 或 description；order_int_id 用于同一时间的排序）
+        key: 订阅键，默认 (brand, subscribe_id)
+        first_pay: subscribe_first_pay 表（key + first_pay_time），为None时只按本地订单判定
+
+    Returns:
+        与 df 同索引的DataFrame，含
+        renewal_index: 付费订单的期数，0 为首期，>=1 为第几次续费（有历史时为下界）；非付费或无订阅为缺失
+        is_renewal: 是否续费订单
+        gap_days: 距同一订阅上一笔付费订单的天数，首笔为缺失
+    """
+    return _order_frame(df, _sequences(df, key, first_pay))
+
+
+def subscription_lifecycle(
+    df: pd.DataFrame,
+    key: Sequence[str] = SUBSCRIPTION_KEY,
+    first_pay: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    每个订阅（或用户，key=USER_KEY）一行的生命周期汇总
+
+    Args:
+        df: 订单，需含 key 列、pay_time，以及 is_trial 或 description；
+            含 sub_cancel_time 时（如 orders_enriched）给出流失时间
+        key: 汇总键，默认 (brand, subscribe_id)；按用户统计试用转化时用 (brand, uid)
+        first_pay: subscribe_first_pay 表，用于识别2025年前已首付的订阅
+
+    Returns:
+        key + first_order_time / first_paid_time / last_paid_time（datetime）、paid_orders、
+        renewals、trial_orders、converted（试用后有付费）、days_to_convert、tenure_days、
+        churn_date（sub_cancel_time>0 时的取消时间）、churned
+    """
+    result = _summary_frame(df, key, _sequences(df, key, first_pay))
+    logger.info(f"订阅生命周期: {len(df):,} 笔订单 -> {len(result):,} 个{'/'.join(key)}")
+    return result
+
+
+def lifecycle(
+    df: pd.DataFrame,
+    key: Sequence[str] = SUBSCRIPTION_KEY,
+    first_pay: Optional[pd.DataFrame] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    只排序一次，同时返回 order_lifecycle 和 subscription_lifecycle 的结果
+
+    Returns:
+        (每笔订单的续费序号/间隔, 每个订阅的汇总)
+    """
+    seq = _sequences(df, key, first_pay)
+    orders, subscriptions = _order_frame(df, seq), _summary_frame(df, key, seq)
+    logger.info(f"订阅生命周期: {len(df):,} 笔订单 -> {len(subscriptions):,} 个{'/'.join(key)}")
+    return orders, subscriptions
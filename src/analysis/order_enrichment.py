@@ -0,0 +1,175 @@
+"""订单宽表 - 合并订阅/套餐/金额信息并派生分析字段，同步后物化为 orders_enriched"""
+
+import logging
+import sqlite3
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ..db.parquet_store import ParquetStore
+from ..db.sqlite_loader import ORDER_DB_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+ENRICHED_TABLE = 'orders_enriched'
+
+# 试用订单: description 包含 Trial / Promotion / Free（不区分大小写）
+TRIAL_KEYWORDS = ('trial', 'promotion', 'free')
+TRIAL_PATTERN = r'(?i)' + '|'.join(TRIAL_KEYWORDS)
+# 同一规则的SQL写法（MySQL/SQLite通用）：付费订单 = 非试用订单，description 为空视为付费
+PAID_ORDER_SQL = ' AND '.join(f"LOWER(COALESCE(description, '')) NOT LIKE '%{k}%'" for k in TRIAL_KEYWORDS)
+
+# 低基数文本列，物化时转为 category
+CATEGORY_COLUMNS = [
+    'brand', 'product_id', 'description', 'currency', 'cycles_unit', 'meal_name',
+    'meal_time_unit', 'order_type', 'sub_period', 'pay_month',
+]
+
+# 在SQLite中完成三张维表的 LEFT JOIN（均按各自主键关联，不会放大行数）
+JOIN_SQL = """
+    SELECT {order_columns},
+           s.cycles_unit, s.cycles_time, s.sub_status, s.sub_create_time,
+           s.sub_cancel_time, s.support_dev_num,
+           m.name AS meal_name, m.time_unit AS meal_time_unit, m.time AS meal_time,
+           a.amount_cny, a.transaction_fee_cny, a.exchange_rate
+    FROM orders o
+    LEFT JOIN subscribe s ON s.brand = o.brand AND s.subscribe_id = o.subscribe_id
+    LEFT JOIN set_meal m ON m.brand = o.brand AND m.code = o.product_id
+    LEFT JOIN order_amount_info a ON a.brand = o.brand AND a.order_int_id = o.order_int_id
+"""
+
+
+def sub_period(unit: pd.Series, time: pd.Series) -> np.ndarray:
+    """
+    订阅周期类型
+
+    Args:
+        unit: 周期单位（DAY/WEEK/MONTH/YEAR，大小写不敏感，缺失为空串）
+        time: 周期长度（缺失为0）
+
+    Returns:
+        'Monthly' / 'Annual' / '7-Day Trial' / '3-Month' 等标签数组
+    """
+    unit = unit.fillna('').astype(str).str.upper()
+    time = time.fillna(0).astype(int)
+    label = time.astype(str)
+
+    conditions = [
+        (unit == '') | (time == 0),
+        (unit == 'DAY') & (time <= 30),
+        (unit == 'DAY') & (time > 30),
+        (unit == 'MONTH') & (time == 1),
+        (unit == 'MONTH') & (time == 12),
+        (unit == 'MONTH') & ~time.isin([1, 12]),
+        (unit == 'YEAR') & (time == 1),
+        (unit == 'YEAR') & (time != 1),
+        (unit == 'WEEK'),
+    ]
+    choices = [
+        'Unknown',
+        label + '-Day Trial',
+        label + '-Day',
+        'Monthly',
+        'Annual',
+        label + '-Month',
+        'Annual',
+        label + '-Year',
+        label + '-Week',
+    ]
+    return np.select(conditions, choices, default='Unknown')
+
+
+def enrich_orders(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    为已合并维表的订单派生分析字段（与 03_order_analysis.ipynb 的预处理一致）
+
+    Args:
+        df: orders 合并 subscribe / set_meal / order_amount_info 后的数据
+
+    Returns:
+        增加 order_date, order_month, order_week, pay_month, is_trial, order_type,
+        sub_period, net_revenue_cny 列的新DataFrame，文本维度列为 category
+    """
+    df = df.copy()
+    df['order_date'] = pd.to_datetime(df['pay_time'], unit='s')
+    df['order_month'] = df['order_date'].dt.to_period('M')
+    df['order_week'] = df['order_date'].dt.to_period('W')
+    df['pay_month'] = df['order_date'].dt.strftime('%Y-%m')
+
+    df['is_trial'] = df['description'].astype('string').str.contains(TRIAL_PATTERN, na=False).astype(bool)
+    df['order_type'] = np.where(df['is_trial'], 'Trial/Free', 'Paid')
+
+    # 优先用套餐的周期，缺失时用订阅的周期
+    df['sub_period'] = sub_period(
+        df['meal_time_unit'].fillna(df['cycles_unit']),
+        df['meal_time'].fillna(df['cycles_time']),
+    )
+    df['net_revenue_cny'] = df['amount_cny'].fillna(0) - df['transaction_fee_cny'].fillna(0)
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def enrich_cloud(df_cloud: pd.DataFrame) -> pd.DataFrame:
+    """cloud_info 增加 cloud_start_date / cloud_end_date / cloud_duration_days"""
+    df_cloud = df_cloud.copy()
+    df_cloud['cloud_start_date'] = pd.to_datetime(df_cloud['cloud_start_time'], unit='s', errors='coerce')
+    df_cloud['cloud_end_date'] = pd.to_datetime(df_cloud['cloud_end_time'], unit='s', errors='coerce')
+    df_cloud['cloud_duration_days'] = (df_cloud['cloud_end_date'] - df_cloud['cloud_start_date']).dt.days
+    return df_cloud
+
+
+def load_joined_orders(sqlite_conn: sqlite3.Connection, since_ts: Optional[int] = None) -> pd.DataFrame:
+    """
+    从 order_data.db 读取已合并维表的订单
+
+    Args:
+        sqlite_conn: SQLite连接
+        since_ts: 只读取该时间所在月份及之后支付的订单
+
+    Returns:
+        合并后的DataFrame（未派生字段）
+    """
+    order_columns = ', '.join(f'o."{c}"' for c in ORDER_DB_SCHEMA['orders']['columns'])
+    sql = JOIN_SQL.format(order_columns=order_columns)
+    params = ()
+    if since_ts is not None:
+        sql += " WHERE o.pay_time >= CAST(strftime('%s', ?, 'unixepoch', 'start of month') AS INTEGER)"
+        params = (since_ts,)
+    return pd.read_sql(sql, sqlite_conn, params=params)
+
+
+def build_orders_enriched(sqlite_conn: sqlite3.Connection, store: ParquetStore,
+                          since_ts: Optional[int] = None) -> int:
+    """
+    物化 orders_enriched 到Parquet数据集（按 brand / pay_month 分区）
+
+    Args:
+        sqlite_conn: SQLite连接
+        store: 目标 ParquetStore
+        since_ts: 增量时只重建该时间所在月份及之后的分区，为None时全量重建
+
+    Returns:
+        写入行数
+    """
+    df = enrich_orders(load_joined_orders(sqlite_conn, since_ts))
+    return store.write(ENRICHED_TABLE, df, since_ts=since_ts)
+
+
+def load_orders_enriched(store: ParquetStore, columns=None, brands=None, months=None) -> pd.DataFrame:
+    """
+    读取 orders_enriched，只扫描需要的列和分区
+
+    Args:
+        store: ParquetStore
+        columns: 需要的列，默认全部
+        brands: 品牌（'OSAIO' / 'Nooie'）
+        months: 支付月份（'YYYY-MM'）
+
+    Returns:
+        订单宽表DataFrame
+    """
+    return store.read(ENRICHED_TABLE, columns=columns, brands=brands, months=months)
@@ -0,0 +1,371 @@
+"""惰性查询 - 记录过滤/投影/关联/分组聚合，collect() 时编译为一条SQL（或Parquet下推读取）执行"""
+
+import contextlib
+import copy
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from ..db.parquet_store import ParquetStore
+from .file_formats import apply_filters, normalize_filters
+
+logger = logging.getLogger(__name__)
+
+# 聚合函数: pandas 名称 -> SQL 模板（size 不需要列）
+AGGREGATES = {
+    'sum': 'SUM({})',
+    'mean': 'AVG({})',
+    'min': 'MIN({})',
+    'max': 'MAX({})',
+    'count': 'COUNT({})',
+    'nunique': 'COUNT(DISTINCT {})',
+    'size': 'COUNT(*)',
+}
+
+# 派生列: 由秒级时间戳计算日期维度，SQL 与 pandas 两种实现结果一致
+DERIVED = {
+    'date': ("strftime('%Y-%m-%d', {}, 'unixepoch')", '%Y-%m-%d'),
+    'month': ("strftime('%Y-%m', {}, 'unixepoch')", '%Y-%m'),
+    'year': ("strftime('%Y', {}, 'unixepoch')", '%Y'),
+}
+
+_COMPARISONS = {'==': '=', '=': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class LazyQuery:
+    """
+    order_data.db 或 ParquetStore 上的一张表的惰性查询
+
+    每个方法返回新的查询对象，不修改原对象，因此可以复用公共前缀：
+
+        orders = scan('data/order_data.db', 'orders').filter(('pay_time', '>=', ts))
+        for brand in ['OSAIO', 'Nooie']:
+            monthly = (orders.filter(('brand', '==', brand))
+                       .derive('month', 'month', 'pay_time')
+                       .group_by('month')
+                       .agg(orders=('order_int_id', 'count'), revenue=('amount', 'sum'))
+                       .collect())
+
+    SQLite 上编译为一条 SELECT（过滤条件使用参数，可命中 brand / pay_time 索引，
+    只返回聚合后的行）；Parquet 上把基表的列和过滤条件下推到读取，其余在pandas中完成。
+    """
+
+    def __init__(self, source: Union[str, sqlite3.Connection, ParquetStore], table: str):
+        """
+        Args:
+            source: SQLite连接、.db 文件路径（每次执行时打开连接，执行后关闭）或 ParquetStore
+            table: 表名
+        """
+        self.source = source
+        self.table = table
+        self._joins: List[Dict[str, Any]] = []
+        self._derived: Dict[str, Tuple[str, str]] = {}
+        self._where: List[List[List[tuple]]] = []
+        self._columns: Optional[List[str]] = None
+        self._groups: List[str] = []
+        self._aggs: Dict[str, Tuple[Optional[str], str]] = {}
+        self._having: List[List[List[tuple]]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """SQLite连接；source 为文件路径时为本次执行打开，结束后关闭"""
+        if isinstance(self.source, str):
+            conn = sqlite3.connect(self.source)
+            try:
+                yield conn
+            finally:
+                conn.close()
+        else:
+            yield self.source
+
+    def _replace(self, **changes) -> 'LazyQuery':
+        query = copy.copy(self)
+        for name, value in changes.items():
+            setattr(query, name, value)
+        return query
+
+    # ---- 构建 ----
+
+    def filter(self, *conditions) -> 'LazyQuery':
+        """
+        增加过滤条件（与已有条件为AND）；聚合之后调用时作用于聚合结果（HAVING）
+
+        Args:
+            *conditions: (列, 运算符, 值) 元组，组内为AND；或传入一个DNF列表 [[...], [...]] 表示OR
+        """
+        if len(conditions) == 1 and isinstance(conditions[0], list):
+            spec = normalize_filters(conditions[0])
+        else:
+            spec = normalize_filters(list(conditions))
+        if self._aggs:
+            return self._replace(_having=self._having + [spec])
+        return self._replace(_where=self._where + [spec])
+
+    def select(self, *columns: str) -> 'LazyQuery':
+        """只返回这些列"""
+        return self._replace(_columns=list(columns))
+
+    def derive(self, name: str, func: str, column: str) -> 'LazyQuery':
+        """
+        增加派生列
+
+        Args:
+            name: 新列名
+            func: 'date' / 'month' / 'year'
+            column: 秒级时间戳列
+        """
+        if func not in DERIVED:
+            raise ValueError(f"不支持的派生函数: {func}")
+        return self._replace(_derived={**self._derived, name: (func, column)})
+
+    def join(self, table: str, on: Union[str, Sequence[str], Dict[str, str]],
+             columns: Union[Sequence[str], Dict[str, str]], how: str = 'left') -> 'LazyQuery':
+        """
+        关联另一张表（应按对方主键关联，否则会放大行数）
+
+        Args:
+            table: 关联表名
+            on: 关联键；同名列用列名或列表，不同名用 {本表列: 关联表列}
+            columns: 取回的关联表列；用 {关联表列: 新列名} 避免与本表重名
+            how: 'left' 或 'inner'
+        """
+        if how not in ('left', 'inner'):
+            raise ValueError(f"不支持的关联方式: {how}")
+        if isinstance(on, str):
+            on = [on]
+        keys = dict(on) if isinstance(on, dict) else {col: col for col in on}
+        columns = dict(columns) if isinstance(columns, dict) else {col: col for col in columns}
+        join = {'table': table, 'on': keys, 'columns': columns, 'how': how}
+        return self._replace(_joins=self._joins + [join])
+
+    def group_by(self, *columns: str) -> 'LazyQuery':
+        return self._replace(_groups=list(columns))
+
+    def agg(self, **aggregates: Tuple[Optional[str], str]) -> 'LazyQuery':
+        """
+        分组聚合，写法同 pandas 命名聚合: agg(revenue=('amount', 'sum'), orders=(None, 'size'))
+
+        支持 sum / mean / min / max / count / nunique / size
+        """
+        for name, (column, func) in aggregates.items():
+            if func not in AGGREGATES:
+                raise ValueError(f"不支持的聚合函数: {name}={func}")
+        return self._replace(_aggs={**self._aggs, **aggregates})
+
+    def order_by(self, *columns: str) -> 'LazyQuery':
+        """排序，列名前加 '-' 表示降序"""
+        return self._replace(_order=[(c.lstrip('-'), not c.startswith('-')) for c in columns])
+
+    def limit(self, n: int) -> 'LazyQuery':
+        return self._replace(_limit=int(n))
+
+    # ---- 列解析 ----
+
+    def _joined_columns(self) -> Dict[str, Tuple[int, str]]:
+        """关联取回的列名 -> (关联序号, 关联表中的列)"""
+        return {alias: (i, col) for i, join in enumerate(self._joins, 1) for col, alias in join['columns'].items()}
+
+    def _referenced(self) -> List[str]:
+        names = list(self._columns or []) + list(self._groups)
+        names += [col for col, _ in self._aggs.values() if col is not None]
+        names += [col for spec in self._where for group in spec for col, _, _ in group]
+        names += [col for _, col in self._derived.values()]
+        names += [col for join in self._joins for col in join['on']]
+        return list(dict.fromkeys(names))
+
+    def _base_columns(self) -> Optional[List[str]]:
+        """需要从基表读取的列；None 表示全部"""
+        if self._columns is None and not self._aggs:
+            return None
+        joined = self._joined_columns()
+        return [c for c in self._referenced() if c not in joined and c not in self._derived]
+
+    # ---- SQL ----
+
+    def _expr(self, name: str) -> str:
+        if name in self._derived:
+            func, column = self._derived[name]
+            return DERIVED[func][0].format(self._expr(column))
+        joined = self._joined_columns()
+        if name in joined:
+            i, col = joined[name]
+            return f't{i}.{_quote(col)}'
+        return f't0.{_quote(name)}'
+
+    def _condition_sql(self, spec: List[List[tuple]], expr, params: list) -> str:
+        groups = []
+        for group in spec:
+            parts = []
+            for col, op, value in group:
+                target = expr(col)
+                if op in _COMPARISONS:
+                    if value is None:
+                        parts.append(f'{target} IS {"NOT " if op == "!=" else ""}NULL')
+                        continue
+                    parts.append(f'{target} {_COMPARISONS[op]} ?')
+                    params.append(value)
+                elif op in ('in', 'not in'):
+                    values = list(value)
+                    if not values:
+                        parts.append('0' if op == 'in' else '1')
+                        continue
+                    parts.append(f'{target} {op.upper()} ({", ".join("?" * len(values))})')
+                    params.extend(values)
+                else:
+                    raise ValueError(f"不支持的过滤运算符: {op}")
+            groups.append('(' + ' AND '.join(parts) + ')')
+        return '(' + ' OR '.join(groups) + ')'
+
+    def _agg_sql(self, name: str) -> str:
+        column, func = self._aggs[name]
+        return AGGREGATES[func].format(self._expr(column) if column is not None else '*')
+
+    def to_sql(self) -> Tuple[str, list]:
+        """
+        编译为SQL
+
+        Returns:
+            (SQL语句, 参数列表)
+        """
+        params: list = []
+        if self._aggs:
+            select = [f'{self._expr(g)} AS {_quote(g)}' for g in self._groups]
+            select += [f'{self._agg_sql(name)} AS {_quote(name)}' for name in self._aggs]
+        elif self._columns is not None:
+            select = [f'{self._expr(c)} AS {_quote(c)}' for c in self._columns]
+        else:
+            select = ['t0.*'] + [f'{self._expr(c)} AS {_quote(c)}'
+                                 for c in list(self._joined_columns()) + list(self._derived)]
+
+        sql = f'SELECT {", ".join(select)}\nFROM {_quote(self.table)} AS t0'
+        for i, join in enumerate(self._joins, 1):
+            on = ' AND '.join(f't0.{_quote(left)} = t{i}.{_quote(right)}' for left, right in join['on'].items())
+            sql += f'\n{join["how"].upper()} JOIN {_quote(join["table"])} AS t{i} ON {on}'
+        if self._where:
+            sql += '\nWHERE ' + ' AND '.join(self._condition_sql(spec, self._expr, params) for spec in self._where)
+        if self._aggs and self._groups:
+            sql += '\nGROUP BY ' + ', '.join(self._expr(g) for g in self._groups)
+        if self._having:
+            def having_expr(name):
+                return self._agg_sql(name) if name in self._aggs else self._expr(name)
+
+            sql += '\nHAVING ' + ' AND '.join(self._condition_sql(spec, having_expr, params) for spec in self._having)
+        if self._order:
+            sql += '\nORDER BY ' + ', '.join(f'{_quote(c)} {"ASC" if asc else "DESC"}' for c, asc in self._order)
+        if self._limit is not None:
+            sql += '\nLIMIT ?'
+            params.append(self._limit)
+        return sql, params
+
+    def explain(self) -> List[str]:
+        """SQLite 查询计划（用于确认是否命中索引）"""
+        sql, params = self.to_sql()
+        with self._connect() as conn:
+            return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+
+    # ---- 执行 ----
+
+    def collect(self) -> pd.DataFrame:
+        """执行查询，返回DataFrame"""
+        if self._groups and not self._aggs:
+            raise ValueError("group_by 需要配合 agg 使用")
+        if isinstance(self.source, ParquetStore):
+            df = self._collect_parquet()
+        else:
+            sql, params = self.to_sql()
+            with self._connect() as conn:
+                df = pd.read_sql(sql, conn, params=params)
+        logger.info(f"查询 {self.table}: {len(df):,} 行")
+        return df
+
+    def _read_parquet(self, table: str, columns: Optional[List[str]], specs) -> pd.DataFrame:
+        condition = None
+        for spec in specs:
+            expression = pq.filters_to_expression(spec)
+            condition = expression if condition is None else condition & expression
+        return pq.read_table(self.source.table_path(table), columns=columns, filters=condition,
+                             partitioning='hive', memory_map=True).to_pandas()
+
+    def _collect_parquet(self) -> pd.DataFrame:
+        joined = self._joined_columns()
+
+        def base_only(spec):
+            return all(col not in joined and col not in self._derived for group in spec for col, _, _ in group)
+
+        pushed = [spec for spec in self._where if base_only(spec)]
+        remaining = [spec for spec in self._where if not base_only(spec)]
+
+        df = self._read_parquet(self.table, self._base_columns(), pushed)
+        for join in self._joins:
+            right = self._read_parquet(join['table'], list(dict.fromkeys([*join['on'].values(), *join['columns']])), [])
+            keys = {right_key: f'__key_{left_key}' for left_key, right_key in join['on'].items()}
+            right = right.rename(columns={**keys, **join['columns']})
+            for left in join['on']:
+                key = f'__key_{left}'
+                # 分区列读出为 category，统一为对象类型后再关联
+                if isinstance(right[key].dtype, pd.CategoricalDtype):
+                    right[key] = right[key].astype(object)
+                if isinstance(df[left].dtype, pd.CategoricalDtype):
+                    df[left] = df[left].astype(object)
+            df = df.merge(right, how=join['how'], left_on=list(join['on']),
+                          right_on=list(keys.values()))
+            df = df.drop(columns=list(keys.values()))
+        for name, (func, column) in self._derived.items():
+            df[name] = pd.to_datetime(df[column], unit='s').dt.strftime(DERIVED[func][1])
+        for spec in remaining:
+            df = apply_filters(df, spec)
+
+        if self._aggs:
+            df = self._aggregate(df)
+            for spec in self._having:
+                df = apply_filters(df, spec)
+        elif self._columns is not None:
+            df = df[self._columns]
+
+        if self._order:
+            df = df.sort_values([c for c, _ in self._order], ascending=[a for _, a in self._order])
+        if self._limit is not None:
+            df = df.head(self._limit)
+        return df.reset_index(drop=True)
+
+    def _aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self._groups:
+            return pd.DataFrame({
+                name: [len(df) if func == 'size' else df[column].agg(func)]
+                for name, (column, func) in self._aggs.items()
+            })
+        any_column = self._groups[0]
+        named = {name: (column if column is not None else any_column, func)
+                 for name, (column, func) in self._aggs.items()}
+        result = df.groupby(self._groups, observed=True, dropna=False, sort=False).agg(**named)
+        result = result.reset_index()
+        for col in self._groups:
+            if isinstance(result[col].dtype, pd.CategoricalDtype):
+                result[col] = result[col].astype(object)
+        return result
+
+
+def scan(source: Union[str, sqlite3.Connection, ParquetStore], table: str) -> LazyQuery:
+    """
+    创建惰性查询
+
+    Args:
+        source: SQLite连接、ParquetStore、.db 文件路径（每次执行时打开连接，执行后关闭）或Parquet数据集根目录
+        table: 表名
+
+    Returns:
+        LazyQuery
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        source = ParquetStore(source)
+    return LazyQuery(source, table)
@@ -0,0 +1,128 @@
+"""分析结果缓存 - 按数据指纹和参数寻址，结果持久化到磁盘，按容量和时间淘汰"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 统计结果格式变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+
+def fingerprint(*parts: Any) -> str:
+    """把若干可 repr 的部分组合成稳定的十六进制摘要"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def file_fingerprint(filepath: str, **read_options) -> str:
+    """文件指纹：绝对路径 + 修改时间 + 大小 + 读取参数，不读取内容"""
+    stat = os.stat(filepath)
+    return fingerprint('file', os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size,
+                       sorted(read_options.items()))
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """内容指纹：逐行哈希（向量化）+ 列名和类型，用于无法追溯来源的数据"""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return fingerprint('frame', list(df.columns), df.dtypes.astype(str).tolist(),
+                       hashlib.sha256(row_hashes.tobytes()).hexdigest())
+
+
+class ResultCache:
+    """磁盘结果缓存：每个key一个pickle文件，命中时刷新访问时间，写入时按时间和总大小淘汰"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024,
+                 max_age: Optional[float] = 7 * 86400):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限，超过时按最近访问时间淘汰
+            max_age: 缓存最长保留秒数，None 表示不过期
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期返回None"""
+        path = self._path(key)
+        try:
+            if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.stats['misses'] += 1
+            logger.info(f"分析缓存未命中: {key[:12]}")
+            return None
+
+        try:
+            os.utime(path)  # 记录最近访问时间，供按容量淘汰
+        except FileNotFoundError:
+            pass
+        self.stats['hits'] += 1
+        logger.info(f"分析缓存命中: {key[:12]}")
+        return value
+
+    def put(self, key: str, value: Any):
+        """写入缓存（先写临时文件再原子替换），然后执行淘汰"""
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.evict()
+
+    def evict(self):
+        """删除过期条目，并按最近访问时间从旧到新删除直到总大小不超过上限"""
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+                if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                    os.remove(path)
+                    self.stats['evictions'] += 1
+                    continue
+            except FileNotFoundError:  # 其他线程/进程已删除
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,208 @@
+"""时间序列汇总 - 在 order_data.db 中维护按天预聚合的订单/设备/用户表，按周/月上卷查询"""
+
+import logging
+import sqlite3
+from typing import Dict, Any, Optional, Sequence
+
+import pandas as pd
+
+from ..db.parquet_store import ParquetStore
+from ..db.sqlite_loader import BulkLoader
+from .order_enrichment import ENRICHED_TABLE
+
+logger = logging.getLogger(__name__)
+
+# 汇总定义：时间列（秒级时间戳）、维度列、可加的度量（只允许 size / count / sum，才能从天上卷到周/月）
+ROLLUPS: Dict[str, Dict[str, Any]] = {
+    'orders': {
+        'time_column': 'pay_time',
+        'dimensions': ['brand', 'order_type', 'sub_period', 'currency'],
+        'measures': {
+            'orders': (None, 'size'),
+            'amount': ('amount', 'sum'),
+            'amount_cny': ('amount_cny', 'sum'),
+            'net_revenue_cny': ('net_revenue_cny', 'sum'),
+        },
+    },
+    'devices': {
+        'time_column': 'create_time',
+        'dimensions': ['brand', 'model_code'],
+        'measures': {'devices': (None, 'size')},
+    },
+    'users': {
+        'time_column': 'register_time',
+        'dimensions': ['brand', 'country_iso'],
+        'measures': {'registrations': (None, 'size')},
+    },
+}
+
+# 维度缺失时的取值（主键列不能为NULL）
+MISSING_DIMENSION = 'Unknown'
+
+FREQUENCIES = ('D', 'W', 'M')
+
+
+def rollup_table(name: str) -> str:
+    return f'rollup_{name}_daily'
+
+
+def rollup_schema() -> Dict[str, Dict[str, Any]]:
+    """各汇总表的SQLite表结构（格式同 ORDER_DB_SCHEMA），主键为 brand + date + 其余维度"""
+    schema = {}
+    for name, spec in ROLLUPS.items():
+        columns = {'date': 'TEXT', **{dim: 'TEXT' for dim in spec['dimensions']}}
+        columns.update({m: 'REAL' if func == 'sum' else 'INTEGER' for m, (_, func) in spec['measures'].items()})
+        schema[rollup_table(name)] = {
+            'columns': columns,
+            'primary_key': ['brand', 'date'] + [d for d in spec['dimensions'] if d != 'brand'],
+            'without_rowid': True,
+        }
+    return schema
+
+
+def daily_rollup(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    把明细行聚合为按天汇总
+
+    Args:
+        df: 明细数据，需包含汇总定义中的时间列、维度列和度量列
+        name: 汇总名（ROLLUPS 的key）
+
+    Returns:
+        date（'YYYY-MM-DD'）+ 维度 + 度量 的DataFrame
+    """
+    spec = ROLLUPS[name]
+    keys = ['date'] + spec['dimensions']
+    frame = pd.DataFrame({'date': pd.to_datetime(df[spec['time_column']], unit='s').dt.normalize()})
+    for dim in spec['dimensions']:
+        frame[dim] = df[dim].astype(object).where(df[dim].notna(), MISSING_DIMENSION)
+    for measure, (column, _) in spec['measures'].items():
+        if column is not None:
+            frame[measure] = df[column].to_numpy()
+
+    named = {m: (m if column is not None else 'date', func) for m, (column, func) in spec['measures'].items()}
+    daily = frame.groupby(keys, sort=False).agg(**named).reset_index()
+    daily['date'] = daily['date'].dt.strftime('%Y-%m-%d')
+    return daily
+
+
+class RollupStore:
+    """SQLite 中的按天汇总表：增量重写某日之后的行，查询时按天/周/月上卷"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: 本地SQLite连接（data/order_data.db）
+        """
+        self.conn = conn
+        self.loader = BulkLoader(conn, schema=rollup_schema())
+
+    def update(self, name: str, df: pd.DataFrame, since_ts: Optional[int] = None) -> int:
+        """
+        用明细数据重建汇总
+
+        Args:
+            name: 汇总名
+            df: 明细数据；增量时应只包含 since_ts 所在日期及之后的行
+            since_ts: 只替换该时间所在日期及之后的汇总行，为None时替换全部
+
+        Returns:
+            写入的汇总行数
+        """
+        table = rollup_table(name)
+        daily = daily_rollup(df, name)
+        self.loader.ensure_table(table, daily)
+        if since_ts is None:
+            self.conn.execute(f'DELETE FROM "{table}"')
+        else:
+            since_date = pd.to_datetime(since_ts, unit='s').strftime('%Y-%m-%d')
+            self.conn.execute(f'DELETE FROM "{table}" WHERE date >= ?', (since_date,))
+        rows = self.loader.write(table, daily)
+        self.conn.commit()
+        logger.info(f"汇总 {table}: 明细 {len(df):,} 行 -> {rows:,} 行")
+        return rows
+
+    def query(
+        self,
+        name: str,
+        freq: str = 'M',
+        dimensions: Sequence[str] = ('brand',),
+        brands: Optional[Sequence[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        as_of: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        按天/周/月上卷汇总
+
+        Args:
+            name: 汇总名
+            freq: 'D' / 'W'（周一开始）/ 'M'
+            dimensions: 保留的维度，其余维度求和合并
+            brands: 只取这些品牌
+            start: 起始日期 'YYYY-MM-DD'（含）
+            end: 截止日期 'YYYY-MM-DD'（含）
+            as_of: 数据截止日期，用于计算不完整周期的天数；默认取 end，否则为汇总中最新的日期
+
+        Returns:
+            period（pandas Period）+ 维度 + 度量 + days（周期内已过天数，当前月按截止日计，
+            用于计算日均）的DataFrame，按 period 和维度排序
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"不支持的周期: {freq}")
+        spec = ROLLUPS[name]
+        measures = list(spec['measures'])
+        dimensions = list(dimensions)
+
+        sql = f'SELECT date, {", ".join(dimensions + measures)} FROM "{rollup_table(name)}"'
+        conditions, params = [], []
+        if brands:
+            conditions.append(f'brand IN ({", ".join("?" * len(brands))})')
+            params.extend(brands)
+        if start:
+            conditions.append('date >= ?')
+            params.append(start)
+        if end:
+            conditions.append('date <= ?')
+            params.append(end)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        daily = pd.read_sql(sql, self.conn, params=params)
+
+        daily['period'] = pd.to_datetime(daily['date']).dt.to_period(freq)
+        result = daily.groupby(['period'] + dimensions, sort=True)[measures].sum().reset_index()
+
+        as_of = pd.Timestamp(as_of or end or (daily['date'].max() if len(daily) else pd.Timestamp.now()))
+        first = pd.Timestamp(start) if start else None
+        periods = result['period']
+        period_start = periods.dt.start_time
+        period_end = periods.dt.end_time.dt.normalize()
+        if first is not None:
+            period_start = period_start.clip(lower=first)
+        result['days'] = ((period_end.clip(upper=as_of) - period_start).dt.days + 1).clip(lower=0)
+        return result[['period'] + dimensions + measures + ['days']]
+
+
+def build_order_rollup(store: ParquetStore, rollups: RollupStore, since_ts: Optional[int] = None) -> int:
+    """
+    由 orders_enriched 重建订单日汇总
+
+    Args:
+        store: 已物化 orders_enriched 的 ParquetStore
+        rollups: 汇总存储
+        since_ts: 增量时只重建该时间所在月份及之后（与 orders_enriched 的重建范围一致）
+
+    Returns:
+        写入的汇总行数
+    """
+    spec = ROLLUPS['orders']
+    columns = [spec['time_column']] + spec['dimensions']
+    columns += [column for column, _ in spec['measures'].values() if column is not None]
+    filters = None
+    month_start = None
+    if since_ts is not None:
+        month = pd.to_datetime(since_ts, unit='s').to_period('M')
+        month_start = int(month.start_time.timestamp())
+        filters = [('pay_month', '>=', str(month))]
+    df = store.read(ENRICHED_TABLE, columns=list(dict.fromkeys(columns)), filters=filters)
+    return rollups.update('orders', df, since_ts=month_start)
@@ -0,0 +1,262 @@
+"""统计引擎 - 在数值列组成的二维数组上一次性计算描述统计、分位数、异常值和相关系数"""
+
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.25, 0.5, 0.75)
+CATEGORICAL_DTYPES = ['object', 'string', 'category']
+DATETIME_DTYPES = ['datetime', 'datetimetz']
+
+
+def numeric_block(df: pd.DataFrame) -> Tuple[List[str], np.ndarray]:
+    """
+    取出数值列组成的 float64 二维数组（缺失值为NaN）
+
+    Returns:
+        (列名列表, 形状为 (行数, 列数) 的数组)
+    """
+    columns = list(df.select_dtypes(include=[np.number]).columns)
+    if not columns:
+        return [], np.empty((len(df), 0))
+    return columns, df[columns].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def column_quantiles(values: np.ndarray, qs=QUANTILES) -> np.ndarray:
+    """按列计算分位数（线性插值，与 pandas 一致），返回形状 (len(qs), 列数)"""
+    # 按列连续的布局（DataFrame.to_numpy 通常返回F序）下沿 axis=1 对转置做 partition，避免跨步访问
+    if not values.size:
+        return np.full((len(qs), values.shape[1]), np.nan)
+    columns = np.ascontiguousarray(values.T)
+    has_nan = np.isnan(columns).any(axis=1)
+    if not has_nan.any():
+        return np.quantile(columns, qs, axis=1)
+    result = np.empty((len(qs), values.shape[1]))
+    # 无缺失的列走 np.quantile，只有含缺失的列才用较慢的 nanquantile
+    if (~has_nan).any():
+        result[:, ~has_nan] = np.quantile(columns[~has_nan], qs, axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 全空列
+        result[:, has_nan] = np.nanquantile(columns[has_nan], qs, axis=1)
+    return result
+
+
+def moments_block(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """按列计算 count / mean / std / min / max（不含分位数，单次遍历级别的开销）"""
+    mask = ~np.isnan(values)
+    count = mask.sum(axis=0)
+    zeroed = np.where(mask, values, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = zeroed.sum(axis=0) / count
+        centered = np.where(mask, values - mean, 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=0) / (count - 1))
+    std[count < 2] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        minimum = np.nanmin(values, axis=0) if values.size else np.full(values.shape[1], np.nan)
+        maximum = np.nanmax(values, axis=0) if values.size else np.full(values.shape[1], np.nan)
+    return {'count': count.astype('float64'), 'mean': mean, 'std': std, 'min': minimum, 'max': maximum}
+
+
+def describe_block(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    按列计算 count / mean / std / min / 分位数 / max
+
+    Returns:
+        统计名 -> 每列取值数组，统计名与 DataFrame.describe() 的行索引一致
+    """
+    moments = moments_block(values)
+    q1, median, q3 = column_quantiles(values)
+    return {
+        'count': moments['count'], 'mean': moments['mean'], 'std': moments['std'], 'min': moments['min'],
+        '25%': q1, '50%': median, '75%': q3, 'max': moments['max'],
+    }
+
+
+def iqr_outlier_counts(values: np.ndarray, q1: np.ndarray, q3: np.ndarray, k: float = 1.5) -> np.ndarray:
+    """每列落在 [Q1 - k*IQR, Q3 + k*IQR] 之外的值个数"""
+    iqr = q3 - q1
+    with np.errstate(invalid='ignore'):
+        return ((values < q1 - k * iqr) | (values > q3 + k * iqr)).sum(axis=0)
+
+
+def correlation_matrix(values: np.ndarray) -> np.ndarray:
+    """
+    Pearson相关系数矩阵，缺失值按列对成对剔除（与 DataFrame.corr() 一致）
+
+    先按列均值中心化再做矩阵乘法，避免时间戳等大数值的精度损失。
+    """
+    mask = ~np.isnan(values)
+    if mask.all():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = np.corrcoef(values, rowvar=False).reshape(values.shape[1], values.shape[1])
+        if len(values) < 2:
+            corr[:] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        shift = np.nan_to_num(np.nanmean(values, axis=0))
+    return correlation_from_sums(*comoment_sums(values, shift))
+
+
+def comoment_sums(values: np.ndarray, shift: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    成对剔除缺失值的协矩和，可跨数据块累加
+
+    Args:
+        values: (行数, 列数) 数组
+        shift: 每列的平移量（通常取列均值），减小大数值相减时的精度损失
+
+    Returns:
+        (n, sum_x, sum_xx, sum_xy)，均为 (列数, 列数) 矩阵；
+        [i, j] 为在列 i、j 均非缺失的行上对列 i 的统计
+    """
+    mask = ~np.isnan(values)
+    centered = np.where(mask, values - shift, 0.0)
+    m = mask.astype('float64')
+    return m.T @ m, centered.T @ m, (centered ** 2).T @ m, centered.T @ centered
+
+
+def correlation_from_sums(n: np.ndarray, sum_x: np.ndarray, sum_xx: np.ndarray,
+                          sum_xy: np.ndarray) -> np.ndarray:
+    """由 comoment_sums 的（累加）结果计算Pearson相关系数矩阵"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[(n < 2) | (var_x <= 0) | (var_x.T <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def correlation_dict(columns: List[str], values: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """相关系数矩阵转为 DataFrame.corr().to_dict() 的嵌套字典格式"""
+    corr = correlation_matrix(values).tolist()
+    return {col: {row: corr[i][j] for i, row in enumerate(columns)} for j, col in enumerate(columns)}
+
+
+def parallel_map(fn: Callable, items: List, n_jobs: int = 1) -> List:
+    """
+    在线程池中按顺序映射；n_jobs <= 1 或只有一项时串行执行
+
+    分位数（np.partition）、value_counts 等按列计算在 NumPy/pandas 内部释放GIL，
+    线程直接共享同一个数值数组，不需要复制或序列化到子进程。
+    """
+    if n_jobs <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(n_jobs, len(items)), thread_name_prefix='stats') as pool:
+        return list(pool.map(fn, items))
+
+
+def column_slices(n_columns: int, n_jobs: int) -> List[slice]:
+    """把列均匀切成不超过 n_jobs 段连续切片（切片是视图，不复制数据）"""
+    bounds = np.linspace(0, n_columns, min(max(n_jobs, 1), n_columns) + 1).astype(int)
+    return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def describe_columns(values: np.ndarray, outlier_k: float = 1.5, n_jobs: int = 1) -> Dict[str, np.ndarray]:
+    """
+    按列分段并行计算 describe_block 与IQR异常值个数
+
+    Returns:
+        describe_block 的结果，另含 'outliers' 项
+    """
+    def run(columns: slice) -> Dict[str, np.ndarray]:
+        block = values[:, columns]
+        stats = describe_block(block)
+        stats['outliers'] = iqr_outlier_counts(block, stats['25%'], stats['75%'], outlier_k)
+        return stats
+
+    parts = parallel_map(run, column_slices(values.shape[1], n_jobs), n_jobs)
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def categorical_summary(df: pd.DataFrame, top_n: int = 5, n_jobs: int = 1) -> Dict[str, Dict[str, Any]]:
+    """分类列的唯一值数和Top值（每列一次 value_counts，可按列并行）"""
+    def run(col) -> Dict[str, Any]:
+        counts = df[col].value_counts()
+        return {
+            'unique_count': int((counts > 0).sum()),
+            'top_values': counts.head(top_n).to_dict(),
+        }
+
+    columns = list(df.select_dtypes(include=CATEGORICAL_DTYPES).columns)
+    return dict(zip(columns, parallel_map(run, columns, n_jobs)))
+
+
+def datetime_summary(df: pd.DataFrame, with_std: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    时间列的描述统计，与 DataFrame.describe() 对时间列的输出一致（count / mean / min / 分位数 / max）
+
+    Args:
+        df: 数据
+        with_std: 是否带值为NaN的 std（与数值列一起 describe() 时 pandas 会补上该行）
+    """
+    summary = {}
+    for col in df.select_dtypes(include=DATETIME_DTYPES).columns:
+        series = df[col]
+        quantiles = series.quantile(list(QUANTILES)).tolist()
+        stats = {'count': int(series.count()), 'mean': series.mean(), 'min': series.min(),
+                 '25%': quantiles[0], '50%': quantiles[1], '75%': quantiles[2], 'max': series.max()}
+        if with_std:
+            stats['std'] = np.nan
+        summary[col] = stats
+    return summary
+
+
+def _to_nested(names: List[str], stats: Dict[str, np.ndarray]) -> Dict[str, Dict[str, float]]:
+    lists = {stat: arr.tolist() for stat, arr in stats.items()}
+    return {col: {stat: lists[stat][i] for stat in stats} for i, col in enumerate(names)}
+
+
+def compute_statistics(df: pd.DataFrame, outlier_k: float = 1.5, top_n: int = 5,
+                       n_jobs: int = 1) -> Dict[str, Any]:
+    """
+    一次性计算 DataAnalyzer.analyze() 需要的全部统计量
+
+    数值列只转换一次为二维数组，描述统计、IQR异常值共用同一组分位数。
+
+    Args:
+        df: 数据
+        outlier_k: IQR异常值倍数
+        top_n: 分类列保留的Top值个数
+        n_jobs: 按列并行的线程数，结果与串行一致
+
+    Returns:
+        numeric_summary / categorical_summary / missing_values / data_types /
+        correlations / outliers，格式与原 basic_statistics() 等方法的输出一致
+    """
+    columns, values = numeric_block(df)
+
+    if columns:
+        stats = describe_columns(values, outlier_k, n_jobs)
+        outliers = {col: int(c) for col, c in zip(columns, stats.pop('outliers'))}
+        numeric_summary = _to_nested(columns, stats)
+        correlations = correlation_dict(columns, values)
+        # 与 describe() 一致，时间列也给出描述统计（按原列顺序排列）
+        dates = datetime_summary(df, with_std=True)
+        if dates:
+            numeric_summary.update(dates)
+            numeric_summary = {col: numeric_summary[col] for col in df.columns if col in numeric_summary}
+    else:
+        numeric_summary = df.describe().to_dict() if len(df.columns) else {}
+        outliers, correlations = {}, {}
+
+    # 数值列的缺失数已在数组上得到，其余列单独统计
+    missing = dict(zip(columns, (len(df) - stats['count']).astype(int).tolist())) if columns else {}
+    others = [c for c in df.columns if c not in missing]
+    if others:
+        missing.update(df[others].isna().sum().to_dict())
+
+    return {
+        'numeric_summary': numeric_summary,
+        'categorical_summary': categorical_summary(df, top_n, n_jobs),
+        'missing_values': {col: missing[col] for col in df.columns},
+        'data_types': df.dtypes.astype(str).to_dict(),
+        'correlations': correlations,
+        'outliers': outliers,
+    }
@@ -0,0 +1,282 @@
+"""流式统计 - 逐块合并可合并的部分聚合，内存占用只与块大小和草图容量有关"""
+
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .stats_engine import (
+    CATEGORICAL_DTYPES, QUANTILES, comoment_sums, correlation_from_sums,
+)
+
+
+class QuantileSketch:
+    """
+    可合并的分位数草图：加权质心按累计权重均匀压缩
+
+    样本数不超过 2 * capacity 时保存全部值，结果与精确计算一致；
+    压缩后分位数/秩的误差约为 总数 / capacity。
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = True
+        self._min = np.inf
+        self._max = -np.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self._min = min(self._min, values.min())
+        self._max = max(self._max, values.max())
+        self.values = np.concatenate([self.values, values])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        if len(self.values) > 2 * self.capacity:
+            self._compress()
+
+    def _compress(self):
+        order = np.argsort(self.values, kind='stable')
+        values, weights = self.values[order], self.weights[order]
+        cum = np.cumsum(weights)
+        bucket = np.minimum(((cum - weights / 2) / cum[-1] * self.capacity).astype(int), self.capacity - 1)
+        weight = np.bincount(bucket, weights, minlength=self.capacity)
+        total = np.bincount(bucket, weights * values, minlength=self.capacity)
+        keep = weight > 0
+        self.values, self.weights = total[keep] / weight[keep], weight[keep]
+        self.exact = False
+
+    def _anchored(self):
+        """按值排序的 (值, 累计权重中点) 序列，两端补上精确的最小/最大值"""
+        order = np.argsort(self.values, kind='stable')
+        values, weights = self.values[order], self.weights[order]
+        mids = np.cumsum(weights) - weights / 2
+        total = weights.sum()
+        return (np.concatenate([[self._min], values, [self._max]]),
+                np.concatenate([[0.0], mids, [total]]), total)
+
+    def quantile(self, qs=QUANTILES) -> np.ndarray:
+        if not len(self.values):
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            return np.quantile(self.values, qs)
+        values, ranks, total = self._anchored()
+        return np.interp(np.asarray(qs) * total, ranks, values)
+
+    def count_outside(self, lower: float, upper: float) -> int:
+        """估计小于 lower 或大于 upper 的值个数"""
+        if not len(self.values) or np.isnan(lower) or np.isnan(upper):
+            return 0
+        if self.exact:
+            values = np.sort(self.values)
+            below = np.searchsorted(values, lower, side='left')
+            above = len(values) - np.searchsorted(values, upper, side='right')
+            return int(below + above)
+        values, ranks, total = self._anchored()
+        below = np.interp(lower, values, ranks) if lower > values[0] else 0.0
+        above = total - np.interp(upper, values, ranks) if upper < values[-1] else 0.0
+        return int(round(below + above))
+
+
+class HeavyHitters:
+    """Misra-Gries 频繁项：最多保留 capacity 个候选；不同值不超过 capacity 时计数精确"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+
+    def update(self, counts: pd.Series):
+        counts = counts[counts > 0]
+        counts = pd.Series(counts.to_numpy(), index=counts.index.astype(object))
+        merged = self.counts.add(counts, fill_value=0)
+        if len(merged) > self.capacity:
+            threshold = merged.nlargest(self.capacity + 1).iloc[-1]
+            merged = merged[merged > threshold] - threshold
+        self.counts = merged.astype('int64')
+
+    def top(self, n: int = 5) -> pd.Series:
+        return self.counts.sort_values(ascending=False, kind='stable').head(n)
+
+
+class DistinctCounter:
+    """KMV 基数估计：保留最小的 k 个64位哈希；不同值少于 k 个时为精确计数"""
+
+    def __init__(self, k: int = 4096):
+        self.k = k
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, series: pd.Series):
+        series = series.dropna()
+        if series.empty:
+            return
+        hashes = pd.util.hash_pandas_object(series.astype(object), index=False).to_numpy()
+        self.hashes = np.unique(np.concatenate([self.hashes, hashes]))[:self.k]
+
+    def estimate(self) -> int:
+        if len(self.hashes) < self.k:
+            return len(self.hashes)
+        return int(round((self.k - 1) / (float(self.hashes[-1]) / 2.0 ** 64)))
+
+
+class StreamingStats:
+    """逐块累积统计量，result() 输出与 DataAnalyzer.analyze() 相同结构的结果"""
+
+    def __init__(self, quantile_capacity: int = 2048, top_capacity: int = 1000,
+                 distinct_k: int = 4096, top_n: int = 5, outlier_k: float = 1.5):
+        """
+        Args:
+            quantile_capacity: 每个数值列分位数草图的质心数
+            top_capacity: 每个分类列保留的频繁项候选数
+            distinct_k: 每个分类列唯一值估计保留的哈希数
+            top_n: 分类列输出的Top值个数
+            outlier_k: IQR异常值倍数
+        """
+        self.quantile_capacity = quantile_capacity
+        self.top_capacity = top_capacity
+        self.distinct_k = distinct_k
+        self.top_n = top_n
+        self.outlier_k = outlier_k
+
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+        self.chunks = 0
+        self.memory_usage = 0
+
+    def _init(self, chunk: pd.DataFrame):
+        self.columns = list(chunk.columns)
+        self.dtypes = chunk.dtypes.to_dict()
+        self.numeric = list(chunk.select_dtypes(include=[np.number]).columns)
+        self.categorical = list(chunk.select_dtypes(include=CATEGORICAL_DTYPES).columns)
+        self.missing = pd.Series(0, index=self.columns, dtype='int64')
+
+        k = len(self.numeric)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.shift = np.nan_to_num(np.nanmean(self._numeric_block(chunk), axis=0)) if k else np.zeros(0)
+        self.sums = [np.zeros((k, k)) for _ in range(4)]
+        self.minimum = np.full(k, np.inf)
+        self.maximum = np.full(k, -np.inf)
+        self.sketches = [QuantileSketch(self.quantile_capacity) for _ in self.numeric]
+        self.top = {col: HeavyHitters(self.top_capacity) for col in self.categorical}
+        self.distinct = {col: DistinctCounter(self.distinct_k) for col in self.categorical}
+
+    def _numeric_block(self, chunk: pd.DataFrame) -> np.ndarray:
+        block = chunk[self.numeric]
+        # 分块读CSV时同一列在不同块可能被推断为不同类型
+        if any(not pd.api.types.is_numeric_dtype(t) for t in block.dtypes):
+            block = block.apply(pd.to_numeric, errors='coerce')
+        return block.to_numpy(dtype='float64', na_value=np.nan)
+
+    def update(self, chunk: pd.DataFrame):
+        """合并一个数据块"""
+        if self.columns is None:
+            self._init(chunk)
+        self.rows += len(chunk)
+        self.chunks += 1
+        self.memory_usage += int(chunk.memory_usage(deep=True).sum())
+        self.missing += chunk.isna().sum().reindex(self.columns, fill_value=0).astype('int64')
+
+        if self.numeric and len(chunk):
+            values = self._numeric_block(chunk)
+            for total, part in zip(self.sums, comoment_sums(values, self.shift)):
+                total += part
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.minimum = np.fmin(self.minimum, np.nanmin(values, axis=0))
+                self.maximum = np.fmax(self.maximum, np.nanmax(values, axis=0))
+            for i, sketch in enumerate(self.sketches):
+                sketch.update(values[:, i])
+
+        for col in self.categorical:
+            self.top[col].update(chunk[col].value_counts())
+            self.distinct[col].update(chunk[col])
+
+    def _numeric_summary(self) -> Dict[str, Dict[str, float]]:
+        n, sum_x, sum_xx, _ = self.sums
+        count, s, ss = np.diag(n), np.diag(sum_x), np.diag(sum_xx)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.shift + s / count
+            std = np.sqrt((ss - s ** 2 / count) / (count - 1))
+        std[count < 2] = np.nan
+        empty = count == 0
+        minimum = np.where(empty, np.nan, self.minimum)
+        maximum = np.where(empty, np.nan, self.maximum)
+
+        summary = {}
+        for i, col in enumerate(self.numeric):
+            q1, median, q3 = self.sketches[i].quantile()
+            summary[col] = {
+                'count': float(count[i]), 'mean': float(mean[i]), 'std': float(std[i]),
+                'min': float(minimum[i]), '25%': float(q1), '50%': float(median),
+                '75%': float(q3), 'max': float(maximum[i]),
+            }
+        return summary
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns:
+            {'metadata', 'statistics', 'correlations', 'outliers'}，与 DataAnalyzer.analyze() 一致；
+            分位数、异常值个数、分类Top值和唯一值数在数据量超过草图容量时为近似值
+        """
+        if self.columns is None:
+            raise ValueError("没有可分析的数据块")
+
+        missing = {col: int(v) for col, v in self.missing.items()}
+        metadata = {
+            'shape': (self.rows, len(self.columns)),
+            'columns': self.columns,
+            'dtypes': self.dtypes,
+            'missing_values': missing,
+            'memory_usage': self.memory_usage,
+            'chunks': self.chunks,
+        }
+
+        categorical = {}
+        for col in self.categorical:
+            categorical[col] = {
+                'unique_count': self.distinct[col].estimate(),
+                'top_values': self.top[col].top(self.top_n).to_dict(),
+            }
+
+        if self.numeric:
+            numeric_summary = self._numeric_summary()
+            outliers = {}
+            for col, sketch in zip(self.numeric, self.sketches):
+                q1, q3 = numeric_summary[col]['25%'], numeric_summary[col]['75%']
+                iqr = q3 - q1
+                outliers[col] = sketch.count_outside(q1 - self.outlier_k * iqr, q3 + self.outlier_k * iqr)
+            corr = correlation_from_sums(*self.sums).tolist()
+            correlations = {col: {row: corr[i][j] for i, row in enumerate(self.numeric)}
+                            for j, col in enumerate(self.numeric)}
+        else:
+            # 与 DataFrame.describe() 对纯文本数据的输出一致
+            numeric_summary = {}
+            for col in self.categorical:
+                top = self.top[col].top(1)
+                numeric_summary[col] = {
+                    'count': self.rows - missing[col],
+                    'unique': categorical[col]['unique_count'],
+                    'top': top.index[0] if len(top) else np.nan,
+                    'freq': int(top.iloc[0]) if len(top) else np.nan,
+                }
+            outliers, correlations = {}, {}
+
+        return {
+            'metadata': metadata,
+            'statistics': {
+                'numeric_summary': numeric_summary,
+                'categorical_summary': categorical,
+                'missing_values': missing,
+                'data_types': {col: str(t) for col, t in self.dtypes.items()},
+            },
+            'correlations': correlations,
+            'outliers': outliers,
+        }
+
@@ -1,3 +1,10 @@
 from .connector import DBConnector
+from .pool import ConnectionPool, get_pool
+from .fetcher import FetchTask, SQLiteWriter, batched_tasks, fetch_concurrently
+from .sqlite_loader import BulkLoader
+from .watermark import WatermarkStore
+from .parquet_store import ParquetStore
 
-__all__ = ['DBConnector']
+__all__ = ['DBConnector', 'ConnectionPool', 'get_pool',
+           'FetchTask', 'SQLiteWriter', 'batched_tasks', 'fetch_concurrently',
+           'BulkLoader', 'WatermarkStore', 'ParquetStore']
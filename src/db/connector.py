@@ -1,26 +1,83 @@
 """数据库连接器 - 通过SSH隧道连接AWS RDS MySQL"""
 
 import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
 import pandas as pd
 import pymysql
+from pymysql.constants import FIELD_TYPE
 from sshtunnel import SSHTunnelForwarder
 
 from config.db_config import SSH_CONFIG, RDS_CONFIG, BRAND_DB_MAP
+from .pool import get_pool
 
 logger = logging.getLogger(__name__)
 
+_INT_TYPES = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.INT24,
+              FIELD_TYPE.LONGLONG, FIELD_TYPE.YEAR}
+_FLOAT_TYPES = {FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE, FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+_DATETIME_TYPES = {FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP, FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE}
+
+
+def dtypes_from_description(description) -> Dict[str, str]:
+    """
+    根据游标的列描述推断pandas类型
+
+    Args:
+        description: DB-API cursor.description
+
+    Returns:
+        列名 -> dtype；可为空的整数列使用 Int64
+    """
+    dtypes = {}
+    for name, type_code, *_, null_ok in description:
+        if type_code in _INT_TYPES:
+            dtypes[name] = 'Int64' if null_ok else 'int64'
+        elif type_code in _FLOAT_TYPES:
+            dtypes[name] = 'float64'
+        elif type_code in _DATETIME_TYPES:
+            dtypes[name] = 'datetime64[ns]'
+        else:
+            dtypes[name] = 'object'
+    return dtypes
+
+
+def rows_to_frame(rows, columns, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """按固定类型把行元组逐列构造成DataFrame，避免每个分块重新推断类型"""
+    if rows:
+        values = list(zip(*rows))
+    else:
+        values = [()] * len(columns)
+    return pd.DataFrame({
+        col: pd.Series(vals, dtype=dtypes.get(col, 'object'))
+        for col, vals in zip(columns, values)
+    }, columns=columns)
+
 
 class DBConnector:
-    """通过SSH隧道连接RDS MySQL，支持品牌切换和DataFrame查询"""
+    """通过SSH隧道连接RDS MySQL，支持品牌切换和DataFrame查询
 
-    def __init__(self, brand: str = 'osaio'):
+    pooled=True 时使用进程内共享的连接池：所有实例共用一条SSH隧道，
+    每次查询从池中借出连接并按品牌选库，可在多线程中并发查询。
+    """
+
+    def __init__(self, brand: str = 'osaio', pooled: bool = False, pool_size: int = 4):
         self.brand = brand
         self.database = BRAND_DB_MAP[brand]
+        self.pooled = pooled
+        self.pool_size = pool_size
         self._tunnel = None
         self._connection = None
+        self._pool = None
 
     def connect(self):
         """建立SSH隧道和MySQL连接"""
+        if self.pooled:
+            self._pool = get_pool(self.pool_size).acquire()
+            logger.info(f"已接入共享连接池 [{self.brand}], 池大小: {self._pool.max_size}")
+            return self
+
         logger.info(f"正在连接 [{self.brand}] 数据库: {self.database}")
 
         # 建立SSH隧道（密码认证）
@@ -47,6 +104,9 @@ class DBConnector:
 
     def close(self):
         """关闭连接和隧道"""
+        if self._pool:
+            self._pool.release()
+            self._pool = None
         if self._connection:
             self._connection.close()
             self._connection = None
@@ -55,11 +115,78 @@ class DBConnector:
             self._tunnel = None
         logger.info("连接已关闭")
 
-    def query_df(self, sql: str, params=None) -> pd.DataFrame:
-        """执行SQL查询，返回DataFrame"""
+    @contextmanager
+    def connection(self, brand: Optional[str] = None):
+        """
+        获取一个可用的MySQL连接
+
+        Args:
+            brand: 品牌名，默认使用当前品牌
+
+        Yields:
+            pymysql连接；连接池模式下退出上下文时归还
+        """
+        brand = brand or self.brand
+        if self._pool:
+            with self._pool.connection(brand) as conn:
+                yield conn
+            return
+
         if not self._connection:
             raise RuntimeError("未连接数据库，请先调用 connect()")
-        return pd.read_sql(sql, self._connection, params=params)
+        if brand != self.brand:
+            self.switch_database(brand)
+        yield self._connection
+
+    def query_df(self, sql: str, params=None, brand: Optional[str] = None) -> pd.DataFrame:
+        """执行SQL查询，返回DataFrame（brand 指定本次查询的品牌库）"""
+        with self.connection(brand) as conn:
+            return pd.read_sql(sql, conn, params=params)
+
+    def query_iter(
+        self,
+        sql: str,
+        params=None,
+        chunksize: int = 50000,
+        dtypes: Optional[Dict[str, str]] = None,
+        brand: Optional[str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        使用服务端游标(SSCursor)流式执行查询，按块返回DataFrame
+
+        结果集不会整体缓存在客户端，峰值内存只与 chunksize 有关。
+        迭代期间会占用一个连接，应尽快消费完毕。
+
+        Args:
+            sql: SQL查询语句
+            params: SQL参数
+            chunksize: 每块行数
+            dtypes: 指定列类型，未指定的列按MySQL字段类型推断
+            brand: 本次查询的品牌库，默认当前品牌
+
+        Yields:
+            类型一致的DataFrame分块；结果为空时产出一个带列名的空DataFrame
+        """
+        with self.connection(brand) as conn:
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+            try:
+                cursor.execute(sql, params)
+                columns = [d[0] for d in cursor.description]
+                column_dtypes = dtypes_from_description(cursor.description)
+                column_dtypes.update(dtypes or {})
+
+                emitted = False
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        break
+                    emitted = True
+                    yield rows_to_frame(rows, columns, column_dtypes)
+
+                if not emitted:
+                    yield rows_to_frame([], columns, column_dtypes)
+            finally:
+                cursor.close()
 
     def switch_database(self, brand: str):
         """切换品牌数据库（复用同一SSH隧道）"""
@@ -68,6 +195,7 @@ class DBConnector:
 
         self.brand = brand
         self.database = BRAND_DB_MAP[brand]
+        # 连接池模式下在每次借出连接时选库
         if self._connection:
             self._connection.select_db(self.database)
             logger.info(f"已切换到数据库: {self.database}")
@@ -0,0 +1,207 @@
+"""并发拉取 - 多个查询并行执行，结果交给单一SQLite写入线程"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from .sqlite_loader import BulkLoader
+
+logger = logging.getLogger(__name__)
+
+
+class FetchTask:
+    """一个拉取任务：在指定品牌库上执行SQL，结果写入SQLite表或保留在内存"""
+
+    def __init__(self, name: str, brand: str, sql: str,
+                 table: Optional[str] = None, label: Optional[str] = None,
+                 keys: Optional[Sequence[str]] = None, params=None,
+                 key_columns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            name: 任务名（结果字典的key）
+            brand: 品牌库（BRAND_DB_MAP的key）
+            sql: SQL查询语句
+            table: 目标SQLite表；为None时结果以DataFrame返回
+            label: 写入结果 brand 列的值，为None时不加该列
+            keys: 唯一键列，指定时按键 upsert，否则追加
+            params: SQL参数
+            key_columns: 拉取时收集这些列的去重非空值到 key_values，供下游按键拉取
+        """
+        self.name = name
+        self.brand = brand
+        self.sql = sql
+        self.table = table
+        self.label = label
+        self.keys = keys
+        self.params = params
+        self.key_columns = list(key_columns or [])
+        self.key_values: Dict[str, Set] = {col: set() for col in self.key_columns}
+
+
+class SQLiteWriter:
+    """单线程SQLite写入器 - 所有写入经由队列串行执行"""
+
+    _STOP = object()
+
+    def __init__(self, sqlite_path: str, max_pending: int = 8,
+                 schema: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            sqlite_path: SQLite文件路径
+            max_pending: 队列中待写入的最大块数，超过时拉取线程阻塞（背压）
+            schema: 表结构定义，见 sqlite_loader.ORDER_DB_SCHEMA
+        """
+        self.sqlite_path = sqlite_path
+        self.schema = schema
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._error: Optional[BaseException] = None
+        self.rows_written: Dict[str, int] = {}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, table: str, df: pd.DataFrame, keys: Optional[Sequence[str]] = None):
+        """
+        提交一块数据，写入线程出错时立即抛出
+
+        Args:
+            table: 目标表
+            df: 数据块
+            keys: 唯一键列，指定时按键 upsert（INSERT OR REPLACE），否则追加
+        """
+        if self._error:
+            raise RuntimeError(f"SQLite写入失败: {self._error}") from self._error
+        self._queue.put((table, df, keys))
+
+    def close(self):
+        """等待队列写完并关闭，写入出错时抛出"""
+        self._queue.put(self._STOP)
+        self._thread.join()
+        if self._error:
+            raise RuntimeError(f"SQLite写入失败: {self._error}") from self._error
+
+    def _run(self):
+        conn = sqlite3.connect(self.sqlite_path)
+        loader = BulkLoader(conn, schema=self.schema).begin()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._STOP:
+                    break
+                if self._error:
+                    continue  # 出错后只消费队列，避免拉取线程阻塞
+                table, df, keys = item
+                try:
+                    rows = loader.write(table, df, keys)
+                    self.rows_written[table] = self.rows_written.get(table, 0) + rows
+                except BaseException as e:
+                    logger.error(f"写入 {table} 失败: {e}")
+                    self._error = e
+            if not self._error:
+                loader.finish()
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def fetch_concurrently(
+    db,
+    tasks: List[FetchTask],
+    writer: Optional[SQLiteWriter] = None,
+    max_workers: int = 4,
+    chunksize: int = 50000,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, int]]:
+    """
+    并发执行拉取任务
+
+    每个任务在线程池中从连接池借出独立连接，用服务端游标分块拉取；
+    有 table 的任务把分块交给 writer 串行写入，其余任务的结果留在内存。
+
+    Args:
+        db: 已连接的 DBConnector（应为 pooled 模式，池大小 >= max_workers）
+        tasks: 拉取任务列表
+        writer: SQLite写入器，任务有 table 时必须提供
+        max_workers: 最大并发查询数
+        chunksize: 每块行数
+
+    Returns:
+        (frames, counts)：未落表任务的 DataFrame，以及每个任务的行数
+    """
+    if writer is None and any(t.table for t in tasks):
+        raise ValueError("存在写表任务时必须提供 writer")
+
+    frames: Dict[str, pd.DataFrame] = {}
+    counts: Dict[str, int] = {}
+
+    def run(task: FetchTask):
+        start = time.monotonic()
+        collected = []
+        rows = 0
+        for chunk in db.query_iter(task.sql, params=task.params, chunksize=chunksize, brand=task.brand):
+            for col in task.key_columns:
+                task.key_values[col].update(chunk[col].dropna().tolist())
+            if task.label is not None:
+                chunk['brand'] = task.label
+            rows += len(chunk)
+            if task.table:
+                writer.put(task.table, chunk, keys=task.keys)
+            else:
+                collected.append(chunk)
+        if not task.table:
+            frames[task.name] = pd.concat(collected, ignore_index=True)
+        counts[task.name] = rows
+        logger.info(f"{task.name}: {rows:,} rows, {time.monotonic() - start:.1f}s")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch') as pool:
+        futures = [pool.submit(run, task) for task in tasks]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        for future in done:
+            future.result()
+
+    return frames, counts
+
+
+def batched_tasks(
+    name: str,
+    brand: str,
+    sql: str,
+    values: Iterable,
+    batch_size: int = 5000,
+    **task_kwargs,
+) -> List[FetchTask]:
+    """
+    按键列表分批构建拉取任务，替代与大表的服务端JOIN/子查询
+
+    Args:
+        name: 任务名前缀，每批为 "{name}#{序号}"
+        brand: 品牌库
+        sql: 含一个 %s 占位符的SQL，如 "... WHERE order_id IN %s"
+        values: 键值集合
+        batch_size: 每批键数
+        **task_kwargs: 透传给 FetchTask（table, label, keys 等）
+
+    Returns:
+        FetchTask列表；键为空时返回空列表
+    """
+    values = sorted(values)
+    return [
+        FetchTask(f"{name}#{i // batch_size}", brand, sql,
+                  params=(tuple(values[i:i + batch_size]),), **task_kwargs)
+        for i in range(0, len(values), batch_size)
+    ]
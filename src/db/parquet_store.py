@@ -0,0 +1,207 @@
+"""本地列式存储 - 将 order_data.db 导出为按品牌/支付月份分区的Parquet数据集"""
+
+import logging
+import os
+import shutil
+import sqlite3
+from typing import Dict, Any, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .sqlite_loader import ORDER_DB_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# 各表的分区列；orders 额外按支付月份分区
+PARTITIONS: Dict[str, List[str]] = {
+    'orders': ['brand', 'pay_month'],
+    'subscribe': ['brand'],
+    'set_meal': ['brand'],
+    'order_amount_info': ['brand'],
+    'cloud_info': ['brand'],
+    'device_stats': ['brand'],
+    'subscribe_first_pay': ['brand'],
+    'orders_enriched': ['brand', 'pay_month'],
+}
+
+# 低基数字符串列，存为字典编码，读取后为 category
+CATEGORY_COLUMNS = {
+    'brand', 'currency', 'sub_currency', 'cycles_unit', 'time_unit', 'model_code',
+    'product_id', 'sub_product_id', 'description', 'pay_month',
+}
+
+_ARROW_TYPES = {'INTEGER': pa.int64(), 'REAL': pa.float64(), 'TEXT': pa.string()}
+
+
+def arrow_schema(table: str, schema: Optional[Dict[str, Dict[str, Any]]] = None) -> pa.Schema:
+    """根据SQLite表结构生成Arrow schema"""
+    spec = (schema or ORDER_DB_SCHEMA)[table]
+    fields = []
+    for name, sql_type in spec['columns'].items():
+        arrow_type = _ARROW_TYPES[sql_type]
+        if name in CATEGORY_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(name, arrow_type))
+    if table == 'orders':
+        fields.append(pa.field('pay_month', pa.dictionary(pa.int32(), pa.string())))
+    return pa.schema(fields)
+
+
+class ParquetStore:
+    """按表组织的Parquet数据集：data/order_parquet/<table>/brand=.../pay_month=.../*.parquet"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: 数据集根目录
+        """
+        self.root = root
+
+    def table_path(self, table: str) -> str:
+        return os.path.join(self.root, table)
+
+    def export_table(
+        self,
+        sqlite_conn: sqlite3.Connection,
+        table: str,
+        since_ts: Optional[int] = None,
+        chunksize: int = 200000,
+    ) -> int:
+        """
+        从SQLite导出一张表
+
+        全量导出时重写整张表；增量导出只重写 since_ts 所在月份及之后的分区。
+
+        Args:
+            sqlite_conn: SQLite连接
+            table: 表名
+            since_ts: 仅对 orders 有效，只导出该时间所在月份及之后的分区，其他表总是全量导出
+            chunksize: 每批读取行数
+
+        Returns:
+            导出行数
+        """
+        schema = arrow_schema(table)
+        columns = ', '.join(f'"{c}"' for c in ORDER_DB_SCHEMA[table]['columns'])
+        sql = f'SELECT {columns} FROM "{table}"'
+        params = ()
+        if table == 'orders':
+            sql = (f"SELECT {columns}, strftime('%Y-%m', pay_time, 'unixepoch') AS pay_month "
+                   f"FROM orders")
+            if since_ts is not None:
+                sql += " WHERE pay_time >= CAST(strftime('%s', ?, 'unixepoch', 'start of month') AS INTEGER)"
+                params = (since_ts,)
+
+        self._drop_partitions(table, since_ts)
+
+        # 分块读取SQLite并逐块写入（sqlite3连接只能在创建它的线程中使用，不能交给Arrow的写线程）
+        rows = 0
+        for n, chunk in enumerate(pd.read_sql(sql, sqlite_conn, params=params, chunksize=chunksize)):
+            rows += len(chunk)
+            self._write_part(table, pa.Table.from_pandas(chunk, schema=schema, preserve_index=False), n)
+        logger.info(f"Parquet导出 {table}: {rows:,} rows")
+        return rows
+
+    def write(self, table: str, df: pd.DataFrame, since_ts: Optional[int] = None) -> int:
+        """
+        直接写入DataFrame（如派生表 orders_enriched），dtype 由DataFrame决定
+
+        Args:
+            table: 表名，分区列见 PARTITIONS
+            df: 数据；since_ts 不为空时应只包含该月份及之后的数据
+            since_ts: 只重写该时间所在月份及之后的分区，为None时重写整张表
+
+        Returns:
+            写入行数
+        """
+        self._drop_partitions(table, since_ts)
+        if not df.empty:
+            self._write_part(table, pa.Table.from_pandas(df, preserve_index=False), 0)
+        logger.info(f"Parquet写入 {table}: {len(df):,} rows")
+        return len(df)
+
+    def _write_part(self, table: str, data: pa.Table, part: int):
+        ds.write_dataset(
+            data,
+            self.table_path(table),
+            format='parquet',
+            partitioning=PARTITIONS[table],
+            partitioning_flavor='hive',
+            existing_data_behavior='overwrite_or_ignore',
+            basename_template=f'part-{part}-{{i}}.parquet',
+        )
+
+    def _drop_partitions(self, table: str, since_ts: Optional[int] = None):
+        """删除即将重写的分区：全量导出删除整张表，增量导出删除 since_ts 所在月及之后的月份分区"""
+        path = self.table_path(table)
+        if not os.path.exists(path):
+            return
+        if since_ts is None:
+            shutil.rmtree(path)
+            return
+
+        since_month = pd.Timestamp(since_ts, unit='s').strftime('%Y-%m')
+        for brand_dir in os.listdir(path):
+            brand_path = os.path.join(path, brand_dir)
+            for month_dir in os.listdir(brand_path):
+                if month_dir.split('=', 1)[-1] >= since_month:
+                    shutil.rmtree(os.path.join(brand_path, month_dir))
+
+    def export(self, sqlite_conn: sqlite3.Connection, tables: Sequence[str],
+               since: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        导出多张表
+
+        Args:
+            sqlite_conn: SQLite连接
+            tables: 表名列表（不存在于SQLite中的表跳过）
+            since: 表名 -> since_ts，用于增量导出
+
+        Returns:
+            表名 -> 导出行数
+        """
+        existing = {r[0] for r in sqlite_conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        since = since or {}
+        return {
+            table: self.export_table(sqlite_conn, table, since_ts=since.get(table))
+            for table in tables if table in existing
+        }
+
+    def read(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        brands: Optional[Sequence[str]] = None,
+        months: Optional[Sequence[str]] = None,
+        filters=None,
+    ) -> pd.DataFrame:
+        """
+        读取表，只扫描需要的列和分区（内存映射）
+
+        Args:
+            table: 表名
+            columns: 需要的列，默认全部
+            brands: 只读这些品牌的分区
+            months: 只读这些支付月份的分区（'YYYY-MM'，仅 orders）
+            filters: 额外的pyarrow过滤条件（DNF列表）
+
+        Returns:
+            DataFrame；字典编码列为 category
+        """
+        conditions = list(filters or [])
+        if brands:
+            conditions.append(('brand', 'in', list(brands)))
+        if months:
+            conditions.append(('pay_month', 'in', list(months)))
+
+        result = pq.read_table(
+            self.table_path(table),
+            columns=list(columns) if columns else None,
+            filters=conditions or None,
+            partitioning='hive',
+            memory_map=True,
+        )
+        return result.to_pandas()
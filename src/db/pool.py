@@ -0,0 +1,261 @@
+"""MySQL连接池 - 进程内共享一条SSH隧道，按查询借出连接"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pymysql
+from sshtunnel import SSHTunnelForwarder
+
+from config.db_config import SSH_CONFIG, RDS_CONFIG, BRAND_DB_MAP
+
+logger = logging.getLogger(__name__)
+
+# 连接异常时直接丢弃而不是归还池中
+_BROKEN_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+
+def _default_tunnel_factory() -> SSHTunnelForwarder:
+    return SSHTunnelForwarder(
+        (SSH_CONFIG['ssh_host'], SSH_CONFIG['ssh_port']),
+        ssh_username=SSH_CONFIG['ssh_user'],
+        ssh_password=SSH_CONFIG['ssh_pass'],
+        remote_bind_address=(RDS_CONFIG['rds_host'], RDS_CONFIG['rds_port']),
+    )
+
+
+def _default_connect_factory(port: int, database: str):
+    return pymysql.connect(
+        host='127.0.0.1',
+        port=port,
+        user=RDS_CONFIG['rds_user'],
+        password=RDS_CONFIG['rds_pass'],
+        database=database,
+        charset='utf8mb4',
+    )
+
+
+class ConnectionPool:
+    """有界MySQL连接池
+
+    所有连接共用同一条SSH隧道；每次查询借出一个连接，借出时按品牌选择数据库，
+    空闲超过 ping_interval 的连接在借出前做健康检查，隧道断开时自动重建。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4,
+        timeout: float = 30.0,
+        ping_interval: float = 60.0,
+        tunnel_factory: Optional[Callable[[], SSHTunnelForwarder]] = None,
+        connect_factory: Optional[Callable[[int, str], object]] = None,
+    ):
+        """
+        初始化连接池
+
+        Args:
+            max_size: 最大连接数
+            timeout: 池满时等待空闲连接的秒数
+            ping_interval: 空闲超过该秒数的连接在借出前先ping
+            tunnel_factory: 创建SSH隧道的工厂（测试时可替换）
+            connect_factory: 创建MySQL连接的工厂 (port, database) -> connection
+        """
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._tunnel_factory = tunnel_factory or _default_tunnel_factory
+        self._connect_factory = connect_factory or _default_connect_factory
+
+        self._cond = threading.Condition()
+        self._tunnel = None
+        self._generation = 0
+        self._size = 0
+        self._refs = 0
+        # database -> [(connection, 隧道代数, 最近使用时间)]
+        self._idle: Dict[str, List[Tuple[object, int, float]]] = {}
+
+    # ---------- 生命周期 ----------
+
+    def acquire(self):
+        """登记一个使用方，首次使用时建立SSH隧道"""
+        with self._cond:
+            # 隧道建立失败时不登记，避免引用计数虚高导致隧道永不关闭
+            self._ensure_tunnel()
+            self._refs += 1
+        return self
+
+    def release(self):
+        """注销一个使用方，最后一个使用方离开时关闭全部连接和隧道"""
+        with self._cond:
+            self._refs = max(self._refs - 1, 0)
+            if self._refs == 0:
+                self._close_all()
+
+    def _ensure_tunnel(self):
+        """确保隧道可用（需持有锁）"""
+        if self._tunnel is not None and self._tunnel.is_active:
+            return
+        if self._tunnel is not None:
+            logger.warning("SSH隧道已断开，正在重建")
+            try:
+                self._tunnel.stop()
+            except Exception as e:
+                logger.debug(f"关闭旧隧道失败: {e}")
+        self._tunnel = self._tunnel_factory()
+        self._tunnel.start()
+        # 旧隧道上的连接全部作废
+        self._generation += 1
+        logger.info(f"SSH隧道已建立，本地端口: {self._tunnel.local_bind_port}")
+
+    def _close_all(self):
+        """关闭空闲连接和隧道（需持有锁）"""
+        for conns in self._idle.values():
+            for conn, _, _ in conns:
+                self._safe_close(conn)
+                self._size -= 1
+        self._idle.clear()
+        if self._tunnel is not None:
+            self._tunnel.stop()
+            self._tunnel = None
+            logger.info("连接池已关闭")
+
+    @staticmethod
+    def _safe_close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ---------- 借出 / 归还 ----------
+
+    @contextmanager
+    def connection(self, brand: str):
+        """
+        借出一个指向指定品牌数据库的连接
+
+        Args:
+            brand: 品牌名（BRAND_DB_MAP的key）
+
+        Yields:
+            pymysql连接，退出上下文时自动归还
+        """
+        if brand not in BRAND_DB_MAP:
+            raise ValueError(f"未知品牌: {brand}，可选: {list(BRAND_DB_MAP.keys())}")
+        database = BRAND_DB_MAP[brand]
+
+        conn, generation = self._checkout(database)
+        broken = False
+        try:
+            yield conn
+        except _BROKEN_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._checkin(conn, generation, database, broken)
+
+    def _checkout(self, database: str):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._refs == 0:
+                    raise RuntimeError("连接池未启用，请先调用 acquire()")
+                self._ensure_tunnel()
+
+                entry = self._pop_idle(database)
+                if entry is not None:
+                    conn, generation, last_used, conn_database = entry
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待数据库连接超时 ({self.timeout}s, 池大小 {self.max_size})")
+                self._cond.wait(remaining)
+
+            port = self._tunnel.local_bind_port
+            current_generation = self._generation
+
+        # 连接的建立、切库和ping都在锁外进行
+        try:
+            if conn is not None:
+                if generation != current_generation or not self._is_healthy(conn, last_used):
+                    self._safe_close(conn)
+                    conn = None
+                elif conn_database != database:
+                    conn.select_db(database)
+            if conn is None:
+                conn = self._connect_factory(port, database)
+                logger.debug(f"新建MySQL连接: {database}")
+        except Exception:
+            if conn is not None:
+                self._safe_close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return conn, current_generation
+
+    def _pop_idle(self, database: str):
+        """优先取同库的空闲连接，其次取其他库的连接后切库（需持有锁）"""
+        conns = self._idle.get(database)
+        if conns:
+            return conns.pop() + (database,)
+        for conn_database, conns in self._idle.items():
+            if conns:
+                return conns.pop() + (conn_database,)
+        return None
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if time.monotonic() - last_used < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.info(f"空闲连接已失效，重新建立: {e}")
+            return False
+
+    def _checkin(self, conn, generation: int, database: str, broken: bool):
+        with self._cond:
+            if broken or generation != self._generation or self._tunnel is None:
+                self._safe_close(conn)
+                self._size -= 1
+            else:
+                self._idle.setdefault(database, []).append((conn, generation, time.monotonic()))
+            self._cond.notify()
+
+    @property
+    def size(self) -> int:
+        """当前已建立（含借出中）的连接数"""
+        return self._size
+
+
+_shared_pool: Optional[ConnectionPool] = None
+_shared_lock = threading.Lock()
+
+
+def get_pool(max_size: Optional[int] = None) -> ConnectionPool:
+    """
+    获取进程内共享的连接池
+
+    Args:
+        max_size: 期望的最大连接数，大于当前值时扩容
+
+    Returns:
+        共享的ConnectionPool实例
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(max_size=max_size or 4)
+        elif max_size and max_size > _shared_pool.max_size:
+            with _shared_pool._cond:
+                _shared_pool.max_size = max_size
+                _shared_pool._cond.notify_all()
+        return _shared_pool
@@ -0,0 +1,250 @@
+"""SQLite批量写入 - 显式表结构、调优的PRAGMA和导入后建索引"""
+
+import logging
+import sqlite3
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# data/order_data.db 的表结构
+# 行较窄、主键非整数的表使用 WITHOUT ROWID，按主键聚簇存储
+ORDER_DB_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'orders': {
+        'columns': {
+            'order_int_id': 'INTEGER', 'order_id': 'TEXT', 'uid': 'TEXT',
+            'subscribe_id': 'TEXT', 'product_id': 'TEXT', 'order_status': 'INTEGER',
+            'description': 'TEXT', 'pay_time': 'INTEGER', 'amount': 'REAL',
+            'currency': 'TEXT', 'transaction_fee': 'REAL', 'is_sub': 'INTEGER',
+            'pay_type': 'INTEGER', 'brand': 'TEXT',
+        },
+        'primary_key': ['brand', 'order_int_id'],
+        'without_rowid': False,
+    },
+    'subscribe': {
+        'columns': {
+            'subscribe_id': 'TEXT', 'sub_uid': 'TEXT', 'sub_product_id': 'TEXT',
+            'sub_amount': 'REAL', 'sub_currency': 'TEXT', 'cycles_unit': 'TEXT',
+            'cycles_time': 'INTEGER', 'sub_status': 'INTEGER', 'sub_create_time': 'INTEGER',
+            'sub_cancel_time': 'INTEGER', 'support_dev_num': 'INTEGER', 'cloud_type': 'INTEGER',
+            'brand': 'TEXT',
+        },
+        'primary_key': ['brand', 'subscribe_id'],
+        'without_rowid': False,
+    },
+    'set_meal': {
+        'columns': {
+            'code': 'TEXT', 'name': 'TEXT', 'time': 'INTEGER', 'file_time': 'INTEGER',
+            'price': 'REAL', 'saleprice': 'REAL', 'status': 'INTEGER', 'time_unit': 'TEXT',
+            'currency': 'TEXT', 'level': 'INTEGER', 'brand': 'TEXT',
+        },
+        'primary_key': ['brand', 'code'],
+        'without_rowid': True,
+    },
+    'order_amount_info': {
+        'columns': {
+            'order_int_id': 'INTEGER', 'model_code': 'TEXT', 'amount_cny': 'REAL',
+            'transaction_fee_cny': 'REAL', 'exchange_rate': 'REAL', 'brand': 'TEXT',
+        },
+        'primary_key': ['brand', 'order_int_id'],
+        'without_rowid': True,
+    },
+    'cloud_info': {
+        'columns': {
+            'cloud_id': 'INTEGER', 'cloud_uid': 'TEXT', 'cloud_uuid': 'TEXT',
+            'order_id': 'TEXT', 'cloud_start_time': 'INTEGER', 'cloud_end_time': 'INTEGER',
+            'file_time': 'INTEGER', 'cloud_status': 'INTEGER', 'is_delete': 'INTEGER',
+            'level': 'INTEGER', 'brand': 'TEXT',
+        },
+        'primary_key': ['brand', 'cloud_id'],
+        'without_rowid': False,
+    },
+    'device_stats': {
+        'columns': {
+            'total_devices': 'INTEGER', 'active_devices_30d': 'INTEGER',
+            'devices_with_subscription': 'INTEGER', 'brand': 'TEXT',
+        },
+        'primary_key': ['brand'],
+        'without_rowid': True,
+    },
+    'subscribe_first_pay': {
+        'columns': {'subscribe_id': 'TEXT', 'first_pay_time': 'INTEGER', 'brand': 'TEXT'},
+        'primary_key': ['brand', 'subscribe_id'],
+        'without_rowid': True,
+    },
+}
+
+# 导入完成后再建的二级索引
+ORDER_DB_INDEXES: List[str] = [
+    "CREATE INDEX IF NOT EXISTS idx_orders_brand ON orders(brand)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_uid ON orders(uid)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_pay_time ON orders(pay_time)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_subscribe_id ON orders(subscribe_id)",
+    "CREATE INDEX IF NOT EXISTS idx_subscribe_id ON subscribe(subscribe_id)",
+    "CREATE INDEX IF NOT EXISTS idx_cloud_order_id ON cloud_info(order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_amount_order_id ON order_amount_info(order_int_id)",
+]
+
+# 导入期间的PRAGMA：WAL + 关闭fsync + 大页缓存，导入结束时统一checkpoint
+LOAD_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    'wal_autocheckpoint': 0,
+    'cache_size': -262144,  # 256MB
+    'temp_store': 'MEMORY',
+}
+
+
+def _column_values(series: pd.Series) -> list:
+    """把一列转成sqlite3可绑定的Python值列表，缺失值为None"""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in 'iub':
+            return series.tolist()
+        if dtype.kind == 'f':
+            arr = series.to_numpy()
+            return np.where(np.isnan(arr), None, arr).tolist()
+        if dtype.kind == 'M':
+            return series.dt.strftime('%Y-%m-%d %H:%M:%S').where(series.notna(), None).tolist()
+    mask = series.isna()
+    if not mask.any():
+        return series.tolist()
+    return series.astype(object).where(~mask, None).tolist()
+
+
+def iter_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """按列转换后逐行产出元组，供 executemany 使用"""
+    return zip(*[_column_values(df[col]) for col in df.columns])
+
+
+class BulkLoader:
+    """批量写入SQLite：executemany + 大事务，导入期间放宽同步，导入后建索引"""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        schema: Optional[Dict[str, Dict[str, Any]]] = None,
+        commit_rows: int = 500000,
+    ):
+        """
+        Args:
+            conn: SQLite连接
+            schema: 表结构定义（如 ORDER_DB_SCHEMA），不在其中的表按DataFrame推断建表
+            commit_rows: 累计写入多少行提交一次事务
+        """
+        self.conn = conn
+        self.schema = schema or {}
+        self.commit_rows = commit_rows
+        self._pending_rows = 0
+        self._ready_tables = set()
+
+    def begin(self):
+        """设置导入PRAGMA"""
+        for name, value in LOAD_PRAGMAS.items():
+            self.conn.execute(f"PRAGMA {name} = {value}")
+        return self
+
+    def ensure_table(self, table: str, df: pd.DataFrame, keys: Optional[Sequence[str]] = None):
+        """按 schema 建表；不在 schema 中的表按 DataFrame 建表，并为 keys 建唯一索引"""
+        if table in self._ready_tables:
+            return
+        spec = self.schema.get(table)
+        if spec:
+            columns = ', '.join(f'"{c}" {t}' for c, t in spec['columns'].items())
+            pk = ', '.join(f'"{c}"' for c in spec['primary_key'])
+            suffix = ' WITHOUT ROWID' if spec.get('without_rowid') else ''
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" ({columns}, PRIMARY KEY ({pk})){suffix}'
+            )
+        else:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            if not exists:
+                df.head(0).to_sql(table, self.conn, index=False)
+            if keys:
+                key_columns = ', '.join(f'"{k}"' for k in keys)
+                self.conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{table}" ON "{table}" ({key_columns})'
+                )
+        self._ready_tables.add(table)
+
+    def write(self, table: str, df: pd.DataFrame, keys: Optional[Sequence[str]] = None) -> int:
+        """
+        写入一块数据
+
+        Args:
+            table: 目标表
+            df: 数据块
+            keys: 唯一键列；表有主键或指定 keys 时按键覆盖（INSERT OR REPLACE）
+
+        Returns:
+            写入行数
+        """
+        self.ensure_table(table, df, keys)
+        if df.empty:
+            return 0
+
+        columns = ', '.join(f'"{c}"' for c in df.columns)
+        placeholders = ', '.join('?' * len(df.columns))
+        verb = 'INSERT OR REPLACE' if keys or table in self.schema else 'INSERT'
+        self.conn.executemany(
+            f'{verb} INTO "{table}" ({columns}) VALUES ({placeholders})', iter_rows(df)
+        )
+
+        self._pending_rows += len(df)
+        if self._pending_rows >= self.commit_rows:
+            self.conn.commit()
+            self._pending_rows = 0
+        return len(df)
+
+    def finish(self, indexes: Optional[Sequence[str]] = None):
+        """提交剩余数据并创建索引，然后checkpoint并恢复同步级别"""
+        self.conn.commit()
+        self._pending_rows = 0
+        if indexes:
+            create_indexes(self.conn, indexes)
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("PRAGMA wal_autocheckpoint = 1000")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def create_indexes(conn: sqlite3.Connection, indexes: Sequence[str]):
+    """创建二级索引并更新统计信息（抽样ANALYZE）"""
+    for statement in indexes:
+        conn.execute(statement)
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def delete_missing(conn: sqlite3.Connection, table: str, key: str, values: Iterable,
+                   brand: Optional[str] = None) -> int:
+    """
+    删除本地表中键不在 values 里的行（全量对账时清理上游已不再满足条件的行）
+
+    Args:
+        conn: SQLite连接
+        table: 表名
+        key: 键列（主键中除 brand 以外的列）
+        values: 本次从上游拉到的键值
+        brand: 只处理该品牌的行
+
+    Returns:
+        删除的行数
+    """
+    column_type = ORDER_DB_SCHEMA.get(table, {}).get('columns', {}).get(key, '')
+    conn.execute("DROP TABLE IF EXISTS temp._returned_keys")
+    conn.execute(f"CREATE TEMP TABLE _returned_keys (k {column_type} PRIMARY KEY)")
+    conn.executemany("INSERT OR IGNORE INTO temp._returned_keys VALUES (?)", ((v,) for v in values))
+    sql = f'DELETE FROM "{table}" WHERE "{key}" NOT IN (SELECT k FROM temp._returned_keys)'
+    params: tuple = ()
+    if brand is not None:
+        sql += ' AND brand = ?'
+        params = (brand,)
+    deleted = conn.execute(sql, params).rowcount
+    conn.execute("DROP TABLE temp._returned_keys")
+    conn.commit()
+    return deleted
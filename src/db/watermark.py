@@ -0,0 +1,124 @@
+"""同步水位线 - 在本地SQLite中记录每个品牌、每张表已同步到的位置"""
+
+import pickle
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+WATERMARK_TABLE = 'sync_watermark'
+STATE_TABLE = 'sync_state'
+
+
+class WatermarkStore:
+    """按 (brand, table_name) 保存 pay_time / create_time / 主键 的高水位线"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: 本地SQLite连接
+        """
+        self.conn = conn
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                brand TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                pay_time INTEGER,
+                create_time INTEGER,
+                max_id INTEGER,
+                full_sync_at INTEGER,
+                updated_at INTEGER,
+                PRIMARY KEY (brand, table_name)
+            )
+        """)
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                name TEXT PRIMARY KEY,
+                state BLOB NOT NULL,
+                updated_at INTEGER
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, brand: str, table: str) -> Dict[str, Any]:
+        """
+        读取水位线
+
+        Returns:
+            字段字典；没有记录时返回空字典
+        """
+        cursor = self.conn.execute(
+            f"SELECT * FROM {WATERMARK_TABLE} WHERE brand = ? AND table_name = ?",
+            (brand, table),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return {}
+        return dict(zip([d[0] for d in cursor.description], row))
+
+    def set(self, brand: str, table: str, pay_time: Optional[int] = None,
+            create_time: Optional[int] = None, max_id: Optional[int] = None,
+            full_sync: bool = False):
+        """
+        写入水位线，未提供的字段保留原值
+
+        Args:
+            brand: 品牌
+            table: 本地表名
+            pay_time: 已同步的最大 pay_time
+            create_time: 已同步的最大 create_time
+            max_id: 已同步的最大主键
+            full_sync: 本次是否为全量同步/对账
+        """
+        now = int(time.time())
+        self.conn.execute(f"""
+            INSERT INTO {WATERMARK_TABLE}
+                (brand, table_name, pay_time, create_time, max_id, full_sync_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (brand, table_name) DO UPDATE SET
+                pay_time = COALESCE(excluded.pay_time, pay_time),
+                create_time = COALESCE(excluded.create_time, create_time),
+                max_id = COALESCE(excluded.max_id, max_id),
+                full_sync_at = COALESCE(excluded.full_sync_at, full_sync_at),
+                updated_at = excluded.updated_at
+        """, (brand, table, pay_time, create_time, max_id, now if full_sync else None, now))
+        self.conn.commit()
+
+    def delete(self, brand: str, table: str):
+        """删除一张表的水位线（该表不再按水位线增量同步时）"""
+        self.conn.execute(
+            f"DELETE FROM {WATERMARK_TABLE} WHERE brand = ? AND table_name = ?",
+            (brand, table),
+        )
+        self.conn.commit()
+
+    def last_full_sync(self, brand: str) -> Optional[int]:
+        """品牌最近一次全量同步时间（各表中最早的一个），从未全量同步时返回None"""
+        row = self.conn.execute(
+            f"SELECT MIN(full_sync_at), COUNT(*) FROM {WATERMARK_TABLE} WHERE brand = ?",
+            (brand,),
+        ).fetchone()
+        return row[0] if row[1] else None
+
+    def save_state(self, name: str, state: Any):
+        """
+        保存与水位线配套的状态对象（如增量分析的聚合状态），与水位线在同一个库中
+
+        Args:
+            name: 状态名
+            state: 可pickle的对象
+        """
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {STATE_TABLE} (name, state, updated_at) VALUES (?, ?, ?)",
+            (name, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), int(time.time())),
+        )
+        self.conn.commit()
+
+    def load_state(self, name: str) -> Optional[Any]:
+        """读取状态对象，不存在时返回None"""
+        row = self.conn.execute(f"SELECT state FROM {STATE_TABLE} WHERE name = ?", (name,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def drop_state(self, name: str):
+        """删除状态（全量重建后需要重新累积）"""
+        self.conn.execute(f"DELETE FROM {STATE_TABLE} WHERE name = ?", (name,))
+        self.conn.commit()
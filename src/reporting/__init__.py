@@ -1,5 +1,6 @@
 """报告生成模块"""
 
+from .charts import ChartRenderer, chart_jobs
 from .report_generator import ReportGenerator
 
-__all__ = ['ReportGenerator']
+__all__ = ['ChartRenderer', 'ReportGenerator', 'chart_jobs']
@@ -0,0 +1,227 @@
+"""图表渲染 - 把可视化建议转为预聚合的图表任务，在进程池中用 Agg 后端并行渲染，输入未变的图表跳过"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..analysis.result_cache import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 绘图代码或样式变化时递增，使已渲染的图表全部重画
+CHART_VERSION = 1
+
+MANIFEST = '.charts.json'
+
+# 与 notebooks 中的绘图设置一致（默认字体不含中文，标题用英文）
+STYLE = {'figure.figsize': (14, 6), 'font.size': 12}
+DPI = 150
+
+
+def _safe_name(text: str) -> str:
+    return re.sub(r'[^\w.-]+', '_', str(text)).strip('_') or 'chart'
+
+
+def _floats(values) -> List[Optional[float]]:
+    """转为可 repr、可跨进程传递的浮点列表，NaN 为 None"""
+    return [None if v != v else float(v) for v in np.asarray(values, dtype='float64').tolist()]
+
+
+def _box_stats(values: np.ndarray, label: str) -> Dict[str, Any]:
+    """箱线图统计（与 matplotlib boxplot 的 1.5 IQR 须一致），供 Axes.bxp 直接绘制"""
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {'label': label, 'q1': float(q1), 'med': float(med), 'q3': float(q3),
+            'whislo': float(inside.min()), 'whishi': float(inside.max()), 'fliers': []}
+
+
+def chart_jobs(
+    df: pd.DataFrame,
+    suggestions: Sequence[Dict[str, Any]],
+    correlations: Optional[Dict[str, Dict[str, float]]] = None,
+    prefix: str = '',
+    bins: int = 30,
+    top_n: int = 15,
+    max_columns: int = 12,
+) -> List[Dict[str, Any]]:
+    """
+    把 AIAnalyzer.suggest_visualizations 的建议转为图表任务
+
+    每个任务只带绘图所需的聚合结果（直方图计数、Top N 计数、箱线图五数、相关矩阵），
+    不带原始数据，传给子进程的开销与数据行数无关。
+
+    Args:
+        df: 原始数据
+        suggestions: 可视化建议（correlation_heatmap / distribution / bar_chart / box_plot）
+        correlations: analyze() 结果中的相关矩阵，提供时热力图不再重新计算
+        prefix: 图表文件名前缀（如 'order_'）
+        bins: 直方图分箱数
+        top_n: 柱状图/箱线图最多显示的类别数
+        max_columns: 每个建议最多生成的图表数
+
+    Returns:
+        任务列表，每项含 name（文件名，不含扩展名）、kind、title、data
+    """
+    jobs = []
+    for spec in suggestions:
+        kind = spec['type']
+        if kind == 'correlation_heatmap':
+            columns = list(spec['columns'])
+            if correlations:
+                matrix = [[correlations.get(a, {}).get(b, np.nan) for b in columns] for a in columns]
+            else:
+                matrix = df[columns].corr().to_numpy()
+            jobs.append({'name': f'{prefix}correlation_heatmap', 'kind': kind, 'title': 'Correlation Heatmap',
+                         'data': {'columns': columns, 'matrix': [_floats(row) for row in matrix]}})
+
+        elif kind == 'distribution':
+            for col in spec['columns'][:max_columns]:
+                values = df[col].dropna().to_numpy(dtype='float64')
+                if not len(values):
+                    continue
+                counts, edges = np.histogram(values, bins=bins)
+                jobs.append({'name': f'{prefix}distribution_{_safe_name(col)}', 'kind': kind,
+                             'title': f'Distribution of {col}', 'data': {'counts': counts.tolist(), 'edges': _floats(edges)}})
+
+        elif kind == 'bar_chart':
+            for col in spec['columns'][:max_columns]:
+                counts = df[col].value_counts().head(top_n)
+                if counts.empty:
+                    continue
+                jobs.append({'name': f'{prefix}bar_{_safe_name(col)}', 'kind': kind, 'title': f'{col} Top {top_n}',
+                             'data': {'labels': [str(v) for v in counts.index], 'counts': counts.tolist()}})
+
+        elif kind == 'box_plot':
+            pairs = [(n, c) for c in spec['categorical'] for n in spec['numeric']][:max_columns]
+            for numeric, categorical in pairs:
+                top = df[categorical].value_counts().head(top_n).index
+                groups = df.loc[df[categorical].isin(top), [categorical, numeric]].dropna()
+                stats = [_box_stats(group[numeric].to_numpy(dtype='float64'), str(label))
+                         for label, group in groups.groupby(categorical, sort=True, observed=True)]
+                if not stats:
+                    continue
+                jobs.append({'name': f'{prefix}box_{_safe_name(numeric)}_by_{_safe_name(categorical)}',
+                             'kind': kind, 'title': f'{numeric} by {categorical}', 'data': {'stats': stats}})
+        else:
+            logger.warning(f"未知的图表类型: {kind}")
+    return jobs
+
+
+def job_fingerprint(job: Dict[str, Any], dpi: int = DPI) -> str:
+    """图表输入的摘要：绘图版本、样式和任务内容都相同时图片不变"""
+    return fingerprint(CHART_VERSION, sorted(STYLE.items()), dpi, job['kind'], job['title'], job['data'])
+
+
+def _render_job(job: Dict[str, Any], path: str, dpi: int = DPI) -> str:
+    """在子进程中渲染单个图表（Agg 后端，不需要显示设备）"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    data = job['data']
+    with plt.rc_context(STYLE):
+        fig, ax = plt.subplots()
+        if job['kind'] == 'correlation_heatmap':
+            matrix = np.array(data['matrix'], dtype='float64')
+            image = ax.imshow(matrix, cmap='coolwarm', vmin=-1, vmax=1)
+            ax.set_xticks(range(len(data['columns'])), data['columns'], rotation=45, ha='right')
+            ax.set_yticks(range(len(data['columns'])), data['columns'])
+            fig.colorbar(image, ax=ax)
+        elif job['kind'] == 'distribution':
+            edges = np.array(data['edges'], dtype='float64')
+            ax.stairs(data['counts'], edges, fill=True, alpha=0.7)
+            ax.set_ylabel('Count')
+        elif job['kind'] == 'bar_chart':
+            bars = ax.bar(data['labels'], data['counts'])
+            ax.bar_label(bars, fmt='{:,.0f}', fontsize=8)
+            ax.tick_params(axis='x', rotation=45)
+        elif job['kind'] == 'box_plot':
+            ax.bxp(data['stats'], showfliers=False)
+            ax.tick_params(axis='x', rotation=45)
+        ax.set_title(job['title'])
+        fig.tight_layout()
+        tmp = f'{path}.{os.getpid()}.tmp.png'
+        fig.savefig(tmp, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+    os.replace(tmp, path)
+    return path
+
+
+class ChartRenderer:
+    """图表渲染阶段：按输入摘要跳过未变化的图表，其余在进程池中并行渲染"""
+
+    def __init__(self, output_dir: str, max_workers: Optional[int] = None, dpi: int = DPI):
+        """
+        Args:
+            output_dir: 图片输出目录（同时保存各图表输入摘要的清单）
+            max_workers: 渲染进程数，默认CPU核数；为1或只有一张图时在当前进程渲染
+            dpi: 图片分辨率
+        """
+        self.output_dir = output_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.stats: Dict[str, int] = {'rendered': 0, 'skipped': 0}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, str]):
+        path = os.path.join(self.output_dir, MANIFEST)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(f'{path}.tmp', path)
+
+    def render(self, jobs: Sequence[Dict[str, Any]], force: bool = False) -> Dict[str, str]:
+        """
+        渲染图表
+
+        Args:
+            jobs: chart_jobs 生成的任务
+            force: 为True时忽略清单，全部重新渲染
+
+        Returns:
+            {图表名: 图片路径}，顺序与 jobs 一致
+        """
+        manifest = self._load_manifest()
+        paths, pending = {}, []
+        for job in jobs:
+            path = os.path.join(self.output_dir, f"{job['name']}.png")
+            paths[job['name']] = path
+            digest = job_fingerprint(job, self.dpi)
+            if not force and manifest.get(job['name']) == digest and os.path.exists(path):
+                continue
+            pending.append((job, path, digest))
+
+        workers = min(self.max_workers, len(pending))
+        try:
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [(pool.submit(_render_job, job, path, self.dpi), job, digest)
+                               for job, path, digest in pending]
+                    for future, job, digest in futures:
+                        future.result()
+                        manifest[job['name']] = digest
+            else:
+                for job, path, digest in pending:
+                    _render_job(job, path, self.dpi)
+                    manifest[job['name']] = digest
+        finally:
+            # 出错时也记录已完成的图表，下次只重画失败的
+            if pending:
+                self._save_manifest(manifest)
+        self.stats['rendered'] += len(pending)
+        self.stats['skipped'] += len(jobs) - len(pending)
+        logger.info(f"图表渲染: {len(pending)} 张重画, {len(jobs) - len(pending)} 张未变化跳过, 进程数 {max(workers, 1)}")
+        return paths
@@ -2,10 +2,14 @@
 
 import os
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterable, Optional, Sequence, Union
 import json
 import logging
 
+import pandas as pd
+
+from .charts import ChartRenderer, chart_jobs
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,16 +29,21 @@ class ReportGenerator:
     def generate_markdown_report(
         self,
         analysis_results: Dict[str, Any],
-        ai_insights: Optional[str] = None,
-        title: str = "数据分析报告"
+        ai_insights: Optional[Union[str, Iterable[str]]] = None,
+        title: str = "数据分析报告",
+        on_text: Optional[Callable[[str], None]] = None,
+        charts: Optional[Dict[str, str]] = None
     ) -> str:
         """
         生成Markdown格式报告
 
         Args:
             analysis_results: 分析结果
-            ai_insights: AI生成的洞察
+            ai_insights: AI生成的洞察；也可以是文本片段的迭代器（如 AIAnalyzer.stream_data_insights），
+                此时先写出数据部分，再随生成逐段写入并刷新AI洞察
             title: 报告标题
+            on_text: 每写入一段AI洞察时回调（如在命令行同步显示）
+            charts: render_charts 返回的 {图表名: 图片路径}，嵌入统计分析部分
 
         Returns:
             报告文件路径
@@ -43,12 +52,20 @@ class ReportGenerator:
         filename = f"report_{timestamp}.md"
         filepath = os.path.join(self.output_dir, filename)
 
-        report_content = self._build_markdown_content(
-            title, analysis_results, ai_insights
-        )
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        if ai_insights is None or isinstance(ai_insights, str):
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(self._build_markdown_content(title, analysis_results, ai_insights, charts))
+        else:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(self._markdown_head(title, analysis_results, charts))
+                f.write("\n## 3. AI智能洞察\n\n")
+                f.flush()
+                for text in ai_insights:
+                    f.write(text)
+                    f.flush()
+                    if on_text:
+                        on_text(text)
+                f.write("\n" + self._markdown_tail())
 
         logger.info(f"报告已生成: {filepath}")
         return filepath
@@ -57,10 +74,21 @@ class ReportGenerator:
         self,
         title: str,
         results: Dict[str, Any],
-        ai_insights: Optional[str]
+        ai_insights: Optional[str],
+        charts: Optional[Dict[str, str]] = None
     ) -> str:
         """构建Markdown报告内容"""
+        content = self._markdown_head(title, results, charts)
 
+        # AI洞察
+        if ai_insights:
+            content += f"\n## 3. AI智能洞察\n\n{ai_insights}\n"
+
+        return content + self._markdown_tail()
+
+    def _markdown_head(self, title: str, results: Dict[str, Any],
+                       charts: Optional[Dict[str, str]] = None) -> str:
+        """AI洞察之前的部分：数据概览和统计分析"""
         content = f"""# {title}
 
 生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
@@ -107,12 +135,18 @@ class ReportGenerator:
                 if count > 0:
                     content += f"- {col}: {count} 个异常值\n"
 
-        # AI洞察
-        if ai_insights:
-            content += f"\n## 3. AI智能洞察\n\n{ai_insights}\n"
+        # 图表
+        if charts:
+            content += "\n### 图表\n\n"
+            for name, path in charts.items():
+                relative = os.path.relpath(path, self.output_dir).replace(os.sep, '/')
+                content += f"![{name}]({relative})\n\n"
+
+        return content
 
-        # 结论
-        content += """
+    def _markdown_tail(self) -> str:
+        """报告结尾"""
+        return """
 ---
 
 ## 总结
@@ -120,7 +154,31 @@ class ReportGenerator:
 本报告由Data Analysis Agent自动生成。
 """
 
-        return content
+    def render_charts(
+        self,
+        df: pd.DataFrame,
+        suggestions: Sequence[Dict[str, Any]],
+        analysis_results: Optional[Dict[str, Any]] = None,
+        prefix: str = '',
+        max_workers: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        把可视化建议渲染为图片（输出到 output_dir/charts，输入未变的图表不重画）
+
+        Args:
+            df: 原始数据，只在当前进程中聚合，渲染进程只收到聚合结果
+            suggestions: AIAnalyzer.suggest_visualizations 的结果
+            analysis_results: analyze() 结果，提供时复用其中的相关矩阵
+            prefix: 图表文件名前缀
+            max_workers: 渲染进程数，默认CPU核数
+
+        Returns:
+            {图表名: 图片路径}，可直接传给 generate_markdown_report 的 charts
+        """
+        correlations = (analysis_results or {}).get('correlations')
+        jobs = chart_jobs(df, suggestions, correlations=correlations, prefix=prefix)
+        renderer = ChartRenderer(os.path.join(self.output_dir, 'charts'), max_workers=max_workers)
+        return renderer.render(jobs)
 
     def generate_json_report(self, analysis_results: Dict[str, Any]) -> str:
         """
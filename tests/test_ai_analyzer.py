@@ -0,0 +1,198 @@
+"""AI分析器测试（使用离线桩客户端）"""
+
+import os
+import time
+
+from src.ai import AIAnalyzer, StubClient
+
+SUMMARY = {
+    'metadata': {'shape': (3, 2), 'columns': ['a', 'b']},
+    'statistics': {'missing_values': {'a': 0, 'b': 1}, 'data_types': {'a': 'int64', 'b': 'float64'}},
+    'outliers': {'a': 0},
+}
+
+
+def test_same_prompt_served_from_cache(tmp_path):
+    client = StubClient(lambda prompt: '洞察')
+    ai = AIAnalyzer(client=client, cache_dir=str(tmp_path))
+
+    assert ai.analyze_data_insights(SUMMARY) == '洞察'
+    assert ai.analyze_data_insights(SUMMARY) == '洞察'
+    assert len(client.calls) == 1
+    assert ai.cache_stats['hits'] == 1 and ai.cache_stats['misses'] == 1
+
+    # 新实例读取持久化的缓存
+    other = AIAnalyzer(client=client, cache_dir=str(tmp_path))
+    other.analyze_data_insights(SUMMARY)
+    assert len(client.calls) == 1
+
+    # 结果变化、模型或 max_tokens 不同都会重新请求
+    ai.analyze_data_insights({**SUMMARY, 'outliers': {'a': 2}})
+    AIAnalyzer(client=client, cache_dir=str(tmp_path), max_tokens=500).analyze_data_insights(SUMMARY)
+    assert len(client.calls) == 3
+    assert client.calls[-1]['max_tokens'] == 500
+
+
+def test_bypass_ttl_and_errors(tmp_path):
+    replies = iter(['v1', 'v2', 'v3'])
+    client = StubClient(lambda prompt: next(replies))
+    ai = AIAnalyzer(client=client, cache_dir=str(tmp_path), cache_ttl=60)
+
+    assert ai.analyze_data_insights(SUMMARY) == 'v1'
+    assert ai.analyze_data_insights(SUMMARY, use_cache=False) == 'v2'
+    assert ai.analyze_data_insights(SUMMARY) == 'v2'
+
+    path = tmp_path / f'{ai.prompt_fingerprint(ai._build_analysis_prompt(SUMMARY))}.pkl'
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert ai.analyze_data_insights(SUMMARY) == 'v3'
+
+    def fail(prompt):
+        raise RuntimeError('rate limited')
+
+    failing = AIAnalyzer(client=StubClient(fail), cache_dir=str(tmp_path / 'other'))
+    assert failing.analyze_data_insights(SUMMARY).startswith('AI分析出错')
+    assert not list((tmp_path / 'other').glob('*.pkl'))
+
+
+class FakeMessagesServer:
+    """
+    本地假 Messages API：每个请求延迟 latency 秒；回复为提示词中列表格的第一行；前 rate_limited 个请求返回429
+
+    stream=true 的请求以SSE返回，每4个字符一个 text_delta，相邻两段间隔 chunk_latency 秒
+    """
+
+    def __init__(self, latency=0.3, rate_limited=0, chunk_latency=0.0):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        server = self
+        self.requests = 0
+        self.rate_limited = rate_limited
+        self.lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server.lock:
+                    server.requests += 1
+                    limited = server.requests <= server.rate_limited
+                if limited:
+                    payload, status = {'type': 'error', 'error': {'type': 'rate_limit_error', 'message': 'slow down'}}, 429
+                else:
+                    time.sleep(latency)
+                    prompt = body['messages'][0]['content']
+                    lines = prompt.splitlines()
+                    line = lines[next(i for i, l in enumerate(lines) if l.startswith('列（')) + 1]
+                    if body.get('stream'):
+                        return self.stream(body['model'], line)
+                    payload, status = {
+                        'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': body['model'],
+                        'content': [{'type': 'text', 'text': line}], 'stop_reason': 'end_turn',
+                        'stop_sequence': None, 'usage': {'input_tokens': 1, 'output_tokens': 1},
+                    }, 200
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if limited:
+                    self.send_header('retry-after', '0')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def stream(self, model, text):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                usage = {'input_tokens': 1, 'output_tokens': 1}
+                events = [('message_start', {'message': {
+                    'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': model, 'content': [],
+                    'stop_reason': None, 'stop_sequence': None, 'usage': usage}}),
+                    ('content_block_start', {'index': 0, 'content_block': {'type': 'text', 'text': ''}})]
+                events += [('content_block_delta', {'index': 0, 'delta': {'type': 'text_delta', 'text': text[i:i + 4]}})
+                           for i in range(0, len(text), 4)]
+                events += [('content_block_stop', {'index': 0}),
+                           ('message_delta', {'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                              'usage': {'output_tokens': 1}}),
+                           ('message_stop', {})]
+                for name, data in events:
+                    if name == 'content_block_delta' and data['delta']['text'] != text[:4]:
+                        time.sleep(chunk_latency)
+                    self.wfile.write(f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n".encode())
+                    self.wfile.flush()
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+def test_analyze_many_concurrent_in_order_with_rate_limit():
+    from anthropic import Anthropic
+
+    server = FakeMessagesServer(latency=0.3, rate_limited=2)
+    try:
+        client = Anthropic(api_key='test', base_url=server.url, max_retries=0)
+        ai = AIAnalyzer(client=client, model='fake-model', backoff=0.01)
+        summaries = {
+            f'{brand}/{name}': {**SUMMARY, 'metadata': {'shape': (1, 1), 'columns': [f'{brand}_{name}']}}
+            for brand in ['OSAIO', 'Nooie'] for name in ['users', 'devices', 'orders']
+        }
+
+        start = time.perf_counter()
+        results = ai.analyze_many(summaries, concurrency=6)
+        elapsed = time.perf_counter() - start
+
+        assert list(results) == list(summaries)
+        for key, text in results.items():
+            assert text.endswith(key.replace('/', '_'))
+        assert server.requests == 8  # 6 个请求 + 2 次限流后的重试
+        assert elapsed < 6 * 0.3
+    finally:
+        server.close()
+
+
+def test_analyze_many_timeout_returns_error_per_item():
+    from anthropic import Anthropic
+
+    server = FakeMessagesServer(latency=1.0)
+    try:
+        client = Anthropic(api_key='test', base_url=server.url, max_retries=0)
+        ai = AIAnalyzer(client=client, model='fake-model', timeout=0.2, max_retries=1, backoff=0.01)
+        results = ai.analyze_many([SUMMARY, SUMMARY], concurrency=2)
+        assert len(results) == 2 and all(r.startswith('AI分析出错') for r in results)
+        assert server.requests == 4
+    finally:
+        server.close()
+
+
+def test_stream_insights_through_sdk(tmp_path):
+    from anthropic import Anthropic
+
+    server = FakeMessagesServer(latency=0.0, chunk_latency=0.1)
+    try:
+        client = Anthropic(api_key='test', base_url=server.url, max_retries=0)
+        ai = AIAnalyzer(client=client, model='fake-model', cache_dir=str(tmp_path))
+        summary = {**SUMMARY, 'metadata': {'shape': (1, 1), 'columns': ['streamed_column_name']}}
+
+        start = time.perf_counter()
+        deltas = []
+        for text in ai.stream_data_insights(summary):
+            deltas.append((time.perf_counter() - start, text))
+        assert ''.join(text for _, text in deltas) == 'streamed_column_name'
+        assert len(deltas) == 5
+        # 首个片段不必等完整回复
+        assert deltas[0][0] < deltas[-1][0] - 0.3
+
+        # 完整回复写入缓存，非流式调用直接命中
+        assert ai.analyze_data_insights(summary) == 'streamed_column_name'
+        assert list(ai.stream_data_insights(summary)) == ['streamed_column_name']
+        assert server.requests == 1
+    finally:
+        server.close()
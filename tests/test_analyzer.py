@@ -45,3 +45,135 @@ def test_basic_statistics(sample_data):
     assert 'numeric_summary' in stats
     assert 'categorical_summary' in stats
     assert 'missing_values' in stats
+
+
+def test_load_chunks(sample_data):
+    """测试分块加载"""
+    analyzer = DataAnalyzer()
+    data = analyzer.load_chunks(iter([sample_data.iloc[:2], sample_data.iloc[2:]]))
+
+    assert data.shape == (5, 3)
+    assert analyzer.metadata['shape'] == (5, 3)
+
+
+def test_analyze_matches_pandas():
+    """测试统计引擎与 pandas 逐列计算结果一致"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'x': rng.normal(size=200),
+        'ts': rng.integers(1_700_000_000, 1_800_000_000, 200),
+        'n': pd.array(rng.integers(0, 5, 200), dtype='Int64'),
+        'cat': rng.choice(['a', 'b', 'c'], 200),
+    })
+    df.loc[::7, 'x'] = np.nan
+    df.loc[::11, 'n'] = pd.NA
+
+    analyzer = DataAnalyzer()
+    analyzer.data = df
+    results = analyzer.analyze()
+
+    numeric = df[['x', 'ts', 'n']]
+    expected_summary = numeric.describe()
+    summary = pd.DataFrame(results['statistics']['numeric_summary']).loc[expected_summary.index]
+    pd.testing.assert_frame_equal(summary, expected_summary, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.DataFrame(results['correlations']), numeric.corr(), check_dtype=False)
+    assert results['statistics']['missing_values'] == df.isnull().sum().to_dict()
+    assert results['statistics']['categorical_summary']['cat']['unique_count'] == 3
+
+    for col in numeric:
+        q1, q3 = numeric[col].quantile(0.25), numeric[col].quantile(0.75)
+        iqr = q3 - q1
+        expected = int(((numeric[col] < q1 - 1.5 * iqr) | (numeric[col] > q3 + 1.5 * iqr)).sum())
+        assert results['outliers'][col] == expected
+
+
+def test_datetime_columns_match_describe():
+    """测试时间列的描述统计与 describe() 一致（含类型压缩后由时间戳转换的时间列）"""
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        'x': rng.normal(size=300),
+        'created': pd.to_datetime(rng.integers(1_735_689_600, 1_767_225_600, 300), unit='s'),
+        'brand': rng.choice(['OSAIO', 'Nooie'], 300),
+    })
+    df.loc[::9, 'created'] = pd.NaT
+
+    analyzer = DataAnalyzer()
+    analyzer.data = df
+    summary = analyzer.analyze()['statistics']['numeric_summary']
+
+    expected = df.describe().to_dict()
+    assert list(summary) == list(expected) == ['x', 'created']
+    assert summary['created'].keys() == expected['created'].keys()
+    for stat, value in expected['created'].items():
+        assert summary['created'][stat] == value or (pd.isna(value) and pd.isna(summary['created'][stat]))
+    assert summary['x'] == pytest.approx(expected['x'])
+
+
+def test_compact_data():
+    """测试类型压缩"""
+    n = 1000
+    df = pd.DataFrame({
+        'is_sub': np.tile([0, 1], n // 2),
+        'brand': np.tile(['OSAIO', 'Nooie'], n // 2),
+        'order_id': [f'o{i}' for i in range(n)],
+        'pay_time': np.arange(n) + 1_735_689_600,
+        'amount': np.linspace(0, 10, n),
+    })
+    analyzer = DataAnalyzer(compact=True)
+    data = analyzer.load_chunks(iter([df]))
+
+    assert data['is_sub'].dtype == np.int8
+    assert isinstance(data['brand'].dtype, pd.CategoricalDtype)
+    assert not isinstance(data['order_id'].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(data['pay_time'])
+    assert data['pay_time'].iloc[0] == pd.Timestamp('2025-01-01')
+    assert data['amount'].dtype == np.float64
+    assert analyzer.metadata['memory_usage'] < analyzer.metadata['memory_usage_before']
+
+
+def test_parallel_matches_serial():
+    """测试按列并行与串行结果一致"""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({f'n{i}': rng.normal(size=500) for i in range(9)})
+    df.loc[::5, 'n3'] = np.nan
+    for i in range(4):
+        df[f'c{i}'] = rng.choice(['x', 'y', 'z'], 500)
+
+    serial, parallel = DataAnalyzer(), DataAnalyzer(n_jobs=4)
+    serial.data = parallel.data = df
+
+    expected, results = serial.analyze(), parallel.analyze()
+    pd.testing.assert_frame_equal(pd.DataFrame(results['statistics']['numeric_summary']),
+                                  pd.DataFrame(expected['statistics']['numeric_summary']))
+    assert results['outliers'] == expected['outliers']
+    assert parallel._detect_outliers() == serial._detect_outliers()
+    assert parallel.basic_statistics()['categorical_summary'] == serial.basic_statistics()['categorical_summary']
+
+
+def test_analyze_approx_bounds_cover_exact():
+    """测试近似模式的区间覆盖精确值"""
+    rng = np.random.default_rng(2)
+    n = 50000
+    df = pd.DataFrame({
+        'x': rng.normal(size=n),
+        'brand': rng.choice(['OSAIO', 'Nooie'], n, p=[0.7, 0.3]),
+    })
+    df['y'] = df['x'] * 0.5 + rng.normal(size=n)
+
+    analyzer = DataAnalyzer()
+    analyzer.data = df
+    exact = analyzer.analyze()
+    approx = analyzer.analyze(mode='approx', error=0.02, stratify='brand')
+
+    assert approx['metadata']['sample']['rows'] < n
+    bounds = approx['error_bounds']
+    for col in ['x', 'y']:
+        for stat in ['mean', '25%', '50%', '75%']:
+            low, high = bounds['numeric_summary'][col][stat]
+            assert low <= exact['statistics']['numeric_summary'][col][stat] <= high
+        low, high = bounds['outliers'][col]
+        assert low <= exact['outliers'][col] <= high
+    low, high = bounds['correlations']['x']['y']
+    assert low <= exact['correlations']['x']['y'] <= high
+    low, high = bounds['categorical_summary']['brand']['OSAIO']
+    assert low <= exact['statistics']['categorical_summary']['brand']['top_values']['OSAIO'] <= high
@@ -0,0 +1,75 @@
+"""图表渲染测试"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.ai import AIAnalyzer
+from src.reporting import ChartRenderer, ReportGenerator, chart_jobs
+
+
+def sample_frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'amount': rng.gamma(2.0, 10.0, n),
+        'duration': rng.integers(1, 365, n).astype('float64'),
+        'brand': rng.choice(['OSAIO', 'Nooie'], n),
+    })
+
+
+def suggestions_for(df):
+    return AIAnalyzer(client=object()).suggest_visualizations(
+        list(df.columns), {col: str(dtype) if dtype != 'str' else 'object' for col, dtype in df.dtypes.items()})
+
+
+def test_jobs_carry_only_aggregates():
+    df = sample_frame()
+    jobs = chart_jobs(df, suggestions_for(df), bins=20)
+    kinds = {job['kind'] for job in jobs}
+    assert kinds == {'correlation_heatmap', 'distribution', 'bar_chart', 'box_plot'}
+
+    hist = next(job for job in jobs if job['name'] == 'distribution_amount')
+    assert sum(hist['data']['counts']) == len(df) and len(hist['data']['edges']) == 21
+    box = next(job for job in jobs if job['kind'] == 'box_plot')
+    assert [s['label'] for s in box['data']['stats']] == ['Nooie', 'OSAIO']
+    # 任务大小与行数无关
+    assert all(len(repr(job['data'])) < 5000 for job in jobs)
+
+
+def test_render_in_pool_and_skip_unchanged(tmp_path):
+    df = sample_frame()
+    jobs = chart_jobs(df, suggestions_for(df))
+    renderer = ChartRenderer(str(tmp_path), max_workers=2)
+
+    paths = renderer.render(jobs)
+    assert list(paths) == [job['name'] for job in jobs]
+    for path in paths.values():
+        with open(path, 'rb') as f:
+            assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    assert renderer.stats == {'rendered': len(jobs), 'skipped': 0}
+    mtimes = {name: os.stat(path).st_mtime_ns for name, path in paths.items()}
+
+    # 输入不变全部跳过；只改动一列时只重画相关的图
+    renderer = ChartRenderer(str(tmp_path), max_workers=2)
+    renderer.render(jobs)
+    assert renderer.stats == {'rendered': 0, 'skipped': len(jobs)}
+
+    df.loc[:10, 'duration'] = 1000.0
+    changed = chart_jobs(df, suggestions_for(df))
+    renderer.render(changed)
+    redrawn = {name for name, path in paths.items() if os.stat(path).st_mtime_ns != mtimes[name]}
+    assert redrawn == {'correlation_heatmap', 'distribution_duration', 'box_duration_by_brand'}
+
+    # 图片被删除时重画
+    os.remove(paths['bar_brand'])
+    renderer.render(changed)
+    assert os.path.exists(paths['bar_brand'])
+
+
+def test_report_embeds_charts(tmp_path):
+    df = sample_frame(500)
+    reporter = ReportGenerator(output_dir=str(tmp_path))
+    charts = reporter.render_charts(df, suggestions_for(df), max_workers=1)
+    report = open(reporter.generate_markdown_report({}, charts=charts), encoding='utf-8').read()
+    assert '![distribution_amount](charts/distribution_amount.png)' in report
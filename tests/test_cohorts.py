@@ -0,0 +1,132 @@
+"""同期群矩阵测试"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.analysis.cohorts import CohortEngine
+
+JAN = 1735689600
+KEY = ['brand', 'uid']
+
+
+@pytest.fixture
+def users_and_orders():
+    rng = np.random.default_rng(0)
+    n = 3000
+    users = pd.DataFrame({
+        'uid': [f'u{i}' for i in range(n)],
+        'brand': rng.choice(['OSAIO', 'Nooie'], n),
+        'register_time': JAN + rng.integers(0, 240 * 86400, n),
+    })
+    who = rng.integers(0, n, 8000)
+    orders = pd.DataFrame({
+        'uid': users['uid'].to_numpy()[who],
+        'brand': users['brand'].to_numpy()[who],
+        'pay_time': users['register_time'].to_numpy()[who] + rng.integers(-5, 200, 8000) * 86400,
+    })
+    return users, orders
+
+
+def _offsets(users, orders):
+    df = orders.merge(users, on=KEY)
+    df['cohort'] = pd.to_datetime(df['register_time'], unit='s').dt.to_period('M')
+    df['offset'] = (pd.to_datetime(df['pay_time'], unit='s').dt.to_period('M') - df['cohort']).apply(lambda o: o.n)
+    return df[df['offset'] >= 0]
+
+
+def test_retention_and_conversion_match_pandas(users_and_orders):
+    users, orders = users_and_orders
+    as_of = JAN + 240 * 86400
+    engine = CohortEngine()
+    retention = engine.retention(users, orders, KEY, 'register_time', 'pay_time', by=['brand'], periods=6, as_of=as_of)
+    conversion = engine.conversion(users, orders, KEY, 'register_time', 'pay_time', periods=6, as_of=as_of)
+
+    df = _offsets(users, orders)
+    users['cohort'] = pd.to_datetime(users['register_time'], unit='s').dt.to_period('M')
+    sizes = users.groupby(['brand', 'cohort']).size()
+    active = df[df['offset'] < 6].groupby(['brand', 'cohort', 'offset'])['uid'].nunique()
+    expected = active.unstack(fill_value=0).div(sizes, axis=0)
+
+    assert retention.loc[('OSAIO', pd.Period('2025-01')), 'size'] == sizes[('OSAIO', pd.Period('2025-01'))]
+    for k in range(6):
+        got = retention[k].dropna()
+        pd.testing.assert_series_equal(got, expected.loc[got.index, k], check_names=False)
+    # 2025-08 的第1期（2025-09）晚于截止时间
+    assert np.isnan(retention.loc[('Nooie', pd.Period('2025-08')), 1])
+
+    first = df.groupby(KEY + ['cohort'])['offset'].min().reset_index()
+    converted = first[first['offset'] < 6].groupby(['cohort', 'offset']).size().unstack(fill_value=0).cumsum(axis=1)
+    expected_conv = converted.div(users.groupby('cohort').size(), axis=0)
+    assert conversion.loc[pd.Period('2025-02'), 5] == pytest.approx(expected_conv.loc[pd.Period('2025-02'), 5])
+
+
+def test_window_rate_excludes_open_windows(users_and_orders):
+    users, orders = users_and_orders
+    as_of = JAN + 240 * 86400
+    result = CohortEngine().window_rate(users, orders, KEY, 'register_time', 'pay_time', days=7, as_of=as_of)
+
+    df = orders.merge(users, on=KEY)
+    delay = df['pay_time'] - df['register_time']
+    hit = df[(delay >= 0) & (delay <= 7 * 86400)].drop_duplicates(KEY)
+    eligible = users[users['register_time'] <= as_of - 7 * 86400]
+    hit = hit[hit['uid'].isin(eligible['uid'])]
+
+    def month(s):
+        return pd.to_datetime(s, unit='s').dt.to_period('M')
+
+    expected = hit.groupby(month(hit['register_time'])).size() / eligible.groupby(month(eligible['register_time'])).size()
+    pd.testing.assert_series_equal(result['rate'], expected.reindex(result.index), check_names=False)
+
+
+def test_closed_cohorts_are_cached(users_and_orders, tmp_path):
+    users, orders = users_and_orders
+    as_of = JAN + 240 * 86400
+    engine = CohortEngine(cache_dir=str(tmp_path))
+    first = engine.retention(users, orders, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    assert engine.cache.stats['hits'] == 0
+
+    second = engine.retention(users, orders, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    pd.testing.assert_frame_equal(first, second)
+    # 截止 2025-08-29：2025-01 ~ 2025-05 的3个周期都已结束，2025-06 ~ 2025-08 重新计算
+    assert engine.cache.stats['hits'] == 5
+
+
+def test_cache_keyed_by_events(users_and_orders, tmp_path):
+    users, orders = users_and_orders
+    as_of = JAN + 240 * 86400
+    paid = orders.iloc[::2]
+    engine = CohortEngine(cache_dir=str(tmp_path))
+    engine.retention(users, orders, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+
+    # 同一缓存目录换用不同的行为数据，结果与不带缓存的计算一致
+    cached = CohortEngine(cache_dir=str(tmp_path)).retention(
+        users, paid, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    fresh = CohortEngine().retention(users, paid, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    pd.testing.assert_frame_equal(cached, fresh)
+
+
+def test_new_current_event_keeps_closed_cohorts_cached(users_and_orders, tmp_path):
+    users, orders = users_and_orders
+    as_of = JAN + 240 * 86400
+    engine = CohortEngine(cache_dir=str(tmp_path))
+    engine.retention(users, orders, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    engine.window_rate(users, orders, KEY, 'register_time', 'pay_time', days=7, as_of=as_of)
+
+    # 当期（2025-08）新增一笔 2025-01 注册用户的订单：已结束同期群全部命中
+    january = users[users['register_time'] < JAN + 31 * 86400].iloc[0]
+    new = pd.DataFrame({'uid': [january['uid']], 'brand': [january['brand']], 'pay_time': [as_of - 86400]})
+    more = pd.concat([orders, new], ignore_index=True)
+    engine.cache.stats['hits'] = 0
+    result = engine.retention(users, more, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    assert engine.cache.stats['hits'] == 5
+    engine.window_rate(users, more, KEY, 'register_time', 'pay_time', days=7, as_of=as_of)
+    assert engine.cache.stats['hits'] == 5 + 7
+    fresh = CohortEngine().retention(users, more, KEY, 'register_time', 'pay_time', periods=3, as_of=as_of)
+    pd.testing.assert_frame_equal(result, fresh)
+
+    # 落在 2025-01 同期群第1期内的新订单只使该同期群重新计算
+    new['pay_time'] = january['register_time'] + 31 * 86400
+    engine.cache.stats['hits'] = 0
+    engine.retention(users, pd.concat([more, new], ignore_index=True), KEY, 'register_time', 'pay_time',
+                     periods=3, as_of=as_of)
+    assert engine.cache.stats['hits'] == 4
@@ -0,0 +1,70 @@
+"""数据库连接器测试"""
+
+import pandas as pd
+from pymysql.constants import FIELD_TYPE
+from src.db import DBConnector
+
+DESCRIPTION = [
+    ('id', FIELD_TYPE.LONGLONG, None, None, None, None, False),
+    ('uid', FIELD_TYPE.LONG, None, None, None, None, True),
+    ('amount', FIELD_TYPE.NEWDECIMAL, None, None, None, None, True),
+    ('currency', FIELD_TYPE.VAR_STRING, None, None, None, None, True),
+]
+
+
+class FakeCursor:
+    """模拟服务端游标，按 fetchmany 分批返回"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.description = None
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        self.description = DESCRIPTION
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_obj = FakeCursor(rows)
+
+    def cursor(self, cursor_class=None):
+        return self.cursor_obj
+
+
+def _connector(rows):
+    db = DBConnector()
+    db._connection = FakeConnection(rows)
+    return db
+
+
+def test_query_iter_typed_chunks():
+    """分块类型固定，不随块内容变化"""
+    rows = [(1, 10, 9.9, 'USD'), (2, None, None, 'EUR'), (3, 30, 1.5, None)]
+    db = _connector(rows)
+
+    chunks = list(db.query_iter("SELECT 1", chunksize=2))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    for chunk in chunks:
+        assert str(chunk['id'].dtype) == 'int64'
+        assert str(chunk['uid'].dtype) == 'Int64'
+        assert str(chunk['amount'].dtype) == 'float64'
+    assert db._connection.cursor_obj.closed
+
+
+def test_query_iter_empty_result():
+    """空结果也返回带列名的空DataFrame"""
+    db = _connector([])
+    chunks = list(db.query_iter("SELECT 1", dtypes={'currency': 'category'}))
+
+    assert len(chunks) == 1
+    assert list(chunks[0].columns) == ['id', 'uid', 'amount', 'currency']
+    assert isinstance(chunks[0]['currency'].dtype, pd.CategoricalDtype)
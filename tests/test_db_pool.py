@@ -0,0 +1,154 @@
+"""连接池测试"""
+
+import threading
+
+import pytest
+from src.db.pool import ConnectionPool
+
+
+class FakeTunnel:
+    """模拟SSH隧道"""
+
+    def __init__(self):
+        self.is_active = False
+        self.local_bind_port = 13306
+
+    def start(self):
+        self.is_active = True
+
+    def stop(self):
+        self.is_active = False
+
+
+class FakeConnection:
+    """模拟pymysql连接，记录当前库"""
+
+    def __init__(self, port, database):
+        self.port = port
+        self.database = database
+        self.closed = False
+
+    def select_db(self, database):
+        self.database = database
+
+    def ping(self, reconnect=False):
+        if self.closed:
+            raise ConnectionError("closed")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    tunnels = []
+
+    def tunnel_factory():
+        tunnels.append(FakeTunnel())
+        return tunnels[-1]
+
+    p = ConnectionPool(max_size=2, timeout=0.2,
+                       tunnel_factory=tunnel_factory, connect_factory=FakeConnection)
+    p.tunnels = tunnels
+    p.acquire()
+    yield p
+    p.release()
+
+
+def test_reuse_connection_across_brands(pool):
+    """归还后的连接被复用，并在借出时切换品牌库"""
+    with pool.connection('osaio') as conn:
+        first = conn
+        assert conn.database == 'bi_center'
+
+    with pool.connection('nooie') as conn:
+        assert conn is first
+        assert conn.database == 'nooie_bi_center'
+
+    assert pool.size == 1
+    assert len(pool.tunnels) == 1
+
+
+def test_pool_is_bounded(pool):
+    """池满时等待超时"""
+    with pool.connection('osaio'), pool.connection('osaio'):
+        with pytest.raises(TimeoutError):
+            with pool.connection('osaio'):
+                pass
+
+
+def test_concurrent_checkout(pool):
+    """多线程并发借出不同连接"""
+    seen = []
+    barrier = threading.Barrier(2)
+
+    def worker():
+        with pool.connection('osaio') as conn:
+            barrier.wait(timeout=1)
+            seen.append(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in seen}) == 2
+
+
+def test_tunnel_rebuilt_after_drop(pool):
+    """隧道断开后重建，旧连接被丢弃"""
+    with pool.connection('osaio') as conn:
+        old = conn
+    pool.tunnels[-1].is_active = False
+
+    with pool.connection('osaio') as conn:
+        assert conn is not old
+    assert old.closed
+    assert len(pool.tunnels) == 2
+    assert pool.size == 1
+
+
+def test_unknown_brand(pool):
+    with pytest.raises(ValueError):
+        with pool.connection('unknown'):
+            pass
+
+
+def test_failed_tunnel_start_not_counted():
+    """隧道建立失败时不计入使用方，之后的 acquire/release 能正常关闭隧道"""
+    tunnels = []
+
+    class FlakyTunnel(FakeTunnel):
+        def start(self):
+            if len(tunnels) == 1:
+                raise ConnectionError("ssh failed")
+            super().start()
+
+    def tunnel_factory():
+        tunnels.append(FlakyTunnel())
+        return tunnels[-1]
+
+    pool = ConnectionPool(tunnel_factory=tunnel_factory, connect_factory=FakeConnection)
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    pool.acquire()
+    pool.release()
+    assert not tunnels[-1].is_active
+    assert pool._tunnel is None
+
+
+def test_select_db_failure_closes_connection(pool):
+    """切库失败时关闭连接并释放名额"""
+    with pool.connection('osaio') as conn:
+        first = conn
+
+    def fail(database):
+        raise ConnectionError("select_db failed")
+    first.select_db = fail
+
+    with pytest.raises(ConnectionError):
+        with pool.connection('nooie'):
+            pass
+    assert first.closed
+    assert pool.size == 0
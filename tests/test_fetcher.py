@@ -0,0 +1,70 @@
+"""并发拉取测试"""
+
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+from src.db import FetchTask, SQLiteWriter, batched_tasks, fetch_concurrently
+
+
+class SlowDB:
+    """模拟带网络延迟的连接器"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+
+    def query_iter(self, sql, params=None, chunksize=50000, brand=None):
+        time.sleep(self.delay)
+        if sql == 'fail':
+            raise RuntimeError('query failed')
+        yield pd.DataFrame({'db': [brand] * 3, 'value': [1, 2, 3]})
+
+
+def test_fetch_runs_in_parallel(tmp_path):
+    """总耗时接近最慢的单个查询，结果写入同一个SQLite"""
+    path = str(tmp_path / 'out.db')
+    tasks = [FetchTask(f't{i}', 'osaio', 'q', table='items', label='OSAIO') for i in range(4)]
+    tasks.append(FetchTask('stats', 'nooie', 'q', label='Nooie'))
+
+    start = time.monotonic()
+    with SQLiteWriter(path) as writer:
+        frames, counts = fetch_concurrently(SlowDB(), tasks, writer=writer, max_workers=5)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.2 * 3
+    assert counts == {'t0': 3, 't1': 3, 't2': 3, 't3': 3, 'stats': 3}
+    assert list(frames) == ['stats']
+    assert (frames['stats']['brand'] == 'Nooie').all()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 12
+
+
+def test_fetch_propagates_errors():
+    with pytest.raises(RuntimeError):
+        fetch_concurrently(SlowDB(0), [FetchTask('bad', 'osaio', 'fail')])
+
+
+def test_writer_upsert(tmp_path):
+    """指定唯一键时重复写入按键覆盖"""
+    path = str(tmp_path / 'out.db')
+    with SQLiteWriter(path) as writer:
+        writer.put('orders', pd.DataFrame({'brand': ['A', 'A'], 'id': [1, 2], 'v': [1.0, None]}), keys=['brand', 'id'])
+        writer.put('orders', pd.DataFrame({'brand': ['A', 'B'], 'id': [2, 2], 'v': [5.0, 6.0]}), keys=['brand', 'id'])
+
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT brand, id, v FROM orders ORDER BY brand, id").fetchall()
+    assert rows == [('A', 1, 1.0), ('A', 2, 5.0), ('B', 2, 6.0)]
+
+
+def test_batched_tasks_and_key_collection():
+    """第一阶段收集键，第二阶段按键分批查询"""
+    order = FetchTask('order', 'osaio', 'q', label='OSAIO', key_columns=['value'])
+    fetch_concurrently(SlowDB(0), [order])
+    assert order.key_values['value'] == {1, 2, 3}
+
+    tasks = batched_tasks('amount', 'osaio', 'SELECT * FROM t WHERE id IN %s',
+                          order.key_values['value'], batch_size=2, label='OSAIO')
+    assert [t.name for t in tasks] == ['amount#0', 'amount#1']
+    assert [t.params for t in tasks] == [((1, 2),), ((3,),)]
+    assert batched_tasks('empty', 'osaio', 'q', []) == []
@@ -0,0 +1,70 @@
+"""文件格式读取测试"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.analysis import DataAnalyzer
+
+
+@pytest.fixture
+def orders():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        'order_int_id': np.arange(n),
+        'brand': rng.choice(['OSAIO', 'Nooie'], n),
+        'amount': rng.choice([0.0, 2.99, 29.99], n),
+        'currency': rng.choice(['USD', 'EUR'], n),
+    })
+
+
+@pytest.mark.parametrize('name', ['orders.parquet', 'orders.feather', 'orders.csv', 'orders.csv.gz'])
+def test_load_data_columns_and_filters(tmp_path, orders, name):
+    path = str(tmp_path / name)
+    if name.endswith('.parquet'):
+        orders.to_parquet(path, row_group_size=100)
+    elif name.endswith('.feather'):
+        orders.to_feather(path)
+    else:
+        orders.to_csv(path, index=False)
+
+    analyzer = DataAnalyzer()
+    data = analyzer.load_data(path, columns=['order_int_id', 'amount'],
+                              filters=[('brand', '==', 'OSAIO'), ('amount', '>', 0)])
+
+    expected = orders[(orders['brand'] == 'OSAIO') & (orders['amount'] > 0)]
+    assert list(data.columns) == ['order_int_id', 'amount']
+    assert data['order_int_id'].tolist() == expected['order_int_id'].tolist()
+    assert analyzer.metadata['shape'] == (len(expected), 2)
+
+
+def test_load_data_or_filters(tmp_path, orders):
+    path = str(tmp_path / 'orders.csv')
+    orders.to_csv(path, index=False)
+    data = DataAnalyzer().load_data(path, filters=[[('currency', '==', 'EUR')], [('amount', 'in', [29.99])]])
+    expected = orders[(orders['currency'] == 'EUR') | (orders['amount'] == 29.99)]
+    assert len(data) == len(expected)
+
+
+def test_csv_pandas_passthrough_and_dtypes(tmp_path, orders):
+    path = str(tmp_path / 'orders.csv')
+    orders.assign(pay_time='2025-01-31 08:00:00').to_csv(path, index=False)
+
+    # 默认解析器支持全部 pandas 参数，类型与 pd.read_csv 一致
+    assert len(DataAnalyzer().load_data(path, nrows=3)) == 3
+    assert len(DataAnalyzer().load_data(path, skipfooter=1, engine='python')) == len(orders) - 1
+    data = DataAnalyzer().load_data(path, low_memory=False)
+    pd.testing.assert_series_equal(data.dtypes, pd.read_csv(path).dtypes)
+
+    # pyarrow 需显式启用，时间字符串会被解析为 datetime
+    fast = DataAnalyzer().load_data(path, engine='pyarrow', filters=[('brand', '==', 'OSAIO')])
+    assert pd.api.types.is_datetime64_any_dtype(fast['pay_time'])
+    assert len(fast) == (orders['brand'] == 'OSAIO').sum()
+
+
+def test_analyze_file_parquet(tmp_path, orders):
+    path = str(tmp_path / 'orders.parquet')
+    orders.to_parquet(path)
+    results = DataAnalyzer().analyze_file(path, chunksize=200)
+    assert results['metadata']['shape'] == orders.shape
+    assert results['metadata']['chunks'] == 3
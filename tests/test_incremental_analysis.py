@@ -0,0 +1,44 @@
+"""增量分析测试"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from src.analysis import DataAnalyzer
+from src.db.watermark import WatermarkStore
+
+
+def _orders(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'amount': rng.choice([0.0, 2.99, 4.99, 29.99], n),
+        'fee': rng.random(n),
+        'currency': rng.choice(['USD', 'EUR', 'GBP'], n),
+    })
+
+
+def test_update_matches_full_recompute_and_persists():
+    history, day1, day2 = _orders(800, 0), _orders(100, 1), _orders(120, 2)
+    store = WatermarkStore(sqlite3.connect(':memory:'))
+
+    analyzer = DataAnalyzer()
+    analyzer.load_chunks(iter([history]))
+    analyzer.update(day1)
+    analyzer.save_state(store, 'analysis.orders')
+
+    # 新进程：从水位线库恢复状态，只处理当天数据
+    resumed = DataAnalyzer()
+    assert resumed.load_state(store, 'analysis.orders')
+    results = resumed.update(day2)
+
+    full = DataAnalyzer()
+    full.data = pd.concat([history, day1, day2], ignore_index=True)
+    expected = full.analyze()
+
+    pd.testing.assert_frame_equal(pd.DataFrame(results['statistics']['numeric_summary']),
+                                  pd.DataFrame(expected['statistics']['numeric_summary']), rtol=1e-9)
+    pd.testing.assert_frame_equal(pd.DataFrame(results['correlations']),
+                                  pd.DataFrame(expected['correlations']), rtol=1e-9)
+    assert results['outliers'] == expected['outliers']
+    assert results['statistics']['categorical_summary'] == expected['statistics']['categorical_summary']
+    assert results['metadata']['shape'] == (1020, 3)
@@ -0,0 +1,105 @@
+"""订阅生命周期测试"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.sync_subscribe_first_pay import brand_task
+from src.analysis.lifecycle import USER_KEY, order_lifecycle, subscription_lifecycle
+
+JAN = 1735689600
+
+
+def synthetic_orders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    n_subs = max(n // 5, 1)
+    sub = rng.integers(0, n_subs, n)
+    return pd.DataFrame({
+        'order_int_id': np.arange(n),
+        'brand': np.where(sub % 2, 'OSAIO', 'Nooie'),
+        'subscribe_id': np.where(rng.random(n) < 0.02, None, np.char.add('s', sub.astype(str))),
+        'uid': np.char.add('u', (sub // 2).astype(str)),
+        'pay_time': JAN + rng.integers(0, 300, n) * 86400,
+        'amount': np.where(rng.random(n) < 0.2, 0.0, 2.99),
+        'description': rng.choice(['Monthly', 'Free Trial'], n, p=[0.8, 0.2]),
+        'sub_cancel_time': np.where(sub % 3 == 0, JAN + 86400 * 200, 0),
+    })
+
+
+def test_order_lifecycle_matches_groupby_reference():
+    df = synthetic_orders(200_000)
+    result = order_lifecycle(df)
+
+    paid = df[(df['description'] != 'Free Trial') & df['subscribe_id'].notna()]
+    paid = paid.sort_values(['pay_time', 'order_int_id'])
+    grouped = paid.groupby(['brand', 'subscribe_id'])
+    expected_index = grouped.cumcount()
+    expected_gap = grouped['pay_time'].diff() / 86400
+
+    assert result.loc[expected_index.index, 'renewal_index'].tolist() == expected_index.tolist()
+    np.testing.assert_allclose(result.loc[expected_gap.index, 'gap_days'], expected_gap)
+    assert result.loc[~df.index.isin(paid.index), 'renewal_index'].isna().all()
+    assert result['is_renewal'].sum() == (expected_index > 0).sum()
+
+
+def test_history_shifts_renewal_index():
+    df = pd.DataFrame({
+        'brand': 'OSAIO', 'subscribe_id': ['a', 'a', 'b', 'b', ''],
+        'pay_time': [JAN + 100, JAN + 200, JAN + 100, JAN + 200, JAN],
+        'amount': [2.99, 2.99, 0.0, 2.99, 2.99], 'description': ['Monthly', 'Monthly', 'Free Trial', 'Monthly', 'x'],
+    })
+    first_pay = pd.DataFrame({'brand': ['OSAIO'], 'subscribe_id': ['a'], 'first_pay_time': [JAN - 86400 * 30]})
+
+    result = order_lifecycle(df, first_pay=first_pay)
+    assert result['renewal_index'].tolist() == [1, 2, pd.NA, 0, pd.NA]
+
+    summary = subscription_lifecycle(df, first_pay=first_pay).set_index('subscribe_id')
+    assert summary.loc['a', 'renewals'] == 2 and not summary.loc['a', 'converted']
+    assert summary.loc['b', 'renewals'] == 0 and summary.loc['b', 'converted']
+    assert summary.loc['b', 'days_to_convert'] == pytest.approx(100 / 86400)
+
+
+def test_first_pay_ignores_paid_promotion():
+    """促销订单（0.99）早于首笔月付时，subscribe_first_pay 不把它算作首次付费，月付订单仍是首期"""
+    orders = pd.DataFrame({
+        'subscribe_id': ['p', 'p', 'p', 'h'], 'status': 1,
+        'pay_time': [JAN + 100, JAN + 200, JAN + 300, JAN + 500],
+        'amount': [0.99, 4.99, 4.99, 4.99], 'description': ['Promotion', 'Monthly', 'Monthly', 'Monthly'],
+    })
+    history = pd.DataFrame({'subscribe_id': ['h'], 'status': 1, 'pay_time': [JAN - 86400 * 30],
+                            'amount': [4.99], 'description': ['Monthly']})
+    conn = sqlite3.connect(':memory:')
+    pd.concat([orders, history]).to_sql('order', conn, index=False)
+    first_pay = pd.read_sql(brand_task('OSAIO').sql, conn).assign(brand='OSAIO')
+    assert first_pay.set_index('subscribe_id')['first_pay_time'].to_dict() == {'h': JAN - 86400 * 30, 'p': JAN + 200}
+
+    df = orders.assign(brand='OSAIO')
+    result = order_lifecycle(df, first_pay=first_pay)
+    assert result['renewal_index'].tolist() == [pd.NA, 0, 1, 1]
+    assert result['is_renewal'].tolist() == [False, False, True, True]
+
+    summary = subscription_lifecycle(df, first_pay=first_pay).set_index('subscribe_id')
+    assert summary.loc['p', 'renewals'] == 1
+    assert summary.loc['h', 'renewals'] == 1
+
+def test_user_conversion_matches_notebook_logic():
+    df = synthetic_orders(50_000, seed=1)
+    # 折扣促销订单：有金额但属于试用/促销，不算付费转化
+    promo = df.sample(frac=0.05, random_state=1).index
+    df.loc[promo, ['description', 'amount']] = ['Promotion', 0.99]
+    df['is_trial'] = df['description'].isin(['Free Trial', 'Promotion'])
+    summary = subscription_lifecycle(df, key=USER_KEY)
+
+    # notebook 口径：付费订单为 ~is_trial
+    trial_first = df[df['is_trial']].groupby(USER_KEY)['pay_time'].min()
+    paid_first = df[~df['is_trial']].groupby(USER_KEY)['pay_time'].min()
+    merged = trial_first.to_frame('trial').join(paid_first.rename('paid'))
+    expected = (merged['paid'] > merged['trial']).sum()
+    assert summary['converted'].sum() == expected
+    by_amount = df[df['amount'] > 0].groupby(USER_KEY)['pay_time'].min()
+    assert expected != (trial_first.to_frame('trial').join(by_amount.rename('paid'))
+                        .eval('paid > trial').sum())
+
+    churn = subscription_lifecycle(df).dropna(subset=['churn_date'])
+    assert churn['churned'].all() and (churn['churn_date'] == pd.Timestamp('2025-07-20')).all()
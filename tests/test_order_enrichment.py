@@ -0,0 +1,69 @@
+"""订单宽表测试"""
+
+import sqlite3
+
+import pandas as pd
+from src.analysis.order_enrichment import (
+    build_orders_enriched, enrich_orders, load_joined_orders, load_orders_enriched,
+)
+from src.db.parquet_store import ParquetStore
+from src.db.sqlite_loader import BulkLoader, ORDER_DB_SCHEMA
+
+JAN, FEB = 1735689600, 1738368000  # 2025-01-01, 2025-02-01
+
+
+def _sqlite():
+    conn = sqlite3.connect(':memory:')
+    loader = BulkLoader(conn, schema=ORDER_DB_SCHEMA).begin()
+    loader.write('orders', pd.DataFrame({
+        'order_int_id': [1, 2, 3, 4], 'order_id': ['a', 'b', 'c', 'd'], 'uid': ['u1', 'u1', 'u2', 'u3'],
+        'subscribe_id': ['s1', 's1', 's2', None], 'product_id': ['m1', 'y1', 'x', 't7'],
+        'order_status': 1, 'description': ['Monthly', 'Annual', 'Free Trial', None],
+        'pay_time': [JAN + 10, FEB + 10, FEB + 20, FEB + 30], 'amount': [2.99, 29.99, 0.0, 0.0],
+        'currency': 'USD', 'transaction_fee': 0.1, 'is_sub': 1, 'pay_type': 1,
+        'brand': ['OSAIO', 'OSAIO', 'Nooie', 'Nooie'],
+    }))
+    loader.write('subscribe', pd.DataFrame({
+        'subscribe_id': ['s1', 's2'], 'sub_uid': '', 'sub_product_id': 'm1', 'sub_amount': 1.0,
+        'sub_currency': 'USD', 'cycles_unit': ['month', 'day'], 'cycles_time': [1, 7],
+        'sub_status': 1, 'sub_create_time': JAN, 'sub_cancel_time': 0, 'support_dev_num': 1,
+        'cloud_type': 0, 'brand': ['OSAIO', 'Nooie'],
+    }))
+    loader.write('set_meal', pd.DataFrame({
+        'code': ['m1', 'y1'], 'name': ['Monthly', 'Yearly'], 'time': [1, 12], 'file_time': 7,
+        'price': 1.0, 'saleprice': 1.0, 'status': 1, 'time_unit': ['MONTH', 'MONTH'],
+        'currency': 'USD', 'level': 1, 'brand': 'OSAIO',
+    }))
+    loader.write('order_amount_info', pd.DataFrame({
+        'order_int_id': [1, 2], 'model_code': 'c1', 'amount_cny': [21.0, 210.0],
+        'transaction_fee_cny': [1.0, 10.0], 'exchange_rate': 7.0, 'brand': 'OSAIO',
+    }))
+    loader.finish()
+    return conn
+
+
+def test_enrich_orders_derived_columns():
+    df = enrich_orders(load_joined_orders(_sqlite())).set_index('order_int_id')
+
+    assert len(df) == 4
+    assert df['sub_period'].tolist() == ['Monthly', 'Annual', '7-Day Trial', 'Unknown']
+    assert df['order_type'].tolist() == ['Paid', 'Paid', 'Trial/Free', 'Paid']
+    assert df['net_revenue_cny'].tolist() == [20.0, 200.0, 0.0, 0.0]
+    assert df.loc[2, 'meal_name'] == 'Yearly'
+    assert str(df.loc[1, 'order_month']) == '2025-01'
+    assert isinstance(df['sub_period'].dtype, pd.CategoricalDtype)
+
+
+def test_build_and_load_orders_enriched(tmp_path):
+    conn = _sqlite()
+    store = ParquetStore(str(tmp_path))
+    assert build_orders_enriched(conn, store) == 4
+
+    df = load_orders_enriched(store, columns=['order_int_id', 'sub_period', 'order_month'],
+                              brands=['OSAIO'], months=['2025-02'])
+    assert df['order_int_id'].tolist() == [2]
+    assert str(df['order_month'].iloc[0]) == '2025-02'
+
+    # 增量只重建 2 月分区
+    assert build_orders_enriched(conn, store, since_ts=FEB + 100) == 3
+    assert sorted(load_orders_enriched(store, columns=['order_int_id'])['order_int_id']) == [1, 2, 3, 4]
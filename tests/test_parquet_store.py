@@ -0,0 +1,53 @@
+"""Parquet本地存储测试"""
+
+import sqlite3
+
+import pandas as pd
+from src.db.parquet_store import ParquetStore
+from src.db.sqlite_loader import BulkLoader, ORDER_DB_SCHEMA
+
+JAN, FEB = 1735689600, 1738368000  # 2025-01-01, 2025-02-01
+
+
+def _orders(ids, pay_times, brand, amount=1.0):
+    return pd.DataFrame({
+        'order_int_id': ids, 'order_id': [f'o{i}' for i in ids], 'uid': 'u1',
+        'subscribe_id': None, 'product_id': 'm1', 'order_status': 1, 'description': 'Monthly',
+        'pay_time': pay_times, 'amount': amount, 'currency': 'USD', 'transaction_fee': 0.1,
+        'is_sub': 1, 'pay_type': 1, 'brand': brand,
+    })
+
+
+def _sqlite():
+    conn = sqlite3.connect(':memory:')
+    loader = BulkLoader(conn, schema=ORDER_DB_SCHEMA).begin()
+    loader.write('orders', _orders([1, 2], [JAN + 10, FEB + 10], 'OSAIO'))
+    loader.write('orders', _orders([1], [FEB + 20], 'Nooie'))
+    loader.finish()
+    return conn, loader
+
+
+def test_export_and_partition_pruning(tmp_path):
+    conn, _ = _sqlite()
+    store = ParquetStore(str(tmp_path))
+    assert store.export(conn, ['orders', 'cloud_info']) == {'orders': 3}
+
+    df = store.read('orders', columns=['order_int_id', 'amount', 'currency'],
+                    brands=['OSAIO'], months=['2025-02'])
+    assert df['order_int_id'].tolist() == [2]
+    assert list(df.columns) == ['order_int_id', 'amount', 'currency']
+    assert isinstance(df['currency'].dtype, pd.CategoricalDtype)
+    assert len(store.read('orders')) == 3
+
+
+def test_incremental_export_replaces_touched_months(tmp_path):
+    conn, loader = _sqlite()
+    store = ParquetStore(str(tmp_path))
+    store.export(conn, ['orders'])
+
+    loader.write('orders', _orders([2], [FEB + 10], 'OSAIO', amount=9.0))
+    loader.finish()
+    store.export(conn, ['orders'], since={'orders': FEB + 5})
+
+    df = store.read('orders', columns=['order_int_id', 'amount', 'pay_month'], brands=['OSAIO'])
+    assert sorted(zip(df['order_int_id'], df['amount'])) == [(1, 1.0), (2, 9.0)]
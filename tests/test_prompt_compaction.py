@@ -0,0 +1,55 @@
+"""提示词压缩测试"""
+
+import numpy as np
+import pandas as pd
+
+from src.ai import AIAnalyzer, StubClient
+from src.ai.prompt_compaction import compact_summary, estimate_tokens, rank_columns
+from src.analysis.data_analyzer import DataAnalyzer
+
+
+def wide_summary(n_columns=300, rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {f'c{i}': rng.normal(size=rows) for i in range(n_columns)}
+    data['noisy'] = rng.normal(size=rows)
+    data['noisy'][:200] = np.nan
+    data['linked'] = data['c0'] * 2 + rng.normal(scale=0.01, size=rows)
+    data['city'] = rng.choice(['深圳', '上海', '北京'], rows)
+    analyzer = DataAnalyzer()
+    analyzer.data = pd.DataFrame(data)
+    analyzer._collect_metadata()
+    return analyzer.analyze()
+
+
+def test_ranking_puts_informative_columns_first():
+    summary = wide_summary(n_columns=20)
+    ranked = [col for col, _ in rank_columns(summary)]
+    assert set(ranked[:2]) == {'c0', 'linked'}
+    assert ranked.index('noisy') < ranked.index('c5')
+
+
+def test_wide_summary_fits_budget():
+    summary = wide_summary()
+    text, info = compact_summary(summary, token_budget=1500)
+    assert estimate_tokens(text) <= 1500
+    assert info['omitted'] > 0 and f"其余 {info['omitted']} 列" in text
+    assert text.splitlines()[2].startswith(('c0|', 'linked|'))
+    assert 'c0~linked:' in text or 'linked~c0:' in text
+
+    # 预算足够时不省略；零缺失/零异常不输出
+    text, info = compact_summary(wide_summary(n_columns=3), token_budget=10000)
+    assert info['omitted'] == 0
+    city = next(line for line in text.splitlines() if line.startswith('city|'))
+    assert city.split('|')[2] == ''
+
+    # 旧的 dict repr 大小远超预算
+    assert estimate_tokens(repr(summary['statistics'])) > 10 * 1500
+
+
+def test_prompt_uses_budget():
+    client = StubClient(lambda prompt: 'ok')
+    ai = AIAnalyzer(client=client, prompt_token_budget=800)
+    ai.analyze_data_insights(wide_summary())
+    prompt = client.calls[0]['messages'][0]['content']
+    assert estimate_tokens(prompt) < 1000
+    assert '请用中文回答' in prompt
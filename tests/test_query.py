@@ -0,0 +1,114 @@
+"""惰性查询测试"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.analysis.query import scan
+from src.db.parquet_store import ParquetStore
+from src.db.sqlite_loader import BulkLoader, ORDER_DB_SCHEMA, ORDER_DB_INDEXES
+
+
+@pytest.fixture
+def order_db():
+    rng = np.random.default_rng(0)
+    n = 400
+    orders = pd.DataFrame({
+        'order_int_id': np.arange(n), 'order_id': [f'o{i}' for i in range(n)],
+        'uid': [f'u{i}' for i in rng.integers(0, 50, n)],
+        'subscribe_id': [f's{i}' for i in rng.integers(0, 40, n)],
+        'product_id': rng.choice(['m1', 'y1'], n), 'order_status': 1,
+        'description': rng.choice(['Monthly', 'Free Trial'], n),
+        'pay_time': rng.integers(1735689600, 1743465600, n),
+        'amount': rng.choice([0.0, 2.99, 29.99], n), 'currency': 'USD',
+        'transaction_fee': 0.1, 'is_sub': 1, 'pay_type': 1,
+        'brand': rng.choice(['OSAIO', 'Nooie'], n),
+    })
+    subscribe = pd.DataFrame({
+        'subscribe_id': [f's{i}' for i in range(40)] * 2,
+        'brand': ['OSAIO'] * 40 + ['Nooie'] * 40,
+        'cycles_unit': rng.choice(['MONTH', 'YEAR'], 80),
+    })
+    conn = sqlite3.connect(':memory:')
+    loader = BulkLoader(conn, schema=ORDER_DB_SCHEMA).begin()
+    loader.write('orders', orders)
+    loader.write('subscribe', subscribe)
+    loader.finish([s for s in ORDER_DB_INDEXES if ' ON orders(' in s or ' ON subscribe(' in s])
+    return conn, orders.merge(subscribe, on=['brand', 'subscribe_id'], how='left')
+
+
+def _monthly(source):
+    return (scan(source, 'orders')
+            .filter(('brand', '==', 'OSAIO'), ('amount', '>', 0))
+            .derive('month', 'month', 'pay_time')
+            .join('subscribe', on=['brand', 'subscribe_id'], columns=['cycles_unit'])
+            .group_by('month', 'cycles_unit')
+            .agg(orders=(None, 'size'), revenue=('amount', 'sum'), users=('uid', 'nunique'))
+            .filter(('orders', '>=', 5))
+            .order_by('month', '-revenue'))
+
+
+def _expected(joined):
+    df = joined[(joined['brand'] == 'OSAIO') & (joined['amount'] > 0)].copy()
+    df['month'] = pd.to_datetime(df['pay_time'], unit='s').dt.strftime('%Y-%m')
+    result = df.groupby(['month', 'cycles_unit']).agg(
+        orders=('uid', 'size'), revenue=('amount', 'sum'), users=('uid', 'nunique')).reset_index()
+    result = result[result['orders'] >= 5]
+    return result.sort_values(['month', 'revenue'], ascending=[True, False]).reset_index(drop=True)
+
+
+def test_sqlite_compiles_to_single_indexed_statement(order_db):
+    conn, joined = order_db
+    query = _monthly(conn)
+    sql, params = query.to_sql()
+    assert sql.count('SELECT') == 1 and 'GROUP BY' in sql and 'HAVING' in sql
+    assert params == ['OSAIO', 0, 5]
+    recent = scan(conn, 'orders').filter(('pay_time', '>=', 1743000000)).agg(revenue=('amount', 'sum'))
+    assert any('idx_orders_pay_time' in step for step in recent.explain())
+
+    pd.testing.assert_frame_equal(query.collect(), _expected(joined), check_dtype=False)
+
+
+def test_parquet_matches_sqlite(order_db, tmp_path):
+    conn, joined = order_db
+    store = ParquetStore(str(tmp_path))
+    store.export(conn, ['orders', 'subscribe'])
+
+    pd.testing.assert_frame_equal(_monthly(store).collect(), _expected(joined), check_dtype=False)
+
+
+def test_projection_filters_and_limit(order_db):
+    conn, joined = order_db
+    query = scan(conn, 'orders').filter([[('brand', '==', 'Nooie')], [('amount', 'in', [29.99])]])
+    result = query.select('order_int_id', 'amount').order_by('-order_int_id').limit(3).collect()
+
+    expected = joined[(joined['brand'] == 'Nooie') | (joined['amount'] == 29.99)]
+    assert list(result.columns) == ['order_int_id', 'amount']
+    assert result['order_int_id'].tolist() == sorted(expected['order_int_id'], reverse=True)[:3]
+    # 原查询不受后续链式调用影响
+    assert len(query.collect()) == len(expected)
+
+
+def test_path_source_closes_connection(order_db, tmp_path, monkeypatch):
+    conn, joined = order_db
+    path = str(tmp_path / 'orders.db')
+    with sqlite3.connect(path) as disk:
+        conn.backup(disk)
+    disk.close()
+
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr('src.analysis.query.sqlite3.connect', tracking_connect)
+    query = _monthly(path)
+    pd.testing.assert_frame_equal(query.collect(), _expected(joined), check_dtype=False)
+    query.explain()
+    assert len(opened) == 2
+    for used in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            used.execute('SELECT 1')
@@ -0,0 +1,42 @@
+"""报告生成测试"""
+
+import os
+
+from src.ai import AIAnalyzer, StubClient
+from src.reporting import ReportGenerator
+
+RESULTS = {
+    'metadata': {'shape': (3, 2), 'columns': ['a', 'b'], 'dtypes': {'a': 'int64', 'b': 'float64'},
+                 'missing_values': {'a': 0, 'b': 1}, 'memory_usage': 1024},
+    'statistics': {'missing_values': {'a': 0, 'b': 1}, 'data_types': {'a': 'int64', 'b': 'float64'}},
+    'outliers': {'a': 1},
+}
+
+
+def test_streamed_insights_written_progressively(tmp_path):
+    client = StubClient(lambda prompt: '数据质量良好，列 b 有一个缺失值。', chunk_size=4, chunk_latency=0.01)
+    ai = AIAnalyzer(client=client)
+    reporter = ReportGenerator(output_dir=str(tmp_path))
+
+    snapshots = []
+
+    def on_text(text):
+        # 每段回调时文件中已包含数据部分和到目前为止的洞察
+        files = os.listdir(tmp_path)
+        with open(tmp_path / files[0], encoding='utf-8') as f:
+            snapshots.append((text, f.read()))
+
+    path = reporter.generate_markdown_report(RESULTS, ai.stream_data_insights(RESULTS), on_text=on_text)
+
+    first_text, first_snapshot = snapshots[0]
+    assert '## 2. 统计分析' in first_snapshot and first_snapshot.endswith(first_text)
+    assert len(snapshots) == 5
+
+    # 与一次性传入完整文本的报告内容一致（生成时间除外）
+    streamed = open(path, encoding='utf-8').read()
+    expected = reporter._build_markdown_content('数据分析报告', RESULTS, client.respond(''))
+
+    def strip(text):
+        return [line for line in text.splitlines() if not line.startswith('生成时间')]
+
+    assert strip(streamed) == strip(expected)
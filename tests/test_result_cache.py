@@ -0,0 +1,49 @@
+"""分析结果缓存测试"""
+
+import os
+import time
+
+import pandas as pd
+from src.analysis import DataAnalyzer
+from src.analysis.result_cache import ResultCache
+
+
+def test_analyze_hits_cache_until_file_changes(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({'a': [1, 2, 3, 100], 'b': ['x', 'y', 'x', 'y']}).to_csv(path, index=False)
+    cache_dir = str(tmp_path / 'cache')
+
+    first = DataAnalyzer(cache_dir=cache_dir)
+    first.load_data(str(path))
+    expected = first.analyze()
+    assert first.cache.stats == {'hits': 0, 'misses': 1, 'evictions': 0}
+
+    second = DataAnalyzer(cache_dir=cache_dir)
+    second.load_data(str(path))
+    assert second.analyze() == expected
+    assert second.cache.stats['hits'] == 1
+
+    # 替换数据后按内容指纹寻址
+    second.data = second.data[second.data['a'] < 100]
+    assert second.analyze()['statistics']['numeric_summary']['a']['max'] == 3.0
+
+    # 文件变化后指纹改变
+    pd.DataFrame({'a': [5, 6], 'b': ['z', 'z']}).to_csv(path, index=False)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    third = DataAnalyzer(cache_dir=cache_dir)
+    third.load_data(str(path))
+    assert third.analyze()['statistics']['numeric_summary']['a']['max'] == 6.0
+    assert third.cache.stats['misses'] == 1
+
+
+def test_cache_evicts_by_size_and_age(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=3000, max_age=60)
+    for i in range(5):
+        cache.put(f'k{i}', 'x' * 1000)
+        os.utime(tmp_path / f'k{i}.pkl', (time.time() - 50 + i, time.time() - 50 + i))
+    assert cache.get('k0') is None
+    assert cache.get('k4') == 'x' * 1000
+
+    os.utime(tmp_path / 'k4.pkl', (time.time() - 120, time.time() - 120))
+    assert cache.get('k4') is None
+    assert cache.stats['evictions'] >= 2
@@ -0,0 +1,68 @@
+"""按天汇总测试"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from src.analysis.rollups import RollupStore
+
+MAR_31 = 1743379200  # 2025-03-31 00:00 UTC
+
+
+def _devices(start, end, n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'create_time': rng.integers(start, end, n),
+        'brand': rng.choice(['OSAIO', 'Nooie'], n),
+        'model_code': rng.choice(['c1', 'c2', None], n),
+    })
+
+
+def _expected(df, freq):
+    period = pd.to_datetime(df['create_time'], unit='s').dt.to_period(freq)
+    return df.groupby([period.rename('period'), 'brand']).size()
+
+
+def test_rollup_matches_raw_groupby():
+    df = _devices(1735689600, MAR_31, 2000, 0)
+    rollups = RollupStore(sqlite3.connect(':memory:'))
+    assert rollups.update('devices', df) <= 90 * 2 * 3
+
+    for freq in ['W', 'M']:
+        result = rollups.query('devices', freq=freq).set_index(['period', 'brand'])['devices']
+        pd.testing.assert_series_equal(result, _expected(df, freq), check_names=False, check_dtype=False)
+
+    monthly = rollups.query('devices', freq='M', dimensions=['brand', 'model_code'], brands=['Nooie'])
+    assert set(monthly['model_code']) == {'c1', 'c2', 'Unknown'}
+    assert monthly['devices'].sum() == (df['brand'] == 'Nooie').sum()
+
+
+def test_incremental_update_and_partial_period_days():
+    df = _devices(1735689600, MAR_31, 2000, 0)
+    rollups = RollupStore(sqlite3.connect(':memory:'))
+    rollups.update('devices', df[df['create_time'] < 1740787200])  # 截止 2025-03-01
+
+    since = 1740787200
+    rollups.update('devices', df[df['create_time'] >= since], since_ts=since)
+    monthly = rollups.query('devices', freq='M', dimensions=[], as_of='2025-03-15')
+    assert monthly['devices'].tolist() == _expected(df, 'M').groupby(level=0).sum().tolist()
+    assert monthly['days'].tolist() == [31, 28, 15]
+
+
+def test_build_order_rollup_from_enriched(tmp_path):
+    from src.analysis.order_enrichment import build_orders_enriched
+    from src.analysis.rollups import build_order_rollup
+    from src.db.parquet_store import ParquetStore
+    from tests.test_order_enrichment import FEB, _sqlite
+
+    conn = _sqlite()
+    store = ParquetStore(str(tmp_path))
+    build_orders_enriched(conn, store)
+    rollups = RollupStore(conn)
+    build_order_rollup(store, rollups)
+    build_order_rollup(store, rollups, since_ts=FEB + 100)
+
+    monthly = rollups.query('orders', freq='M', dimensions=['brand', 'order_type'])
+    assert monthly['orders'].sum() == 4
+    feb = monthly[(monthly['period'] == '2025-02') & (monthly['brand'] == 'OSAIO')]
+    assert feb['amount_cny'].tolist() == [210.0]
@@ -0,0 +1,57 @@
+"""SQLite批量写入测试"""
+
+import sqlite3
+
+import pandas as pd
+from src.db.sqlite_loader import BulkLoader, ORDER_DB_SCHEMA, delete_missing
+
+
+def test_bulk_loader_schema_and_upsert():
+    """按 schema 建表（含 WITHOUT ROWID 主键），重复写入按主键覆盖"""
+    conn = sqlite3.connect(':memory:')
+    loader = BulkLoader(conn, schema=ORDER_DB_SCHEMA).begin()
+
+    loader.write('order_amount_info', pd.DataFrame({
+        'order_int_id': [1, 2], 'model_code': ['A', None], 'amount_cny': [1.5, float('nan')],
+        'transaction_fee_cny': [0.1, 0.2], 'exchange_rate': [7.0, 7.1], 'brand': ['OSAIO', 'OSAIO'],
+    }))
+    loader.write('order_amount_info', pd.DataFrame({
+        'order_int_id': pd.array([2], dtype='Int64'), 'model_code': ['B'], 'amount_cny': [3.0],
+        'transaction_fee_cny': [0.3], 'exchange_rate': [7.2], 'brand': ['OSAIO'],
+    }))
+    loader.finish(["CREATE INDEX IF NOT EXISTS idx_amount_order_id ON order_amount_info(order_int_id)"])
+
+    ddl = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'order_amount_info'").fetchone()[0]
+    assert 'WITHOUT ROWID' in ddl
+    assert '"amount_cny" REAL' in ddl
+
+    rows = conn.execute("SELECT order_int_id, model_code, amount_cny FROM order_amount_info ORDER BY 1").fetchall()
+    assert rows == [(1, 'A', 1.5), (2, 'B', 3.0)]
+
+
+def test_bulk_loader_unknown_table():
+    """schema 之外的表按 DataFrame 建表后追加"""
+    conn = sqlite3.connect(':memory:')
+    loader = BulkLoader(conn).begin()
+    loader.write('misc', pd.DataFrame({'a': [1, 2], 'b': ['x', None]}))
+    loader.write('misc', pd.DataFrame({'a': [3], 'b': ['y']}))
+    loader.finish()
+
+    assert conn.execute("SELECT COUNT(*), COUNT(b) FROM misc").fetchone() == (3, 2)
+
+
+def test_delete_missing_scoped_to_brand():
+    """对账清理：只删除指定品牌中本次未拉到的键"""
+    conn = sqlite3.connect(':memory:')
+    loader = BulkLoader(conn, schema=ORDER_DB_SCHEMA).begin()
+    loader.write('subscribe', pd.DataFrame({
+        'subscribe_id': ['s1', 's2', 's3', 's1'], 'brand': ['OSAIO', 'OSAIO', 'OSAIO', 'Nooie'],
+    }))
+    loader.write('orders', pd.DataFrame({'order_int_id': [1, 2, 3], 'brand': 'OSAIO'}))
+    loader.finish()
+
+    assert delete_missing(conn, 'subscribe', 'subscribe_id', {'s1', 's3'}, brand='OSAIO') == 1
+    assert conn.execute("SELECT brand, subscribe_id FROM subscribe ORDER BY 1, 2").fetchall() == [
+        ('Nooie', 's1'), ('OSAIO', 's1'), ('OSAIO', 's3')]
+    assert delete_missing(conn, 'orders', 'order_int_id', [1, 3], brand='OSAIO') == 1
+    assert [r[0] for r in conn.execute("SELECT order_int_id FROM orders ORDER BY 1")] == [1, 3]
@@ -0,0 +1,71 @@
+"""流式统计测试"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.analysis import DataAnalyzer
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        'x': rng.normal(size=n),
+        'ts': rng.integers(1_700_000_000, 1_800_000_000, n),
+        'e': rng.exponential(size=n),
+        'cat': rng.choice(['a', 'b', 'c', 'd'], n, p=[0.4, 0.3, 0.2, 0.1]),
+    })
+    df.loc[::7, 'x'] = np.nan
+    return df
+
+
+def _in_memory(df):
+    analyzer = DataAnalyzer()
+    analyzer.data = df
+    analyzer._collect_metadata()
+    return analyzer.analyze()
+
+
+def test_chunks_match_in_memory_below_sketch_capacity(frame):
+    exact = _in_memory(frame)
+    chunks = (frame.iloc[i:i + 700] for i in range(0, len(frame), 700))
+    streamed = DataAnalyzer().analyze_chunks(chunks, quantile_capacity=4096)
+
+    pd.testing.assert_frame_equal(pd.DataFrame(streamed['statistics']['numeric_summary']),
+                                  pd.DataFrame(exact['statistics']['numeric_summary']), rtol=1e-9)
+    pd.testing.assert_frame_equal(pd.DataFrame(streamed['correlations']),
+                                  pd.DataFrame(exact['correlations']), rtol=1e-9)
+    assert streamed['outliers'] == exact['outliers']
+    assert streamed['statistics']['categorical_summary'] == exact['statistics']['categorical_summary']
+    assert streamed['statistics']['missing_values'] == exact['statistics']['missing_values']
+    assert streamed['metadata']['shape'] == exact['metadata']['shape']
+
+
+def test_sketches_approximate_large_streams(frame):
+    exact = _in_memory(frame)
+    chunks = (frame.iloc[i:i + 500] for i in range(0, len(frame), 500))
+    streamed = DataAnalyzer().analyze_chunks(chunks, quantile_capacity=128)
+
+    for col in ['x', 'ts', 'e']:
+        summary = streamed['statistics']['numeric_summary'][col]
+        expected = exact['statistics']['numeric_summary'][col]
+        assert summary['mean'] == pytest.approx(expected['mean'])
+        spread = expected['75%'] - expected['25%']
+        for q in ['25%', '50%', '75%']:
+            assert abs(summary[q] - expected[q]) < 0.05 * spread
+        assert abs(streamed['outliers'][col] - exact['outliers'][col]) <= 0.01 * len(frame)
+
+
+def test_analyze_file_csv(tmp_path, frame):
+    path = tmp_path / 'data.csv'
+    frame.to_csv(path, index=False)
+
+    analyzer = DataAnalyzer()
+    results = analyzer.analyze_file(str(path), chunksize=1000)
+
+    assert analyzer.data is None
+    assert analyzer.metadata['chunks'] == 3
+    assert results['metadata']['shape'] == frame.shape
+    assert results['statistics']['missing_values']['x'] == int(frame['x'].isna().sum())
+    assert results['statistics']['categorical_summary']['cat']['top_values']['a'] == (frame['cat'] == 'a').sum()
@@ -0,0 +1,25 @@
+"""同步水位线测试"""
+
+import sqlite3
+
+from src.db.watermark import WatermarkStore
+
+
+def test_watermark_roundtrip():
+    store = WatermarkStore(sqlite3.connect(':memory:'))
+    assert store.get('OSAIO', 'orders') == {}
+    assert store.last_full_sync('OSAIO') is None
+
+    store.set('OSAIO', 'orders', pay_time=100, max_id=5, full_sync=True)
+    store.set('OSAIO', 'orders', pay_time=200)
+
+    mark = store.get('OSAIO', 'orders')
+    assert mark['pay_time'] == 200
+    assert mark['max_id'] == 5
+    assert store.last_full_sync('OSAIO') is not None
+
+    # 删除不再使用的表水位线
+    store.set('OSAIO', 'cloud_info', max_id=1, full_sync=True)
+    store.delete('OSAIO', 'cloud_info')
+    assert store.get('OSAIO', 'cloud_info') == {}
+    assert store.get('OSAIO', 'orders')['max_id'] == 5